@@ -1,7 +1,17 @@
-from fastapi import FastAPI
+import time
+
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import REGISTRY
+from prometheus_client.exposition import choose_encoder
 from app.routers import timelines_router
-from app.database import engine, Base
+from app.database import init_db, count_statements
+from app.telemetry import (
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUEST_QUERIES,
+    accept_trace_id,
+    trace_id_var,
+)
 
 app = FastAPI(
     title="Veritas API",
@@ -18,15 +28,42 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def observe_request(request: Request, call_next):
+    """
+    Tag the request with a trace id (honouring a well-formed incoming X-Trace-ID), which is
+    handed on to any job it enqueues, and record latency and SQL statement count.
+    """
+    trace_id = accept_trace_id(request.headers.get("x-trace-id"))
+    token = trace_id_var.set(trace_id)
+    start = time.perf_counter()
+    try:
+        with count_statements() as statements:
+            response = await call_next(request)
+    finally:
+        trace_id_var.reset(token)
+
+    # Label by route template, not raw path, to keep label cardinality bounded
+    route = request.scope.get("route")
+    route_path = route.path if route else "unmatched"
+    HTTP_REQUEST_DURATION.labels(request.method, route_path, response.status_code).observe(
+        time.perf_counter() - start, exemplar={"trace_id": trace_id}
+    )
+    HTTP_REQUEST_QUERIES.labels(request.method, route_path).observe(statements[0])
+
+    response.headers["X-Trace-ID"] = trace_id
+    return response
+
+
 # Include routers
 app.include_router(timelines_router)
 
 
 @app.on_event("startup")
 async def startup():
-    """Initialize database tables on startup"""
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    """Initialize database tables and indexes on startup"""
+    await init_db()
 
 
 @app.get("/")
@@ -38,6 +75,13 @@ async def root():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """Prometheus metrics of this API process (workers expose their own, see worker.py)"""
+    encoder, content_type = choose_encoder(request.headers.get("accept"))
+    return Response(content=encoder(REGISTRY), media_type=content_type)
+
+
 @app.get("/health")
 async def health():
     return {"status": "healthy"}
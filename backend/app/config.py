@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -8,6 +10,117 @@ class Settings(BaseSettings):
     google_cloud_location: str = "global"
     redis_url: str = "redis://localhost:6379"
     environment: str = "development"
+    db_echo: bool = False  # log every SQL statement (slow; debugging only)
+
+    # Connection pool (per engine, per process); timeouts/recycle in seconds
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_pre_ping: bool = True
+    db_pool_recycle: int = 30 * 60
+    # Optional read replica for read-only endpoints (same driver as DATABASE_URL)
+    database_replica_url: Optional[str] = None
+
+    # Per-call Gemini timeouts (seconds)
+    gemini_skeleton_timeout: float = 90.0
+    gemini_investigate_timeout: float = 60.0
+    gemini_synthesize_timeout: float = 60.0
+
+    # Event investigation chains running at once per worker process, across all its
+    # timelines (granted by event priority), and at most per timeline (fairness cap)
+    investigation_slots: int = 8
+    investigation_concurrency: int = 5
+    # Max finished events written per group commit
+    persist_batch_size: int = 10
+
+    # Client-side Gemini quotas for the whole fleet: requests/min and tokens/min per model.
+    # Shared through Redis by default; with local buckets (or while Redis is down) each
+    # process gets 1/gemini_rate_limit_processes of them, so set it to the process count.
+    gemini_rate_limit_shared: bool = True
+    gemini_rate_limit_processes: int = 1
+    gemini_pro_rpm: int = 60
+    gemini_pro_tpm: int = 1_000_000
+    gemini_flash_rpm: int = 300
+    gemini_flash_tpm: int = 4_000_000
+    gemini_output_token_estimate: int = 2000  # reserved per call until real usage is known
+
+    # Retries (exponential backoff with full jitter) and circuit breaker
+    gemini_max_retries: int = 4
+    gemini_backoff_base: float = 1.0
+    gemini_backoff_max: float = 30.0
+    gemini_breaker_failure_threshold: int = 5
+    gemini_breaker_reset_timeout: float = 30.0
+
+    # Gemini prices in USD per million tokens (prompt, output), for cost metrics
+    gemini_pro_price_input: float = 1.25
+    gemini_pro_price_output: float = 10.0
+    gemini_flash_price_input: float = 0.30
+    gemini_flash_price_output: float = 2.50
+
+    # Cosine similarity at which two claims count as the same claim before synthesis
+    claim_similarity_threshold: float = 0.7
+
+    # Response compression (bodies smaller than compression_min_size bytes are sent as-is)
+    compression_min_size: int = 1024
+    gzip_level: int = 6
+    brotli_quality: int = 5
+    compressed_cache_entries: int = 256  # compressed snapshot bodies kept per process
+
+    # Prompt token budgets (estimated input tokens per call); the lowest-ranked
+    # articles/claims are dropped to fit, free-text fields are capped separately
+    prompt_budget_skeleton: int = 1_000
+    prompt_budget_investigate: int = 4_000
+    prompt_budget_synthesize: int = 6_000
+    prompt_field_max_tokens: int = 250
+
+    # LLM response cache (in-process LRU + Redis); TTLs in seconds.
+    # Skeletons track breaking news, so they expire sooner than investigations.
+    llm_cache_enabled: bool = True
+    llm_cache_max_entries: int = 1024
+    llm_cache_ttl_skeleton: int = 30 * 60
+    llm_cache_ttl_investigate: int = 24 * 60 * 60
+    llm_cache_ttl_synthesize: int = 24 * 60 * 60
+
+    # Coalescing of duplicate timeline creations (seconds)
+    coalesce_inflight_ttl: int = 60 * 60  # safety expiry while a timeline is processing
+    coalesce_completed_window: int = 10 * 60  # reuse a completed timeline for this long (0 = never)
+    coalesce_claim_grace: int = 30  # seconds a claim is trusted before its timeline row exists
+
+    # Timeline revision log: a full checkpoint every N revisions, deltas in between
+    # (reconstructing any revision reads at most N rows)
+    revision_checkpoint_interval: int = 10
+
+    # Outlet registry: aliases and profiles cached per process (see seed_outlets.py);
+    # cached credibility is re-read after the TTL to pick up other workers' samples
+    outlet_cache_entries: int = 4096
+    outlet_profile_ttl: int = 300  # seconds
+
+    # Cross-timeline reuse of investigated events, matched on (event day, title terms)
+    event_knowledge_enabled: bool = True
+    event_knowledge_max_age: int = 3 * 24 * 60 * 60  # seconds an investigation stays reusable
+    # Title term overlap (Jaccard) for a same-day entry to count as the same event when the
+    # fingerprints differ; 0.6 let "Spire collapses..." take "Roof collapses..."'s investigation
+    event_knowledge_match_threshold: float = 0.8
+
+    # Refresh diffing: a proposed development only updates a stored event with a near-identical
+    # title dated within this many days of it; anything else is a new event
+    refresh_match_threshold: float = 0.8
+    refresh_match_window_days: int = 1
+
+    # Local news corpus used to ground investigations (see ingest_news.py)
+    news_index_path: str = "news_index.db"
+    news_retrieval_top_k: int = 8
+    news_retrieval_window_days: int = 3  # articles published within +/- this many days
+    # Share of an event title's significant terms an article must match to ground on it;
+    # with none left the event is investigated ungrounded
+    news_retrieval_min_coverage: float = 0.5
+
+    # Job queue / worker
+    job_visibility_timeout: int = 120  # seconds a lease lasts without a heartbeat
+    job_max_attempts: int = 3
+    worker_concurrency: int = 2  # jobs processed at once per worker process
+    worker_poll_interval: float = 1.0
+    worker_metrics_port: int = 9101  # Prometheus endpoint of each worker process (0 = off)
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -1,25 +1,153 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+import logging
+import time
+
+from sqlalchemy import event, inspect, make_url, text
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from app.config import settings
+from app.telemetry import DB_POOL_WAIT, pool_collector
+
+logger = logging.getLogger(__name__)
+
+
+def _create_engine(url: str):
+    options = {"echo": settings.db_echo, "pool_pre_ping": settings.db_pool_pre_ping}
+    # In-memory SQLite runs on a single static connection with nothing to size
+    if make_url(url).database not in (None, "", ":memory:"):
+        options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+        )
+    return create_async_engine(url, future=True, **options)
 
-engine = create_async_engine(
-    settings.database_url,
-    echo=settings.environment == "development",
-    future=True
-)
+
+engine = _create_engine(settings.database_url)
+
+# Read-only endpoints go to the replica when one is configured
+read_engine = _create_engine(settings.database_replica_url) if settings.database_replica_url else engine
 
 AsyncSessionLocal = async_sessionmaker(
     engine,
     class_=AsyncSession,
     expire_on_commit=False
 )
+ReadSessionLocal = async_sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False
+) if read_engine is not engine else AsyncSessionLocal
+
+
+def pool_stats(pool) -> dict:
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+    } if hasattr(pool, "checkedout") else {}
+
+
+pool_collector.add("primary", lambda: pool_stats(engine.sync_engine.pool))
+if read_engine is not engine:
+    pool_collector.add("replica", lambda: pool_stats(read_engine.sync_engine.pool))
 
 Base = declarative_base()
 
 
-async def get_db():
-    async with AsyncSessionLocal() as session:
+def dialect_insert(db, model):
+    """INSERT for the session's backend, supporting ON CONFLICT (PostgreSQL or SQLite)"""
+    dialect = {"postgresql": postgresql, "sqlite": sqlite}[db.bind.dialect.name]
+    return dialect.insert(model)
+
+
+async def init_db():
+    """
+    Create missing tables, plus any columns and indexes added to tables that
+    already exist (new columns must be nullable or have a server default)
+    """
+    def create(sync_conn):
+        Base.metadata.create_all(sync_conn)
+        inspector = inspect(sync_conn)
+        ddl = sync_conn.dialect.ddl_compiler(sync_conn.dialect, None)
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    sync_conn.execute(text(
+                        f"ALTER TABLE {ddl.preparer.format_table(table)} "
+                        f"ADD COLUMN {ddl.get_column_specification(column)}"
+                    ))
+            for index in table.indexes:
+                index.create(sync_conn, checkfirst=True)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(create)
+
+
+async def _session(session_factory, pool: str):
+    async with session_factory() as session:
         try:
+            # Check the connection out up front so pool waits are measured per request
+            start = time.perf_counter()
+            await session.connection()
+            DB_POOL_WAIT.labels(pool).observe(time.perf_counter() - start)
             yield session
         finally:
             await session.close()
+
+
+async def get_db():
+    async for session in _session(AsyncSessionLocal, "primary"):
+        yield session
+
+
+def using_replica() -> bool:
+    return read_engine is not engine
+
+
+async def get_read_db():
+    """Session for read-only endpoints: the replica if configured, else the primary"""
+    async for session in _session(ReadSessionLocal, "replica" if using_replica() else "primary"):
+        yield session
+
+
+# Statement counters active in the current task (innermost last)
+_statement_counters: ContextVar[tuple] = ContextVar("statement_counters", default=())
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    for counter in _statement_counters.get():
+        counter[0] += 1
+
+
+for _engine in {engine, read_engine}:
+    event.listen(_engine.sync_engine, "before_cursor_execute", _count_statement)
+
+
+@contextmanager
+def count_statements():
+    """Count SQL statements executed inside the block; yields a one-item list"""
+    counter = [0]
+    token = _statement_counters.set(_statement_counters.get() + (counter,))
+    try:
+        yield counter
+    finally:
+        _statement_counters.reset(token)
+
+
+@contextmanager
+def query_budget(limit: int, label: str):
+    """
+    Watch a read path for N+1 regressions: exceeding the budget logs a warning.
+    The exact counts are asserted in tests/test_query_budgets.py.
+    """
+    with count_statements() as counter:
+        yield counter
+
+    if counter[0] > limit:
+        logger.warning("%s executed %d SQL statements (budget %d)", label, counter[0], limit)
@@ -1,3 +1,17 @@
-from app.models.timeline import Timeline, Event, Source, Branch
+from app.models.timeline import (
+    Timeline,
+    Event,
+    Source,
+    Branch,
+    TimelineSnapshot,
+    TimelineRevision,
+    EventKnowledge,
+    Outlet,
+    OutletAlias,
+    SearchDocument,
+)
 
-__all__ = ["Timeline", "Event", "Source", "Branch"]
+__all__ = [
+    "Timeline", "Event", "Source", "Branch", "TimelineSnapshot", "TimelineRevision", "EventKnowledge",
+    "Outlet", "OutletAlias", "SearchDocument",
+]
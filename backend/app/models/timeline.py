@@ -1,6 +1,9 @@
-from sqlalchemy import Column, String, DateTime, JSON, Float, ForeignKey, Text, Integer
+from sqlalchemy import (
+    Column, String, DateTime, JSON, Float, ForeignKey, Text, Integer, Index, Boolean, UniqueConstraint, DDL, event
+)
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from datetime import datetime, timezone
 import uuid
 from app.database import Base
 
@@ -9,8 +12,17 @@ def generate_uuid():
     return str(uuid.uuid4())
 
 
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
 class Timeline(Base):
     __tablename__ = "timelines"
+    __table_args__ = (
+        # Keyset pagination of the timeline list, optionally filtered by status
+        Index("ix_timelines_created_at_id", "created_at", "id"),
+        Index("ix_timelines_status_created_at_id", "status", "created_at", "id"),
+    )
 
     id = Column(String, primary_key=True, default=generate_uuid)
     topic = Column(String, nullable=False)
@@ -19,15 +31,26 @@ class Timeline(Base):
     progress = Column(String, default="0/0")
     date_range_start = Column(DateTime, nullable=True)
     date_range_end = Column(DateTime, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # bumped by every refresh
+    # Set client-side with microseconds, so list cursors compare exactly on every backend
+    created_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
-    events = relationship("Event", back_populates="timeline", cascade="all, delete-orphan")
+    events = relationship(
+        "Event",
+        back_populates="timeline",
+        cascade="all, delete-orphan",
+        order_by="Event.order"
+    )
 
 
 class Event(Base):
     __tablename__ = "events"
+    __table_args__ = (
+        # Serves both timeline_id lookups and ordered event retrieval
+        Index("ix_events_timeline_id_order", "timeline_id", "order"),
+    )
 
     id = Column(String, primary_key=True, default=generate_uuid)
     timeline_id = Column(String, ForeignKey("timelines.id"), nullable=False)
@@ -48,7 +71,7 @@ class Branch(Base):
     __tablename__ = "branches"
 
     id = Column(String, primary_key=True, default=generate_uuid)
-    event_id = Column(String, ForeignKey("events.id"), nullable=False)
+    event_id = Column(String, ForeignKey("events.id"), nullable=False, index=True)
     narrative = Column(Text, nullable=False)
     credibility_score = Column(Float, default=0.5)
     evidence = Column(Text, nullable=True)
@@ -64,10 +87,12 @@ class Source(Base):
     __tablename__ = "sources"
 
     id = Column(String, primary_key=True, default=generate_uuid)
-    event_id = Column(String, ForeignKey("events.id"), nullable=False)
-    branch_id = Column(String, ForeignKey("branches.id"), nullable=True)
+    event_id = Column(String, ForeignKey("events.id"), nullable=False, index=True)
+    branch_id = Column(String, ForeignKey("branches.id"), nullable=True, index=True)
     url = Column(String, nullable=False)
+    # As the model gave them; responses use the outlet's name and credibility where resolved
     outlet = Column(String, nullable=False)
+    outlet_id = Column(String, ForeignKey("outlets.id"), nullable=True, index=True)
     credibility_score = Column(Float, default=0.5)
     publish_date = Column(DateTime, nullable=True)
     claims = Column(JSON, default=list)  # List of claim strings
@@ -76,3 +101,118 @@ class Source(Base):
     # Relationships
     event = relationship("Event", back_populates="sources")
     branch = relationship("Branch", back_populates="sources")
+
+
+class TimelineSnapshot(Base):
+    """Serialized TimelineResponse of a completed timeline, served as-is on reads"""
+    __tablename__ = "timeline_snapshots"
+
+    timeline_id = Column(String, ForeignKey("timelines.id"), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)  # bumped on every re-materialization
+    etag = Column(String, nullable=True)
+    body = Column(Text, nullable=True)  # NULL while the timeline is being (re)written
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+class TimelineRevision(Base):
+    """
+    One materialized version of a timeline (numbered like its snapshot), stored
+    as a delta against the previous revision or as a full checkpoint; see
+    services/timeline_revisions.py
+    """
+    __tablename__ = "timeline_revisions"
+    __table_args__ = (
+        # Reconstruction "as of" a timestamp
+        Index("ix_timeline_revisions_timeline_id_created_at", "timeline_id", "created_at"),
+    )
+
+    timeline_id = Column(String, ForeignKey("timelines.id"), primary_key=True)
+    revision = Column(Integer, primary_key=True)
+    checkpoint = Column(Boolean, nullable=False, default=False)
+    data = Column(JSON, nullable=False)  # full state for checkpoints, changes otherwise
+    created_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
+
+
+class EventKnowledge(Base):
+    """
+    Investigated sources and synthesized branches of an event, shared across
+    timelines and keyed on (date bucket, title fingerprint); see services/event_knowledge.py
+    """
+    __tablename__ = "event_knowledge"
+
+    date_bucket = Column(String(10), primary_key=True)  # event date, YYYY-MM-DD
+    fingerprint = Column(String, primary_key=True)  # sorted distinct title terms
+    title = Column(String, nullable=False)
+    sources = Column(JSON, nullable=False, default=list)  # as returned by the investigation
+    branches = Column(JSON, nullable=False, default=list)  # as returned by synthesis
+    investigated_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
+
+
+class Outlet(Base):
+    """
+    A news outlet and its credibility profile, shared by all its sources
+    (see services/outlet_registry.py)
+    """
+    __tablename__ = "outlets"
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    name = Column(String, nullable=False)  # display name, as first seen
+    domain = Column(String, nullable=True, index=True)  # canonical host, as first seen
+    # Running mean of the scores the model gave the outlet's sources
+    credibility_score = Column(Float, nullable=False, default=0.5)
+    credibility_samples = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class OutletAlias(Base):
+    """Canonicalization index: "host:<host>" and "name:<name>" keys of an outlet"""
+    __tablename__ = "outlet_aliases"
+
+    alias = Column(String, primary_key=True)
+    outlet_id = Column(String, ForeignKey("outlets.id"), nullable=False, index=True)
+
+
+class SearchDocument(Base):
+    """
+    Searchable text of a timeline, event, branch or source (its claims), kept
+    up to date as timelines are written; see services/search_index.py.
+    The text index itself is backend-specific and created below.
+    """
+    __tablename__ = "search_documents"
+    __table_args__ = (
+        UniqueConstraint("kind", "ref_id", name="uq_search_documents_kind_ref_id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)  # FTS5 rowid on SQLite
+    kind = Column(String(16), nullable=False)  # timeline, event, branch, source
+    ref_id = Column(String, nullable=False)  # id of the timeline/event/branch/source
+    timeline_id = Column(String, ForeignKey("timelines.id"), nullable=False, index=True)
+    event_id = Column(String, nullable=True, index=True)
+    content = Column(Text, nullable=False)
+
+
+# PostgreSQL: a stored tsvector column under a GIN index
+for statement in (
+    "ALTER TABLE search_documents ADD COLUMN document tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('english', content)) STORED",
+    "CREATE INDEX ix_search_documents_document ON search_documents USING GIN (document)",
+):
+    event.listen(SearchDocument.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+
+# SQLite: an external-content FTS5 table, synced by triggers
+for statement in (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5("
+    "content, content='search_documents', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER search_documents_ai AFTER INSERT ON search_documents BEGIN "
+    "INSERT INTO search_fts(rowid, content) VALUES (new.id, new.content); END",
+    "CREATE TRIGGER search_documents_ad AFTER DELETE ON search_documents BEGIN "
+    "INSERT INTO search_fts(search_fts, rowid, content) VALUES ('delete', old.id, old.content); END",
+    "CREATE TRIGGER search_documents_au AFTER UPDATE ON search_documents BEGIN "
+    "INSERT INTO search_fts(search_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+    "INSERT INTO search_fts(rowid, content) VALUES (new.id, new.content); END",
+):
+    event.listen(SearchDocument.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(
+    SearchDocument.__table__, "after_drop", DDL("DROP TABLE IF EXISTS search_fts").execute_if(dialect="sqlite")
+)
@@ -0,0 +1,21 @@
+import redis.asyncio as redis
+from app.config import settings
+
+_client = None
+
+
+def get_redis() -> redis.Redis:
+    """
+    Shared async Redis client, created lazily from settings.redis_url.
+    Strings are decoded so callers always deal with str, not bytes.
+    """
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.redis_url, decode_responses=True)
+    return _client
+
+
+def set_redis(client: redis.Redis):
+    """Swap the shared client, e.g. for a local Redis stand-in such as fakeredis"""
+    global _client
+    _client = client
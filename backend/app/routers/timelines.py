@@ -1,156 +1,214 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
-from datetime import datetime
+from sqlalchemy import select, tuple_, update
+from redis.exceptions import RedisError
+from datetime import datetime, timezone
+from typing import Optional, Union
+import asyncio
+import base64
+import binascii
+import json
 
-from app.database import get_db
-from app.models import Timeline, Event, Source, Branch
-from app.schemas import TimelineCreate, TimelineResponse, TimelineStatusResponse
-from app.services import GeminiService
+from app.config import settings
+from app.database import get_db, get_read_db, using_replica, AsyncSessionLocal, query_budget
+from app.models import Timeline, Event, TimelineRevision
+from app.models.timeline import generate_uuid
+from app.schemas import (
+    EventPageResponse,
+    Projection,
+    RevisionListResponse,
+    RevisionResponse,
+    SearchKind,
+    SearchResponse,
+    SearchResult,
+    TimelineCreate,
+    TimelineEventsResponse,
+    TimelineListResponse,
+    TimelinePlaybackResponse,
+    TimelineResponse,
+    TimelineStatus,
+    TimelineStatusResponse,
+    TimelineSummaryResponse,
+)
+from app.services.job_queue import job_queue
+from app.services.progress_broker import progress_broker, Subscription
+from app.services.query_coalescer import query_coalescer
+from app.services.search_index import search as search_documents
+from app.services.serialization import encode_json, fetch_event_dicts, fetch_timeline_dict, json_response
+from app.services.timeline_revisions import load_revision, state_timeline
+from app.services.timeline_snapshots import etag_matches, get_snapshot
+from app.telemetry import trace_id_var
 
 router = APIRouter(prefix="/api/timelines", tags=["timelines"])
-gemini_service = GeminiService()
 
+# Seconds between SSE keep-alive comments on an idle stream
+STREAM_KEEPALIVE_INTERVAL = 15
 
-def parse_datetime_naive(date_string: str) -> datetime:
-    """
-    Parse ISO datetime string and strip timezone info to make it naive.
-    Database expects TIMESTAMP WITHOUT TIME ZONE (naive datetime).
-    """
-    # Replace 'Z' with '+00:00' for proper ISO parsing
-    date_string = date_string.replace("Z", "+00:00")
-    # Parse the datetime
-    dt = datetime.fromisoformat(date_string)
-    # Strip timezone to make it naive
-    return dt.replace(tzinfo=None)
+# SQL statements allowed per read, by projection: the snapshot lookup (full
+# only), then timeline, events, branches and event sources (one query each)
+GET_TIMELINE_QUERY_BUDGETS = {"summary": 1, "events": 3, "full": 5}
+GET_TIMELINE_STATUS_QUERY_BUDGET = 1
+LIST_TIMELINES_QUERY_BUDGET = 1
+SEARCH_QUERY_BUDGET = 1
+# Events, branches and sources, plus a timeline lookup when the page is empty
+GET_EVENTS_QUERY_BUDGET = 4
+# Revisions, plus a timeline lookup when there are none
+LIST_REVISIONS_QUERY_BUDGET = 2
+# Checkpoint and deltas come back in one statement
+PLAYBACK_QUERY_BUDGET = 1
+
+
+def encode_cursor(created_at: datetime, timeline_id: str) -> str:
+    """Opaque keyset cursor pointing at the last timeline of a page"""
+    payload = json.dumps([created_at.isoformat(), timeline_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, timeline_id = json.loads(payload)
+        return datetime.fromisoformat(created_at), str(timeline_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 
-async def process_timeline(timeline_id: str, query: str):
+@router.get("", response_model=TimelineListResponse)
+async def list_timelines(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    status: Optional[TimelineStatus] = None,
+    topic_prefix: Optional[str] = Query(None, min_length=1),
+    db: AsyncSession = Depends(get_read_db)
+):
     """
-    Background task to process timeline generation
-    Creates its own database session to avoid session closure issues
+    List timelines newest first, without their events.
+    Keyset-paginated over (created_at, id): pass `next_cursor` back as `cursor`.
+    Optionally filtered by status and a case-insensitive topic prefix.
     """
-    from app.database import AsyncSessionLocal
+    query = select(Timeline)
+    if status:
+        query = query.where(Timeline.status == status)
+    if topic_prefix:
+        query = query.where(Timeline.topic.istartswith(topic_prefix, autoescape=True))
+    if cursor:
+        query = query.where(tuple_(Timeline.created_at, Timeline.id) < decode_cursor(cursor))
+    query = query.order_by(Timeline.created_at.desc(), Timeline.id.desc()).limit(limit + 1)
 
-    async with AsyncSessionLocal() as db:
-        try:
-            # Update status to processing
-            result = await db.execute(select(Timeline).where(Timeline.id == timeline_id))
-            timeline = result.scalar_one()
-            timeline.status = "processing"
-            await db.commit()
-
-            # Phase 1: Discover skeleton
-            skeleton = await gemini_service.discover_timeline_skeleton(query)
-
-            # Update timeline with basic info
-            timeline.topic = skeleton.get("topic", query)
-            if skeleton.get("date_range"):
-                try:
-                    timeline.date_range_start = parse_datetime_naive(
-                        skeleton["date_range"]["start"]
-                    )
-                    timeline.date_range_end = parse_datetime_naive(
-                        skeleton["date_range"]["end"]
-                    )
-                except (ValueError, KeyError):
-                    pass
-
-            anchor_events = skeleton.get("anchor_events", [])
-            timeline.progress = f"0/{len(anchor_events)}"
-            await db.commit()
-
-            # Phase 2: Create events and investigate each
-            for idx, event_data in enumerate(anchor_events):
-                # Create event in database
-                event = Event(
-                    timeline_id=timeline_id,
-                    title=event_data.get("title", "Untitled Event"),
-                    event_date=parse_datetime_naive(event_data["date"]),
-                    priority=event_data.get("priority", "medium"),
-                    order=idx
-                )
-                db.add(event)
-                await db.flush()
-
-                # Investigate event with Flash subagent
-                investigation = await gemini_service.investigate_event(
-                    event.title,
-                    event_data["date"],
-                    timeline.topic
-                )
+    with query_budget(LIST_TIMELINES_QUERY_BUDGET, "list_timelines"):
+        timelines = list((await db.execute(query)).scalars())
 
-                # Add sources
-                for source_data in investigation.get("sources", []):
-                    source = Source(
-                        event_id=event.id,
-                        url=source_data.get("url", ""),
-                        outlet=source_data.get("outlet", "Unknown"),
-                        credibility_score=source_data.get("credibility_score", 0.5),
-                        publish_date=parse_datetime_naive(
-                            source_data["publish_date"]
-                        ) if source_data.get("publish_date") else None,
-                        claims=source_data.get("claims", [])
-                    )
-                    db.add(source)
+    next_cursor = None
+    if len(timelines) > limit:
+        timelines = timelines[:limit]
+        next_cursor = encode_cursor(timelines[-1].created_at, timelines[-1].id)
 
-                # Phase 3: Detect branches
-                branches_data = await gemini_service.synthesize_branches(
-                    event.title,
-                    investigation.get("sources", [])
-                )
+    return TimelineListResponse(
+        items=[TimelineSummaryResponse.model_validate(timeline) for timeline in timelines],
+        next_cursor=next_cursor
+    )
 
-                for branch_data in branches_data:
-                    branch = Branch(
-                        event_id=event.id,
-                        narrative=branch_data.get("narrative", ""),
-                        credibility_score=branch_data.get("credibility_score", 0.5),
-                        evidence=branch_data.get("evidence", ""),
-                        source_count=branch_data.get("source_count", 0)
-                    )
-                    db.add(branch)
 
-                # Update progress
-                timeline.progress = f"{idx + 1}/{len(anchor_events)}"
-                await db.commit()
+@router.get("/search", response_model=SearchResponse)
+async def search_timelines(
+    q: str = Query(..., min_length=1, max_length=200),
+    kind: Optional[SearchKind] = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=1000),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Full-text search over timeline topics and queries, event titles and
+    descriptions, branch narratives and source claims, best matches first.
+    Failed and cancelled timelines are left out. Optionally restricted to one
+    kind of match; paginate by passing `next_offset` back as `offset`.
+    """
+    with query_budget(SEARCH_QUERY_BUDGET, "search_timelines"):
+        rows = await search_documents(db, q, kind, limit + 1, offset)
 
-            # Mark as completed
-            timeline.status = "completed"
-            await db.commit()
+    next_offset = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_offset = offset + limit
 
-        except Exception as e:
-            # Mark as failed
-            result = await db.execute(select(Timeline).where(Timeline.id == timeline_id))
-            timeline = result.scalar_one()
-            timeline.status = "failed"
-            await db.commit()
-            raise e
+    return SearchResponse(
+        results=[SearchResult(**row) for row in rows],
+        next_offset=next_offset
+    )
 
 
 @router.post("/create", response_model=TimelineStatusResponse)
 async def create_timeline(
     timeline_data: TimelineCreate,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db)
 ):
     """
     Create a new timeline for the given query.
-    Processing happens in the background.
+    Processing happens in a separate worker process (see worker.py).
+    If the same (normalized) query is already processing, or completed within
+    the coalescing window, the existing timeline is returned instead.
     """
+    timeline_id = generate_uuid()
+
+    try:
+        # Single-flight: only one timeline per normalized query does the work
+        for _ in range(3):
+            owner_id = await query_coalescer.claim(timeline_data.query, timeline_id)
+            if owner_id is None:
+                break
+
+            existing = await db.get(Timeline, owner_id)
+            if existing is None:
+                # Owner claimed the query but hasn't committed its row yet;
+                # past the grace period it never will (its insert failed or it died)
+                age = await query_coalescer.claim_age(timeline_data.query)
+                if age is not None and age < settings.coalesce_claim_grace:
+                    return TimelineStatusResponse(id=owner_id, status="processing", progress="0/0")
+            elif existing.status in ("processing", "completed"):
+                return TimelineStatusResponse(
+                    id=existing.id,
+                    status=existing.status,
+                    progress=existing.progress
+                )
+
+            # Previous attempt failed or never got its row, start over under our id
+            if await query_coalescer.take_over(timeline_data.query, owner_id, timeline_id):
+                break
+        else:
+            raise HTTPException(status_code=409, detail="Timeline creation contended, retry")
+    except RedisError:
+        raise HTTPException(status_code=503, detail="Job queue unavailable")
+
     # Create timeline in database
     timeline = Timeline(
+        id=timeline_id,
         query=timeline_data.query,
         topic=timeline_data.query,  # Will be updated during processing
         status="processing",
         progress="0/0"
     )
     db.add(timeline)
-    await db.commit()
+    try:
+        await db.commit()
+    except Exception:
+        # Don't leave duplicates aliased to a timeline that doesn't exist
+        try:
+            await query_coalescer.release(timeline_data.query, timeline_id)
+        except RedisError:
+            pass
+        raise
     await db.refresh(timeline)
 
-    # Start background processing (don't pass db session - it will create its own)
-    background_tasks.add_task(process_timeline, timeline.id, timeline_data.query)
+    # Hand off to the worker queue
+    try:
+        await job_queue.enqueue(
+            timeline.id, {"query": timeline_data.query, "trace_id": trace_id_var.get()}
+        )
+    except RedisError:
+        timeline.status = "failed"
+        await db.commit()
+        raise HTTPException(status_code=503, detail="Job queue unavailable")
 
     return TimelineStatusResponse(
         id=timeline.id,
@@ -159,39 +217,225 @@ async def create_timeline(
     )
 
 
-@router.get("/{timeline_id}", response_model=TimelineResponse)
-async def get_timeline(timeline_id: str, db: AsyncSession = Depends(get_db)):
+@router.post("/{timeline_id}/refresh", response_model=TimelineStatusResponse)
+async def refresh_timeline(timeline_id: str, db: AsyncSession = Depends(get_db)):
     """
-    Get a timeline by ID with all events, sources, and branches.
+    Bring a completed timeline up to date with developments after its date range.
+    Processing happens in a worker (see timeline_processor.refresh_timeline): only
+    new or changed events are investigated, and the current version keeps being
+    served until the refreshed one is committed with its `version` bumped.
     """
+    timeline = await db.get(Timeline, timeline_id)
+    if timeline is None:
+        raise HTTPException(status_code=404, detail="Timeline not found")
+
+    # Conditional update, so concurrent refreshes can't both start
     result = await db.execute(
-        select(Timeline)
-        .options(
-            selectinload(Timeline.events)
-            .selectinload(Event.sources),
-            selectinload(Timeline.events)
-            .selectinload(Event.branches)
-            .selectinload(Branch.sources)
+        update(Timeline)
+        .where(Timeline.id == timeline_id, Timeline.status == "completed")
+        .values(status="processing")
+    )
+    if result.rowcount == 0:
+        raise HTTPException(status_code=409, detail=f"Timeline is {timeline.status}, not completed")
+    await db.commit()
+
+    try:
+        await job_queue.enqueue(
+            timeline_id, {"query": timeline.query, "refresh": True, "trace_id": trace_id_var.get()}
         )
-        .where(Timeline.id == timeline_id)
+    except RedisError:
+        await db.execute(update(Timeline).where(Timeline.id == timeline_id).values(status="completed"))
+        await db.commit()
+        raise HTTPException(status_code=503, detail="Job queue unavailable")
+
+    return TimelineStatusResponse(id=timeline_id, status="processing", progress=timeline.progress)
+
+
+@router.post("/{timeline_id}/cancel", response_model=TimelineStatusResponse)
+async def cancel_timeline(timeline_id: str, db: AsyncSession = Depends(get_db)):
+    """
+    Stop generating a timeline: its worker cancels the outstanding model calls
+    and the timeline is marked "cancelled". Cancelling a refresh keeps the
+    current version, so the timeline goes back to "completed".
+    """
+    timeline = await db.get(Timeline, timeline_id)
+    if timeline is None:
+        raise HTTPException(status_code=404, detail="Timeline not found")
+
+    # A timeline being refreshed still has its snapshot
+    status = "completed" if await get_snapshot(db, timeline_id) else "cancelled"
+    result = await db.execute(
+        update(Timeline)
+        .where(Timeline.id == timeline_id, Timeline.status == "processing")
+        .values(status=status)
     )
-    timeline = result.scalar_one_or_none()
+    if result.rowcount == 0:
+        raise HTTPException(status_code=409, detail=f"Timeline is {timeline.status}, not processing")
+    await db.commit()
+
+    message = {"type": "status", "status": status, "progress": timeline.progress}
+    try:
+        await job_queue.cancel(timeline_id)
+        if status == "cancelled":
+            # Let a new create of the query start over instead of aliasing to this one
+            await query_coalescer.release(timeline.query, timeline_id)
+    except RedisError:
+        pass  # the worker still stops at its next write
+    await progress_broker.publish(timeline_id, message)
+
+    return TimelineStatusResponse(id=timeline_id, status=status, progress=timeline.progress)
+
+
+@router.get(
+    "/{timeline_id}",
+    response_model=Union[TimelineResponse, TimelineEventsResponse, TimelineSummaryResponse]
+)
+async def get_timeline(
+    timeline_id: str,
+    request: Request,
+    projection: Projection = "full",
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get a timeline by ID.
+    `projection` selects what is loaded and returned: "summary" (no events),
+    "events" (events with branches, no sources) or "full" (everything).
+    Completed timelines are served in full from their materialized snapshot, with
+    ETag / If-None-Match support.
+    Served from the read replica when configured; a timeline the replica hasn't
+    caught up with yet is looked up on the primary before answering 404.
+    """
+    with query_budget(GET_TIMELINE_QUERY_BUDGETS[projection], "get_timeline"):
+        if projection == "full":
+            snapshot = await get_snapshot(db, timeline_id)
+            if snapshot:
+                headers = {"Cache-Control": "no-cache"}
+                if etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+                    return Response(
+                        status_code=304,
+                        headers={**headers, "ETag": snapshot.etag, "Vary": "Accept-Encoding"}
+                    )
+                return json_response(request, snapshot.body.encode(), headers, etag=snapshot.etag)
+
+        timeline = await fetch_timeline_dict(db, timeline_id, projection)
+
+    if not timeline and using_replica():
+        async with AsyncSessionLocal() as primary:
+            timeline = await fetch_timeline_dict(primary, timeline_id, projection)
 
     if not timeline:
         raise HTTPException(status_code=404, detail="Timeline not found")
 
-    return timeline
+    # Assembled straight from rows in the response schema's field order
+    return json_response(request, encode_json(timeline))
+
+
+@router.get("/{timeline_id}/events", response_model=EventPageResponse)
+async def get_timeline_events(
+    timeline_id: str,
+    request: Request,
+    after: int = Query(-1, ge=-1),
+    limit: int = Query(20, ge=1, le=100),
+    projection: Projection = "full",
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Page through a timeline's events in order, for timelines too large to fetch whole.
+    Keyset-paginated on event position: pass `next_after` back as `after`.
+    `projection` "events" omits sources; "summary" is treated as "events".
+    """
+    if projection == "summary":
+        projection = "events"
+
+    with query_budget(GET_EVENTS_QUERY_BUDGET, "get_timeline_events"):
+        events = await fetch_event_dicts(
+            db,
+            select(Event)
+            .where(Event.timeline_id == timeline_id, Event.order > after)
+            .order_by(Event.order)
+            .limit(limit + 1),
+            projection
+        )
+        if not events and await db.scalar(select(Timeline.id).where(Timeline.id == timeline_id)) is None:
+            raise HTTPException(status_code=404, detail="Timeline not found")
+
+    next_after = None
+    if len(events) > limit:
+        events = events[:limit]
+        next_after = events[-1][0]
+
+    return json_response(request, encode_json({
+        "events": [event for _, event in events],
+        "next_after": next_after
+    }))
+
+
+@router.get("/{timeline_id}/revisions", response_model=RevisionListResponse)
+async def list_revisions(timeline_id: str, db: AsyncSession = Depends(get_read_db)):
+    """Revisions of a timeline, oldest first: one per version it was materialized at"""
+    with query_budget(LIST_REVISIONS_QUERY_BUDGET, "list_revisions"):
+        result = await db.execute(
+            select(TimelineRevision.revision, TimelineRevision.created_at, TimelineRevision.checkpoint)
+            .where(TimelineRevision.timeline_id == timeline_id)
+            .order_by(TimelineRevision.revision)
+        )
+        revisions = result.all()
+        if not revisions and await db.scalar(select(Timeline.id).where(Timeline.id == timeline_id)) is None:
+            raise HTTPException(status_code=404, detail="Timeline not found")
+
+    return RevisionListResponse(revisions=[RevisionResponse.model_validate(row) for row in revisions])
+
+
+@router.get("/{timeline_id}/playback", response_model=TimelinePlaybackResponse)
+async def playback_timeline(
+    timeline_id: str,
+    request: Request,
+    revision: Optional[int] = Query(None, ge=1),
+    at: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    The full timeline as it was at a revision, or at the latest revision
+    recorded at or before `at` (naive timestamps are UTC); the current
+    revision if neither is given. Rebuilt from the nearest checkpoint plus
+    at most REVISION_CHECKPOINT_INTERVAL deltas, in one query.
+    """
+    if revision is not None and at is not None:
+        raise HTTPException(status_code=400, detail="Pass either revision or at, not both")
+    if at is not None and at.tzinfo is None:
+        at = at.replace(tzinfo=timezone.utc)
+
+    with query_budget(PLAYBACK_QUERY_BUDGET, "playback_timeline"):
+        loaded = await load_revision(db, timeline_id, revision, at)
+
+    if loaded is None and using_replica():
+        async with AsyncSessionLocal() as primary:
+            loaded = await load_revision(primary, timeline_id, revision, at)
+
+    if loaded is None:
+        raise HTTPException(status_code=404, detail="Revision not found")
+
+    return json_response(request, encode_json({
+        **RevisionResponse.model_validate(loaded.row).model_dump(),
+        "timeline": state_timeline(loaded.state)
+    }))
 
 
 @router.get("/{timeline_id}/status", response_model=TimelineStatusResponse)
-async def get_timeline_status(timeline_id: str, db: AsyncSession = Depends(get_db)):
+async def get_timeline_status(timeline_id: str, db: AsyncSession = Depends(get_read_db)):
     """
     Get the current status of a timeline.
+    Served from the read replica when configured, falling back to the primary
+    for a timeline the replica hasn't caught up with yet.
     """
-    result = await db.execute(
-        select(Timeline).where(Timeline.id == timeline_id)
-    )
-    timeline = result.scalar_one_or_none()
+    query = select(Timeline).where(Timeline.id == timeline_id)
+    with query_budget(GET_TIMELINE_STATUS_QUERY_BUDGET, "get_timeline_status"):
+        result = await db.execute(query)
+        timeline = result.scalar_one_or_none()
+
+    if not timeline and using_replica():
+        async with AsyncSessionLocal() as primary:
+            timeline = (await primary.execute(query)).scalar_one_or_none()
 
     if not timeline:
         raise HTTPException(status_code=404, detail="Timeline not found")
@@ -201,3 +445,64 @@ async def get_timeline_status(timeline_id: str, db: AsyncSession = Depends(get_d
         status=timeline.status,
         progress=timeline.progress
     )
+
+
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def progress_event_stream(subscription: Subscription, status: dict):
+    try:
+        yield format_sse("status", {"type": "status", **status})
+        if status["status"] != "processing":
+            return
+
+        while True:
+            try:
+                message = await asyncio.wait_for(
+                    subscription.get(), timeout=STREAM_KEEPALIVE_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+
+            yield format_sse(message["type"], message)
+            if message["type"] == "error" or message.get("status") in ("completed", "failed", "cancelled"):
+                return
+    finally:
+        await subscription.close()
+
+
+@router.get("/{timeline_id}/stream")
+async def stream_timeline(timeline_id: str):
+    """
+    Server-Sent Events stream of a timeline's generation.
+    Emits the current status first, then `progress`, `event` (each newly persisted
+    event with its sources and branches) and a final `status` message.
+    Events persisted before the stream was opened are not replayed; fetch them
+    with GET /api/timelines/{timeline_id}.
+    """
+    subscription = await progress_broker.subscribe(timeline_id)
+
+    # Only the first viewer of a timeline on this process reads the database;
+    # everyone after that shares the channel's latest status
+    status = subscription.last_status
+    if status is None:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Timeline.status, Timeline.progress).where(Timeline.id == timeline_id)
+            )
+            row = result.one_or_none()
+
+        if row is None:
+            await subscription.close()
+            raise HTTPException(status_code=404, detail="Timeline not found")
+
+        status = {"id": timeline_id, "status": row.status, "progress": row.progress}
+        subscription.set_status(status)
+
+    return StreamingResponse(
+        progress_event_stream(subscription, status),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,6 +1,14 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Literal, Union
+
+TimelineStatus = Literal["processing", "completed", "failed", "cancelled"]
+
+# How much of a timeline a read returns: no events, events with branches, or everything
+Projection = Literal["summary", "events", "full"]
+
+# What a search match is the text of: a timeline's topic/query, an event, a branch narrative, a source's claims
+SearchKind = Literal["timeline", "event", "branch", "source"]
 
 
 class TimelineCreate(BaseModel):
@@ -30,20 +38,25 @@ class SourceResponse(BaseModel):
         from_attributes = True
 
 
-class EventResponse(BaseModel):
+class EventSummaryResponse(BaseModel):
+    """An event with its branches but without sources (the "events" projection)"""
     id: str
     title: str
     description: Optional[str]
     event_date: datetime
     priority: str
     branches: List[BranchResponse]
-    sources: List[SourceResponse]
 
     class Config:
         from_attributes = True
 
 
-class TimelineResponse(BaseModel):
+class EventResponse(EventSummaryResponse):
+    sources: List[SourceResponse]
+
+
+class TimelineSummaryResponse(BaseModel):
+    """A timeline without its events (the "summary" projection, and list items)"""
     id: str
     topic: str
     query: str
@@ -52,12 +65,62 @@ class TimelineResponse(BaseModel):
     date_range_start: Optional[datetime]
     date_range_end: Optional[datetime]
     created_at: datetime
+    version: int
+
+    class Config:
+        from_attributes = True
+
+
+class TimelineEventsResponse(TimelineSummaryResponse):
+    events: List[EventSummaryResponse]
+
+
+class TimelineResponse(TimelineSummaryResponse):
     events: List[EventResponse]
 
+
+class TimelineListResponse(BaseModel):
+    items: List[TimelineSummaryResponse]
+    next_cursor: Optional[str]  # pass as `cursor` for the next page; null on the last page
+
+
+class EventPageResponse(BaseModel):
+    events: Union[List[EventResponse], List[EventSummaryResponse]]
+    next_after: Optional[int]  # pass as `after` for the next page; null on the last page
+
+
+class RevisionResponse(BaseModel):
+    revision: int
+    created_at: datetime
+    checkpoint: bool  # stored in full rather than as a delta
+
     class Config:
         from_attributes = True
 
 
+class RevisionListResponse(BaseModel):
+    revisions: List[RevisionResponse]
+
+
+class TimelinePlaybackResponse(RevisionResponse):
+    timeline: TimelineResponse
+
+
+class SearchResult(BaseModel):
+    kind: SearchKind
+    id: str  # of the timeline, event, branch or source
+    timeline_id: str
+    event_id: Optional[str]
+    topic: str  # of the timeline
+    snippet: str
+    rank: float  # higher is better; only comparable within one response
+
+
+class SearchResponse(BaseModel):
+    results: List[SearchResult]
+    next_offset: Optional[int]  # pass as `offset` for the next page; null on the last page
+
+
 class TimelineStatusResponse(BaseModel):
     id: str
     status: str
@@ -65,3 +128,44 @@ class TimelineStatusResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+# Structured-output schemas for Gemini responses.
+# Field order is the order the model generates properties in.
+
+class DateRangeOutput(BaseModel):
+    start: str  # ISO 8601 datetime
+    end: str
+
+
+class AnchorEventOutput(BaseModel):
+    title: str
+    date: str  # ISO 8601 datetime
+    priority: str  # critical, high, medium, low
+
+
+class SkeletonOutput(BaseModel):
+    topic: str
+    date_range: DateRangeOutput
+    anchor_events: List[AnchorEventOutput]
+
+
+class SourceOutput(BaseModel):
+    url: str
+    outlet: str
+    credibility_score: float
+    publish_date: str  # ISO 8601 datetime
+    claims: List[str]
+
+
+class InvestigationOutput(BaseModel):
+    # Sources come last so a streamed response is done once the array closes
+    conflicts: List[str]
+    sources: List[SourceOutput]
+
+
+class BranchOutput(BaseModel):
+    narrative: str
+    credibility_score: float
+    evidence: str
+    claim_ids: List[str]  # ids of the claim clusters supporting this branch
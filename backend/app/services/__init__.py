@@ -1,3 +1,4 @@
 from app.services.gemini_service import GeminiService
+from app.services.job_queue import JobQueue, job_queue
 
-__all__ = ["GeminiService"]
+__all__ = ["GeminiService", "JobQueue", "job_queue"]
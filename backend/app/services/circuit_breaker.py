@@ -0,0 +1,50 @@
+import time
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a backend that is known to be degraded"""
+
+
+class CircuitBreaker:
+    """
+    Classic closed -> open -> half-open breaker.
+    After `failure_threshold` consecutive failures calls fail fast for
+    `reset_timeout` seconds; then a single trial call decides whether to close again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+
+    def before_call(self):
+        if self.state == "closed":
+            return
+        if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+            # Let exactly one trial call through
+            self.state = "half-open"
+            return
+        raise CircuitOpenError(f"{self.name} circuit is {self.state}")
+
+    def record_success(self):
+        self.state = "closed"
+        self._failures = 0
+
+    def release_trial(self):
+        """
+        The call let through by before_call() ended without an outcome (it was
+        cancelled): if it was the half-open trial, wait out another reset timeout
+        rather than staying half-open, which would block every call for good.
+        """
+        if self.state == "half-open":
+            self.state = "open"
+            self._opened_at = time.monotonic()
+
+    def record_failure(self):
+        self._failures += 1
+        if self.state == "half-open" or self._failures >= self.failure_threshold:
+            self.state = "open"
+            self._opened_at = time.monotonic()
@@ -0,0 +1,118 @@
+from collections import Counter
+from typing import Dict, List
+
+import numpy as np
+
+from app.utils import STOPWORDS, normalize_text
+
+# Vocabulary cap: terms beyond the most frequent ones add little to similarity
+MAX_FEATURES = 2048
+
+
+def _terms(claim: str) -> List[str]:
+    return [term for term in normalize_text(claim).split() if term not in STOPWORDS]
+
+
+def tfidf_matrix(claims: List[str]) -> np.ndarray:
+    """L2-normalized TF-IDF rows (sublinear tf, smoothed idf), float32"""
+    tokenized = [_terms(claim) for claim in claims]
+    document_frequency = Counter(term for terms in tokenized for term in set(terms))
+    vocabulary = {
+        term: idx
+        for idx, (term, _) in enumerate(
+            sorted(document_frequency.items(), key=lambda item: (-item[1], item[0]))[:MAX_FEATURES]
+        )
+    }
+
+    matrix = np.zeros((len(claims), max(len(vocabulary), 1)), dtype=np.float32)
+    for row, terms in enumerate(tokenized):
+        for term, count in Counter(terms).items():
+            col = vocabulary.get(term)
+            if col is not None:
+                matrix[row, col] = 1.0 + np.log(count)
+
+    df = np.array(
+        [document_frequency[term] for term in sorted(vocabulary, key=vocabulary.get)] or [1],
+        dtype=np.float32
+    )
+    matrix *= np.log((1 + len(claims)) / (1 + df)) + 1.0
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+def cluster_claims(sources_data: List[Dict], threshold: float) -> List[Dict]:
+    """
+    Collapse near-duplicate claims across an event's sources.
+    Claims are visited from the most credible source down; each unassigned claim
+    becomes the representative of every unassigned claim with cosine similarity
+    >= threshold. Returns clusters ordered by support, then credibility, then recency:
+    {"id", "claim", "outlets", "credibility", "latest", "sources"} where `sources`
+    are indices into sources_data, `credibility` is their mean score and `latest`
+    their most recent publish_date.
+    """
+    claims, origins = [], []
+    for source_idx, source in enumerate(sources_data):
+        for claim in source.get("claims") or []:
+            if isinstance(claim, str) and claim.strip():
+                claims.append(claim.strip())
+                origins.append(source_idx)
+    if not claims:
+        return []
+
+    similarity = tfidf_matrix(claims)
+    similarity = similarity @ similarity.T
+
+    credibility = np.array(
+        [sources_data[idx].get("credibility_score", 0.5) for idx in origins], dtype=np.float32
+    )
+    # Stable sort: ties keep the original claim order, so clustering is deterministic
+    order = np.argsort(-credibility, kind="stable")
+
+    assignment = np.full(len(claims), -1)
+    leaders = []
+    for idx in order:
+        if assignment[idx] >= 0:
+            continue
+        members = (similarity[idx] >= threshold) & (assignment < 0)
+        members[idx] = True
+        assignment[members] = len(leaders)
+        leaders.append(idx)
+
+    clusters = []
+    for cluster_idx, leader in enumerate(leaders):
+        source_indices = sorted({origins[i] for i in np.flatnonzero(assignment == cluster_idx)})
+        clusters.append({
+            "claim": claims[leader],
+            "sources": source_indices,
+            "outlets": sorted({
+                sources_data[i].get("outlet", "Unknown") for i in source_indices
+            }),
+            "credibility": round(float(np.mean([
+                sources_data[i].get("credibility_score", 0.5) for i in source_indices
+            ])), 2),
+            "latest": max(
+                (sources_data[i].get("publish_date") or "" for i in source_indices), default=""
+            ),
+        })
+
+    # Best first, so prompt budgeting can drop from the tail
+    clusters.sort(
+        key=lambda cluster: (len(cluster["sources"]), cluster["credibility"], cluster["latest"]),
+        reverse=True
+    )
+    for number, cluster in enumerate(clusters, start=1):
+        cluster["id"] = f"c{number}"
+    return clusters
+
+
+def count_supporting_sources(claim_ids: List[str], clusters: List[Dict]) -> int:
+    """Distinct sources behind a set of clusters"""
+    by_id = {cluster["id"]: cluster for cluster in clusters}
+    return len({
+        source
+        for claim_id in claim_ids
+        if claim_id in by_id
+        for source in by_id[claim_id]["sources"]
+    })
@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.database import dialect_insert
+from app.models import EventKnowledge
+from app.telemetry import EVENT_KNOWLEDGE_LOOKUPS
+from app.utils import STOPWORDS, normalize_text
+
+
+def title_terms(title: str) -> frozenset:
+    return frozenset(term for term in normalize_text(title).split() if term not in STOPWORDS)
+
+
+def event_fingerprint(title: str) -> str:
+    """
+    Order-insensitive identity of an event title.
+    "Notre-Dame fire breaks out" and "Fire breaks out at Notre Dame" -> "breaks dame fire notre out"
+    """
+    return " ".join(sorted(title_terms(title)))
+
+
+def date_bucket(event_date: datetime) -> str:
+    return event_date.strftime("%Y-%m-%d")
+
+
+def _similarity(terms: frozenset, other: frozenset) -> float:
+    union = terms | other
+    return len(terms & other) / len(union) if union else 0.0
+
+
+def title_similarity(title: str, other: str) -> float:
+    """Term overlap (Jaccard) of two event titles"""
+    return _similarity(title_terms(title), title_terms(other))
+
+
+async def find_known_events(db, events: List[Tuple[str, datetime]]) -> List[Optional[EventKnowledge]]:
+    """
+    Fresh knowledge for each (title, event_date), or None where the event is new.
+    One query fetches everything investigated within EVENT_KNOWLEDGE_MAX_AGE for
+    the events' date buckets. Within a bucket an identical title fingerprint
+    wins, then the closest one if its term overlap (Jaccard) reaches
+    EVENT_KNOWLEDGE_MATCH_THRESHOLD. Each entry goes to at most one event, so
+    two events of one timeline never share an investigation.
+    """
+    if not settings.event_knowledge_enabled or not events:
+        return [None] * len(events)
+
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.event_knowledge_max_age)
+    buckets = {date_bucket(event_date) for _, event_date in events}
+    result = await db.execute(
+        select(EventKnowledge).where(
+            EventKnowledge.date_bucket.in_(buckets),
+            EventKnowledge.investigated_at >= cutoff
+        )
+    )
+    by_bucket: Dict[str, List[EventKnowledge]] = {}
+    for knowledge in result.scalars():
+        by_bucket.setdefault(knowledge.date_bucket, []).append(knowledge)
+
+    keys = [(date_bucket(event_date), event_fingerprint(title)) for title, event_date in events]
+    matches: List[Optional[EventKnowledge]] = [None] * len(events)
+    used = set()
+    # Exact fingerprints first, so a near match can't take an entry from its own event
+    for idx, (bucket, fingerprint) in enumerate(keys):
+        for knowledge in by_bucket.get(bucket, []):
+            if knowledge.fingerprint == fingerprint and knowledge not in used:
+                matches[idx] = knowledge
+                used.add(knowledge)
+                break
+    for idx, (bucket, fingerprint) in enumerate(keys):
+        if matches[idx] is not None:
+            continue
+        terms = frozenset(fingerprint.split())
+        best, best_score = None, settings.event_knowledge_match_threshold
+        for knowledge in by_bucket.get(bucket, []):
+            score = _similarity(terms, frozenset(knowledge.fingerprint.split()))
+            if knowledge not in used and score >= best_score:
+                best, best_score = knowledge, score
+        if best is not None:
+            matches[idx] = best
+            used.add(best)
+
+    for match in matches:
+        EVENT_KNOWLEDGE_LOOKUPS.labels("hit" if match else "miss").inc()
+    return matches
+
+
+def knowledge_row(title: str, event_date: datetime, sources: List[Dict], branches: List[Dict]) -> Dict:
+    return {
+        "date_bucket": date_bucket(event_date),
+        "fingerprint": event_fingerprint(title),
+        "title": title,
+        "sources": sources,
+        "branches": branches,
+        "investigated_at": datetime.now(timezone.utc),
+    }
+
+
+async def store_knowledge(db, rows: List[Dict]):
+    """Insert or refresh knowledge rows; concurrent writers of the same event just overwrite"""
+    if not rows:
+        return
+    statement = dialect_insert(db, EventKnowledge).values(rows)
+    await db.execute(statement.on_conflict_do_update(
+        index_elements=[EventKnowledge.date_bucket, EventKnowledge.fingerprint],
+        set_={
+            column: statement.excluded[column]
+            for column in ("title", "sources", "branches", "investigated_at")
+        }
+    ))
@@ -1,10 +1,59 @@
 from google import genai
-from google.genai.types import HttpOptions
+from google.genai import errors
+from google.genai.types import HttpOptions, GenerateContentConfig
+import httpx
 from app.config import settings
+from app.schemas import SkeletonOutput, InvestigationOutput, BranchOutput
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services.claim_clustering import cluster_claims, count_supporting_sources
+from app.services.json_stream import JSONArrayStreamParser
+from app.services.llm_cache import LLMCache
+from app.services.prompt_budget import PromptBudget
+from app.services.rate_limiter import ModelRateLimiter, estimate_tokens
+from app.telemetry import observe_model_call, record_usage
+from app.utils import normalize_url
+import asyncio
+import functools
 import json
+import logging
 import os
-from datetime import datetime
-from typing import Dict, List
+import random
+import time
+from typing import AsyncIterator, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying: quota exhaustion and transient server errors
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class GeminiServiceError(Exception):
+    """A model call failed for good (retries exhausted, circuit open, or a bad request)"""
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, errors.APIError):
+        return error.code in RETRYABLE_STATUS_CODES
+    return isinstance(error, (asyncio.TimeoutError, httpx.TransportError))
+
+
+# Shared by every GeminiService instance in the process
+rate_limiter = ModelRateLimiter(
+    {
+        "gemini-2.5-pro": {"rpm": settings.gemini_pro_rpm, "tpm": settings.gemini_pro_tpm},
+        "gemini-2.5-flash": {"rpm": settings.gemini_flash_rpm, "tpm": settings.gemini_flash_tpm},
+    },
+    shared=settings.gemini_rate_limit_shared,
+    processes=settings.gemini_rate_limit_processes,
+)
+breakers = {
+    model: CircuitBreaker(
+        model,
+        failure_threshold=settings.gemini_breaker_failure_threshold,
+        reset_timeout=settings.gemini_breaker_reset_timeout
+    )
+    for model in ("gemini-2.5-pro", "gemini-2.5-flash")
+}
 
 
 class GeminiService:
@@ -20,12 +69,249 @@ class GeminiService:
             http_options=HttpOptions(api_version="v1")
         )
 
-    async def discover_timeline_skeleton(self, query: str) -> Dict:
+        self.cache = LLMCache(
+            max_entries=settings.llm_cache_max_entries,
+            ttls={
+                "skeleton": settings.llm_cache_ttl_skeleton,
+                "investigate": settings.llm_cache_ttl_investigate,
+                "synthesize": settings.llm_cache_ttl_synthesize,
+            }
+        ) if settings.llm_cache_enabled else None
+
+        self.rate_limiter = rate_limiter
+        self.breakers = breakers
+
+        self.prompt_budget = PromptBudget(
+            budgets={
+                "skeleton": settings.prompt_budget_skeleton,
+                "investigate": settings.prompt_budget_investigate,
+                "synthesize": settings.prompt_budget_synthesize,
+            },
+            field_max_tokens=settings.prompt_field_max_tokens
+        )
+
+    @staticmethod
+    def _config(schema) -> GenerateContentConfig:
+        """Constrain the model to JSON matching `schema`"""
+        return GenerateContentConfig(
+            response_mime_type="application/json",
+            response_schema=schema
+        )
+
+    async def _generate(self, phase: str, model: str, prompt: str, timeout: float, schema) -> str:
         """
-        Phase 1: Use Gemini Pro to discover timeline skeleton
-        Returns: Dictionary with topic, date_range, and anchor_events
+        Run a single model call on the SDK's async client so the event loop
+        stays free while Gemini is generating.
+        Waits for rate-limit capacity first; raises asyncio.TimeoutError if the
+        call exceeds `timeout` seconds.
         """
-        prompt = f"""
+        estimated_tokens = estimate_tokens(prompt) + settings.gemini_output_token_estimate
+        await self.rate_limiter.acquire(model, estimated_tokens)
+
+        start = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(
+                self.client.aio.models.generate_content(
+                    model=model,
+                    contents=prompt,
+                    config=self._config(schema)
+                ),
+                timeout=timeout
+            )
+        except Exception:
+            observe_model_call(model, phase, "error", time.perf_counter() - start)
+            raise
+        observe_model_call(model, phase, "ok", time.perf_counter() - start)
+
+        usage = getattr(response, "usage_metadata", None)
+        record_usage(model, phase, usage)
+        if usage and usage.total_token_count:
+            await self.rate_limiter.settle(model, estimated_tokens, usage.total_token_count)
+        return response.text
+
+    async def _generate_stream(
+        self, phase: str, model: str, prompt: str, timeout: float, schema
+    ) -> AsyncIterator[str]:
+        """
+        Streaming variant of _generate yielding text chunks as they arrive.
+        `timeout` bounds the wait for each chunk rather than the whole response.
+        """
+        estimated_tokens = estimate_tokens(prompt) + settings.gemini_output_token_estimate
+        await self.rate_limiter.acquire(model, estimated_tokens)
+
+        start = time.perf_counter()
+        usage = None
+        try:
+            stream = await asyncio.wait_for(
+                self.client.aio.models.generate_content_stream(
+                    model=model,
+                    contents=prompt,
+                    config=self._config(schema)
+                ),
+                timeout=timeout
+            )
+
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(anext(stream), timeout=timeout)
+                except StopAsyncIteration:
+                    break
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                if chunk.text:
+                    yield chunk.text
+        except Exception:
+            observe_model_call(model, phase, "error", time.perf_counter() - start)
+            raise
+        observe_model_call(model, phase, "ok", time.perf_counter() - start)
+
+        record_usage(model, phase, usage)
+        if usage and usage.total_token_count:
+            await self.rate_limiter.settle(model, estimated_tokens, usage.total_token_count)
+
+    @staticmethod
+    def _extract_json(result_text: str):
+        """Strip markdown code fences (if present) and parse the JSON payload"""
+        if "```json" in result_text:
+            result_text = result_text.split("```json")[1].split("```")[0].strip()
+        elif "```" in result_text:
+            result_text = result_text.split("```")[1].split("```")[0].strip()
+
+        return json.loads(result_text)
+
+    async def _generate_json(
+        self, phase: str, model: str, prompt: str, timeout: float, schema, query: Optional[str] = None
+    ):
+        """
+        Cached, rate-limited model call returning parsed JSON; `query` is the
+        user's text exactly as it appears in the prompt (after the budget cut
+        it), normalized in the cache key.
+        Retryable failures (quota, 5xx, timeouts, malformed JSON) are retried with
+        exponential backoff and full jitter; transport failures feed the model's
+        circuit breaker. Only responses that parse successfully are cached.
+        Raises GeminiServiceError once retries are exhausted or the circuit is open.
+        """
+        if self.cache:
+            cached = await self.cache.get(phase, model, prompt, query)
+            if cached is not None:
+                return self._extract_json(cached)
+
+        breaker = self.breakers[model]
+        for attempt in range(settings.gemini_max_retries + 1):
+            try:
+                breaker.before_call()
+            except CircuitOpenError as e:
+                raise GeminiServiceError(f"{phase} call skipped: {e}") from e
+
+            try:
+                result_text = await self._generate(phase, model, prompt, timeout, schema)
+            except Exception as e:
+                if not is_retryable(e):
+                    breaker.record_success()  # the backend answered; the request was bad
+                    raise GeminiServiceError(f"{phase} call failed: {e}") from e
+                breaker.record_failure()
+                error = e
+            except BaseException:
+                # Cancelled (a sibling chain failed, or the timeline was cancelled)
+                breaker.release_trial()
+                raise
+            else:
+                breaker.record_success()
+                try:
+                    result = self._extract_json(result_text)
+                except json.JSONDecodeError as e:
+                    error = e
+                else:
+                    if self.cache:
+                        await self.cache.set(phase, model, prompt, result_text, query)
+                    return result
+
+            if attempt < settings.gemini_max_retries:
+                delay = random.uniform(
+                    0, min(settings.gemini_backoff_max, settings.gemini_backoff_base * 2 ** attempt)
+                )
+                logger.warning(
+                    "%s call to %s failed (%s), retrying in %.1fs", phase, model, error, delay
+                )
+                await asyncio.sleep(delay)
+
+        raise GeminiServiceError(
+            f"{phase} call failed after {settings.gemini_max_retries + 1} attempts: {error}"
+        ) from error
+
+    async def _stream_json_array(
+        self, phase: str, model: str, prompt: str, timeout: float, schema, key: str
+    ) -> AsyncIterator[Dict]:
+        """
+        Streaming counterpart of _generate_json: yields each element of the array
+        under `key` as soon as it has been generated.
+        Failures are retried only while nothing has been yielded yet.
+        """
+        if self.cache:
+            cached = await self.cache.get(phase, model, prompt)
+            if cached is not None:
+                for item in self._extract_json(cached).get(key, []):
+                    yield item
+                return
+
+        breaker = self.breakers[model]
+        for attempt in range(settings.gemini_max_retries + 1):
+            try:
+                breaker.before_call()
+            except CircuitOpenError as e:
+                raise GeminiServiceError(f"{phase} call skipped: {e}") from e
+
+            parser = JSONArrayStreamParser(key)
+            yielded = 0
+            try:
+                async for chunk in self._generate_stream(phase, model, prompt, timeout, schema):
+                    for item in parser.feed(chunk):
+                        yielded += 1
+                        yield item
+            except Exception as e:
+                if not is_retryable(e):
+                    breaker.record_success()
+                    raise GeminiServiceError(f"{phase} call failed: {e}") from e
+                breaker.record_failure()
+                if yielded:
+                    raise GeminiServiceError(f"{phase} stream broke after {yielded} items: {e}") from e
+                error = e
+            except BaseException:
+                # Cancelled, or the consumer stopped reading: items already
+                # streamed show the backend was answering
+                if yielded:
+                    breaker.record_success()
+                else:
+                    breaker.release_trial()
+                raise
+            else:
+                breaker.record_success()
+                try:
+                    self._extract_json(parser.text)
+                except json.JSONDecodeError as e:
+                    if yielded:
+                        raise GeminiServiceError(f"{phase} stream ended with malformed JSON") from e
+                    error = e
+                else:
+                    if self.cache:
+                        await self.cache.set(phase, model, prompt, parser.text)
+                    return
+
+            if attempt < settings.gemini_max_retries:
+                delay = random.uniform(
+                    0, min(settings.gemini_backoff_max, settings.gemini_backoff_base * 2 ** attempt)
+                )
+                logger.warning(
+                    "%s stream from %s failed (%s), retrying in %.1fs", phase, model, error, delay
+                )
+                await asyncio.sleep(delay)
+
+        raise GeminiServiceError(
+            f"{phase} call failed after {settings.gemini_max_retries + 1} attempts: {error}"
+        ) from error
+
+    @staticmethod
+    def _skeleton_prompt(query: str, items: str = "") -> str:
+        return f"""
         You are a timeline researcher. Given a query about an event or topic, identify the key timeline structure.
 
         Query: {query}
@@ -44,62 +330,101 @@ class GeminiService:
         Return ONLY valid JSON matching this exact structure, no additional text.
         """
 
-        try:
-            response = self.client.models.generate_content(
-                model="gemini-2.5-pro",
-                contents=prompt
-            )
+    async def discover_timeline_skeleton(self, query: str) -> Dict:
+        """
+        Phase 1: Use Gemini Pro to discover timeline skeleton
+        Returns: Dictionary with topic, date_range, and anchor_events
+        """
+        prompt, _ = self.prompt_budget.fit("skeleton", self._skeleton_prompt, {"query": query})
 
-            # Extract JSON from response
-            result_text = response.text
-            # Remove markdown code blocks if present
-            if "```json" in result_text:
-                result_text = result_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in result_text:
-                result_text = result_text.split("```")[1].split("```")[0].strip()
-
-            return json.loads(result_text)
-        except json.JSONDecodeError as e:
-            # Fallback: return empty structure
-            return {
-                "topic": query,
-                "date_range": {
-                    "start": datetime.now().isoformat(),
-                    "end": datetime.now().isoformat()
-                },
-                "anchor_events": []
-            }
-        except Exception as e:
-            print(f"Error in discover_timeline_skeleton: {e}")
-            return {
-                "topic": query,
-                "date_range": {
-                    "start": datetime.now().isoformat(),
-                    "end": datetime.now().isoformat()
-                },
-                "anchor_events": []
-            }
+        return await self._generate_json(
+            "skeleton",
+            "gemini-2.5-pro",
+            prompt,
+            settings.gemini_skeleton_timeout,
+            SkeletonOutput,
+            self.prompt_budget.fit_field(query)
+        )
+
+    @staticmethod
+    def _refresh_prompt(query: str, since: str, items: str = "") -> str:
+        return f"""
+        You are a timeline researcher updating an existing timeline with new developments.
 
-    async def investigate_event(self, event_title: str, event_date: str, context: str) -> Dict:
+        Query: {query}
+        Covered until: {since}
+
+        Events already on the timeline (one JSON object per line, most recent first):
+        {items}
+
+        Provide a structured JSON response with:
+        1. topic: STRING - A concise name for the timeline
+        2. date_range: OBJECT with:
+           - start: STRING - ISO 8601 datetime of the earliest event you return
+           - end: STRING - ISO 8601 datetime of the latest event you return
+        3. anchor_events: ARRAY of 0-10 events, each with:
+           - title: STRING - Event title
+           - date: STRING - ISO 8601 datetime (e.g., "2019-04-15T18:20:00Z")
+           - priority: STRING - One of: "critical", "high", "medium", "low"
+
+        Only include major developments after {since}, and events listed above whose
+        title or date has since turned out to be wrong (corrected, keeping the same subject).
+        Do NOT repeat events listed above unchanged. If nothing happened, return no events.
+
+        IMPORTANT: All dates MUST be strings in ISO 8601 format.
+        Return ONLY valid JSON matching this exact structure, no additional text.
+        """
+
+    async def discover_new_developments(self, query: str, since: str, known_events: List[Dict]) -> Dict:
         """
-        Phase 2: Use Gemini Flash to investigate a single event
-        Returns: Dictionary with sources, claims, and conflicts
+        Phase 1 of a refresh: Gemini Pro proposes anchor events after `since`
+        (plus corrections to `known_events`, given most recent first)
+        Returns: Dictionary with topic, date_range, and anchor_events
+        """
+        prompt, _ = self.prompt_budget.fit(
+            "skeleton", self._refresh_prompt, {"query": query, "since": since}, known_events
+        )
+
+        return await self._generate_json(
+            "skeleton",
+            "gemini-2.5-pro",
+            prompt,
+            settings.gemini_skeleton_timeout,
+            SkeletonOutput,
+            self.prompt_budget.fit_field(query)
+        )
+
+    @staticmethod
+    def _investigation_prompt(
+        event_title: str, event_date: str, context: str, items: str = "", grounded: bool = False
+    ) -> str:
+        if grounded:
+            grounding = f"""
+        Candidate articles from our news corpus (one JSON object per line; "date" is the publish date):
+        {items}
+
+        Use ONLY these articles as sources, copying their url and outlet exactly.
         """
-        prompt = f"""
+            url_rule = "Source URL (must be one of the candidate article URLs)"
+        else:
+            grounding = ""
+            url_rule = "Source URL (real URLs when possible)"
+
+        return f"""
         You are investigating a specific event for a timeline.
 
         Event: {event_title}
         Date: {event_date}
         Context: {context}
-
+        {grounding}
         Provide a JSON response with:
-        1. sources: ARRAY of 5-10 credible sources, each with:
-           - url: STRING - Source URL (real URLs when possible)
+        1. conflicts: ARRAY of STRINGS - Any conflicting narratives you identify
+        2. sources: ARRAY of 5-10 credible sources, each with:
+           - url: STRING - {url_rule}
            - outlet: STRING - Publisher name (e.g., "BBC", "Reuters")
            - credibility_score: NUMBER - Between 0.0 and 1.0
            - publish_date: STRING - ISO 8601 datetime (e.g., "2019-04-15T20:00:00Z")
            - claims: ARRAY of STRINGS - Key claims from this source
-        2. conflicts: ARRAY of STRINGS - Any conflicting narratives you identify
 
         IMPORTANT:
         - All dates MUST be strings in ISO 8601 format
@@ -107,48 +432,72 @@ class GeminiService:
         Return ONLY valid JSON matching this exact structure, no additional text.
         """
 
-        try:
-            response = self.client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=prompt
-            )
-
-            result_text = response.text
-            if "```json" in result_text:
-                result_text = result_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in result_text:
-                result_text = result_text.split("```")[1].split("```")[0].strip()
-
-            return json.loads(result_text)
-        except json.JSONDecodeError:
-            return {
-                "sources": [],
-                "conflicts": []
-            }
-        except Exception as e:
-            print(f"Error in investigate_event: {e}")
-            return {
-                "sources": [],
-                "conflicts": []
-            }
+    def _fit_investigation_prompt(
+        self, event_title: str, event_date: str, context: str, articles: Optional[List[Dict]] = None
+    ) -> str:
+        """Investigation prompt within budget; articles arrive best match first"""
+        prompt, _ = self.prompt_budget.fit(
+            "investigate",
+            functools.partial(self._investigation_prompt, grounded=bool(articles)),
+            {"event_title": event_title, "event_date": event_date, "context": context},
+            [
+                {
+                    "url": article["url"],
+                    "outlet": article["outlet"],
+                    "date": article["published_at"],
+                    "title": article["title"],
+                    "desc": (article["description"] or "")[:300],
+                }
+                for article in articles or []
+            ],
+            label=event_title
+        )
+        return prompt
 
-    async def synthesize_branches(self, event_title: str, sources_data: List[Dict]) -> List[Dict]:
+    async def investigate_event_stream(
+        self,
+        event_title: str,
+        event_date: str,
+        context: str,
+        articles: Optional[List[Dict]] = None
+    ) -> AsyncIterator[Dict]:
         """
-        Phase 3: Use Gemini Pro to detect narrative branches
-        Returns: List of branches with credibility scores
+        Phase 2, streamed: yields each source as soon as the model has finished
+        generating it, instead of waiting for the whole response.
+        When corpus `articles` are given the model must cite them, and any source
+        whose URL is not one of them is dropped.
         """
-        prompt = f"""
+        allowed_urls = {normalize_url(article["url"]) for article in articles or []}
+
+        async for source in self._stream_json_array(
+            "investigate",
+            "gemini-2.5-flash",
+            self._fit_investigation_prompt(event_title, event_date, context, articles),
+            settings.gemini_investigate_timeout,
+            InvestigationOutput,
+            key="sources"
+        ):
+            if allowed_urls and normalize_url(source.get("url", "")) not in allowed_urls:
+                logger.info("Dropping uncited source %s for %r", source.get("url"), event_title)
+                continue
+            yield source
+
+    @staticmethod
+    def _synthesis_prompt(event_title: str, source_total: str, items: str = "") -> str:
+        return f"""
         You are analyzing sources for an event to identify narrative branches.
 
         Event: {event_title}
-        Sources Data: {json.dumps(sources_data, indent=2)}
+        Claims from {source_total} sources, with near-duplicates merged, most supported first. One JSON
+        object per line; "by" lists the outlets reporting the claim and "cred" is their average credibility:
+        {items}
 
         Identify distinct narrative branches (competing claims about what happened).
         Return a JSON ARRAY where each branch has:
         - narrative: STRING - Clear description of this version of events
         - credibility_score: NUMBER - Between 0.0 and 1.0 based on source quality and consensus
         - evidence: STRING - Supporting quotes or facts combined into a single text paragraph
-        - source_count: NUMBER - Count of sources supporting this narrative
+        - claim_ids: ARRAY of STRINGS - ids of the claims supporting this narrative
 
         IMPORTANT:
         - evidence MUST be a STRING (single paragraph), NOT an array
@@ -156,21 +505,43 @@ class GeminiService:
         Return ONLY a valid JSON array of branches matching this exact structure, no additional text.
         """
 
-        try:
-            response = self.client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=prompt
-            )
+    def _fit_synthesis_prompt(self, event_title: str, sources_data: List[Dict]):
+        """Synthesis prompt within budget, plus the claim clusters it refers to"""
+        clusters = cluster_claims(sources_data, settings.claim_similarity_threshold)
+        prompt, _ = self.prompt_budget.fit(
+            "synthesize",
+            self._synthesis_prompt,
+            {"event_title": event_title, "source_total": str(len(sources_data))},
+            [
+                {
+                    "id": cluster["id"],
+                    "claim": cluster["claim"],
+                    "by": cluster["outlets"],
+                    "cred": cluster["credibility"],
+                }
+                for cluster in clusters
+            ],
+            label=event_title
+        )
+        return prompt, clusters
 
-            result_text = response.text
-            if "```json" in result_text:
-                result_text = result_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in result_text:
-                result_text = result_text.split("```")[1].split("```")[0].strip()
-
-            return json.loads(result_text)
-        except json.JSONDecodeError:
-            return []
-        except Exception as e:
-            print(f"Error in synthesize_branches: {e}")
-            return []
+    async def synthesize_branches(self, event_title: str, sources_data: List[Dict]) -> List[Dict]:
+        """
+        Phase 3: Use Gemini Flash to detect narrative branches
+        Near-duplicate claims are clustered first, so the model sees each claim once
+        together with the outlets that reported it. Each branch cites claim ids, from
+        which source_count is computed deterministically.
+        Returns: List of branches with credibility scores
+        """
+        prompt, clusters = self._fit_synthesis_prompt(event_title, sources_data)
+
+        branches = await self._generate_json(
+            "synthesize",
+            "gemini-2.5-flash",
+            prompt,
+            settings.gemini_synthesize_timeout,
+            list[BranchOutput]
+        )
+        for branch in branches:
+            branch["source_count"] = count_supporting_sources(branch.pop("claim_ids", []), clusters)
+        return branches
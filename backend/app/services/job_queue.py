@@ -0,0 +1,160 @@
+import json
+import time
+import uuid
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Optional
+
+import redis.asyncio as redis
+
+from app.config import settings
+from app.redis_client import get_redis
+
+# All jobs live in one sorted set scored by the time they become visible.
+# Claiming a job pushes its score to the end of the lease, so a worker that
+# dies without acking simply lets the job become visible to others again.
+SCHEDULE_KEY = "veritas:jobs:schedule"
+PAYLOAD_KEY = "veritas:jobs:payload"
+ATTEMPTS_KEY = "veritas:jobs:attempts"
+LEASE_KEY = "veritas:jobs:lease"
+# Pub/sub channel telling workers to stop a running job (message: job id)
+CANCEL_CHANNEL = "veritas:jobs:cancel"
+
+# KEYS: schedule, attempts, lease | ARGV: now, lease_expiry, lease_token
+CLAIM_SCRIPT = """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, 1)
+if #ids == 0 then
+    return nil
+end
+local job_id = ids[1]
+redis.call('ZADD', KEYS[1], ARGV[2], job_id)
+redis.call('HSET', KEYS[3], job_id, ARGV[3])
+local attempts = redis.call('HINCRBY', KEYS[2], job_id, 1)
+return {job_id, attempts}
+"""
+
+# KEYS: schedule, lease | ARGV: job_id, lease_token, lease_expiry
+EXTEND_SCRIPT = """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+redis.call('ZADD', KEYS[1], 'XX', ARGV[3], ARGV[1])
+return 1
+"""
+
+# KEYS: schedule, payload, attempts, lease | ARGV: job_id, lease_token
+ACK_SCRIPT = """
+if redis.call('HGET', KEYS[4], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('HDEL', KEYS[2], ARGV[1])
+redis.call('HDEL', KEYS[3], ARGV[1])
+redis.call('HDEL', KEYS[4], ARGV[1])
+return 1
+"""
+
+
+@dataclass
+class Job:
+    id: str
+    payload: Dict
+    attempts: int
+    lease_token: str
+
+
+class JobQueue:
+    """
+    Durable timeline generation queue backed by Redis.
+    Jobs are keyed by timeline id, so enqueueing the same timeline twice is a no-op.
+    """
+
+    def __init__(self, client: Optional[redis.Redis] = None):
+        self._client = client
+
+    @property
+    def client(self) -> redis.Redis:
+        return self._client or get_redis()
+
+    async def enqueue(self, job_id: str, payload: Dict) -> bool:
+        """Add a job that is immediately visible. Returns False if it was already queued."""
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hsetnx(PAYLOAD_KEY, job_id, json.dumps(payload))
+            pipe.zadd(SCHEDULE_KEY, {job_id: time.time()}, nx=True)
+            _, added = await pipe.execute()
+        return bool(added)
+
+    async def is_queued(self, job_id: str) -> bool:
+        return await self.client.zscore(SCHEDULE_KEY, job_id) is not None
+
+    async def claim(self) -> Optional[Job]:
+        """Lease the oldest visible job for settings.job_visibility_timeout seconds"""
+        now = time.time()
+        lease_token = uuid.uuid4().hex
+        claimed = await self.client.eval(
+            CLAIM_SCRIPT,
+            3,
+            SCHEDULE_KEY,
+            ATTEMPTS_KEY,
+            LEASE_KEY,
+            now,
+            now + settings.job_visibility_timeout,
+            lease_token
+        )
+        if not claimed:
+            return None
+
+        job_id, attempts = claimed
+        payload = await self.client.hget(PAYLOAD_KEY, job_id)
+        return Job(
+            id=job_id,
+            payload=json.loads(payload) if payload else {},
+            attempts=int(attempts),
+            lease_token=lease_token
+        )
+
+    async def extend(self, job: Job) -> bool:
+        """Heartbeat: push the lease out again. Returns False if the lease was lost."""
+        extended = await self.client.eval(
+            EXTEND_SCRIPT,
+            2,
+            SCHEDULE_KEY,
+            LEASE_KEY,
+            job.id,
+            job.lease_token,
+            time.time() + settings.job_visibility_timeout
+        )
+        return bool(extended)
+
+    async def ack(self, job: Job) -> bool:
+        """Remove a finished job. Ignored if another worker has since re-leased it."""
+        acked = await self.client.eval(
+            ACK_SCRIPT,
+            4,
+            SCHEDULE_KEY,
+            PAYLOAD_KEY,
+            ATTEMPTS_KEY,
+            LEASE_KEY,
+            job.id,
+            job.lease_token
+        )
+        return bool(acked)
+
+    async def cancel(self, job_id: str):
+        """
+        Ask whichever worker runs the job to stop it. Best effort: a worker that
+        misses the message stops at the job's next write (see set_timeline_fields).
+        """
+        await self.client.publish(CANCEL_CHANNEL, job_id)
+
+    async def cancellations(self) -> AsyncIterator[str]:
+        """Ids of jobs cancelled from now on, until the iterator is closed"""
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(CANCEL_CHANNEL)
+            async for message in pubsub.listen():
+                yield message["data"]
+        finally:
+            await pubsub.aclose()
+
+
+job_queue = JobQueue()
@@ -0,0 +1,92 @@
+import json
+from typing import Any, List, Optional
+
+
+class JSONArrayStreamParser:
+    """
+    Incremental parser for streamed model output.
+    Yields each element of one JSON array as soon as the element is complete:
+    the array stored under `key` in the top-level object, or the top-level
+    array itself when `key` is None. Only object/array elements are emitted.
+    """
+
+    def __init__(self, key: Optional[str] = None, keep_text: bool = True):
+        self.key = key
+        # With keep_text=False consumed input is discarded, so arbitrarily large
+        # files can be parsed in constant memory (apart from the current element)
+        self.keep_text = keep_text
+        self.text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._pending_key: Optional[str] = None
+        self._array_depth: Optional[int] = None  # depth inside the target array
+        self._element_start: Optional[int] = None
+        self.array_closed = False
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Consume the next chunk of text; return the elements it completed"""
+        self.text += chunk
+        completed = []
+        text = self.text
+
+        for i in range(self._pos, len(text)):
+            char = text[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self.key is not None:
+                        self._last_string = json.loads(text[self._string_start:i + 1])
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char == ":" and self._depth == 1:
+                self._pending_key = self._last_string
+            elif char == "," and self._depth == 1:
+                self._pending_key = None
+            elif char in "{[":
+                if self._array_depth is None and not self.array_closed and char == "[" and (
+                    (self.key is None and self._depth == 0)
+                    or (self.key is not None and self._depth == 1 and self._pending_key == self.key)
+                ):
+                    self._array_depth = self._depth + 1
+                elif self._array_depth is not None and self._depth == self._array_depth:
+                    self._element_start = i
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._array_depth is not None:
+                    if self._depth == self._array_depth and self._element_start is not None:
+                        completed.append(json.loads(text[self._element_start:i + 1]))
+                        self._element_start = None
+                    elif self._depth < self._array_depth:
+                        self._array_depth = None
+                        self.array_closed = True
+
+        self._pos = len(text)
+        if not self.keep_text:
+            self._discard_consumed()
+        return completed
+
+    def _discard_consumed(self):
+        cut = self._pos
+        if self._element_start is not None:
+            cut = min(cut, self._element_start)
+        if self._in_string:
+            cut = min(cut, self._string_start)
+
+        self.text = self.text[cut:]
+        self._pos -= cut
+        self._string_start -= cut
+        if self._element_start is not None:
+            self._element_start -= cut
@@ -0,0 +1,103 @@
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+
+from app.redis_client import get_redis
+from app.telemetry import CACHE_LOOKUPS
+from app.utils import normalize_text
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "veritas:llm:"
+
+
+class LLMCache:
+    """
+    Two-tier cache for model responses keyed on (model, prompt), with the
+    user's query normalized inside the prompt:
+    an in-process LRU in front of a Redis tier shared by all API/worker processes.
+    Each pipeline phase has its own TTL.
+    """
+
+    def __init__(self, max_entries: int, ttls: Dict[str, int], client: Optional[redis.Redis] = None):
+        self.max_entries = max_entries
+        self.ttls = ttls
+        self._client = client
+        self._local: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+        self.stats = {
+            phase: {"local_hits": 0, "redis_hits": 0, "misses": 0}
+            for phase in ttls
+        }
+
+    @property
+    def client(self) -> redis.Redis:
+        return self._client or get_redis()
+
+    @staticmethod
+    def make_key(model: str, prompt: str, query: Optional[str] = None) -> str:
+        """
+        Key of the final prompt (after budgeting) sent to `model`. Only the
+        free-text `query`, passed as it appears in that prompt, is normalized,
+        so "Notre-Dame fire" and "notre dame fire" share entries; the rest of the
+        prompt (JSON, claims, figures such as "-5%") is hashed verbatim.
+        """
+        if query:
+            prompt = prompt.replace(query, normalize_text(query))
+        digest = hashlib.sha256(f"{model}\0{prompt}".encode()).hexdigest()
+        return KEY_PREFIX + digest
+
+    def _get_local(self, key: str) -> Optional[str]:
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._local[key]
+            return None
+        self._local.move_to_end(key)
+        return value
+
+    def _set_local(self, key: str, value: str, ttl: int):
+        self._local[key] = (time.monotonic() + ttl, value)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    async def get(self, phase: str, model: str, prompt: str, query: Optional[str] = None) -> Optional[str]:
+        key = self.make_key(model, prompt, query)
+
+        value = self._get_local(key)
+        if value is not None:
+            self.stats[phase]["local_hits"] += 1
+            CACHE_LOOKUPS.labels(phase, "local_hit").inc()
+            return value
+
+        try:
+            value = await self.client.get(key)
+        except RedisError as e:
+            logger.warning("LLM cache read failed: %s", e)
+            value = None
+
+        if value is None:
+            self.stats[phase]["misses"] += 1
+            CACHE_LOOKUPS.labels(phase, "miss").inc()
+            return None
+
+        self.stats[phase]["redis_hits"] += 1
+        CACHE_LOOKUPS.labels(phase, "redis_hit").inc()
+        self._set_local(key, value, self.ttls[phase])
+        return value
+
+    async def set(self, phase: str, model: str, prompt: str, value: str, query: Optional[str] = None):
+        key = self.make_key(model, prompt, query)
+        ttl = self.ttls[phase]
+        self._set_local(key, value, ttl)
+        try:
+            await self.client.set(key, value, ex=ttl)
+        except RedisError as e:
+            logger.warning("LLM cache write failed: %s", e)
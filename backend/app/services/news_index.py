@@ -0,0 +1,195 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.config import settings
+from app.services.json_stream import JSONArrayStreamParser
+from app.utils import STOPWORDS, normalize_text, normalize_url, parse_datetime_naive
+
+# Articles live in a plain table (the single copy of their text); an external-content
+# FTS5 table holds the inverted index over it and provides BM25 ranking.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    url_key TEXT NOT NULL UNIQUE,
+    outlet TEXT,
+    title TEXT NOT NULL,
+    description TEXT,
+    content TEXT,
+    published_at TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_articles_published_at ON articles(published_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+    title, description, content,
+    content='articles', content_rowid='id',
+    tokenize='porter unicode61'
+);
+"""
+
+# BM25 column weights: title, description, content
+BM25_WEIGHTS = (3.0, 1.5, 1.0)
+
+READ_CHUNK_SIZE = 64 * 1024
+
+# Candidates fetched per wanted article when filtering by term coverage
+COVERAGE_CANDIDATES = 4
+
+
+def iter_newsapi_articles(path: str) -> Iterator[Dict]:
+    """Stream articles out of a NewsAPI-style dump without loading the whole file"""
+    parser = JSONArrayStreamParser("articles", keep_text=False)
+    with open(path, encoding="utf-8") as f:
+        while chunk := f.read(READ_CHUNK_SIZE):
+            yield from parser.feed(chunk)
+
+
+def _published_at(article: Dict) -> Optional[str]:
+    try:
+        return parse_datetime_naive(article["publishedAt"]).isoformat()
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def significant_terms(text: str) -> List[str]:
+    return [
+        term for term in dict.fromkeys(normalize_text(text).split())
+        if len(term) > 1 and term not in STOPWORDS
+    ]
+
+
+def build_match_query(text: str) -> Optional[str]:
+    """FTS5 MATCH expression: any of the text's significant terms"""
+    terms = significant_terms(text)
+    if not terms:
+        return None
+    return " OR ".join(f'"{term}"' for term in terms)
+
+
+class NewsIndex:
+    """
+    On-disk BM25 index over NewsAPI-format article dumps.
+    Appending a new dump only indexes its new articles (de-duplicated by URL).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        # One connection per thread: searches run on the default executor
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path)
+            connection.row_factory = sqlite3.Row
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def add_articles(self, articles: Iterable[Dict]) -> Tuple[int, int]:
+        """Index articles in a single transaction. Returns (added, skipped duplicates)."""
+        added = skipped = 0
+        with self.connection as conn:
+            for article in articles:
+                url = article.get("url")
+                title = article.get("title")
+                if not url or not title:
+                    skipped += 1
+                    continue
+
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO articles "
+                    "(url, url_key, outlet, title, description, content, published_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        url,
+                        normalize_url(url),
+                        (article.get("source") or {}).get("name"),
+                        title,
+                        article.get("description"),
+                        article.get("content"),
+                        _published_at(article),
+                    )
+                )
+                if cursor.rowcount == 0:
+                    skipped += 1
+                    continue
+
+                conn.execute(
+                    "INSERT INTO articles_fts (rowid, title, description, content) VALUES (?, ?, ?, ?)",
+                    (cursor.lastrowid, title, article.get("description"), article.get("content"))
+                )
+                added += 1
+        return added, skipped
+
+    def ingest_file(self, path: str) -> Tuple[int, int]:
+        return self.add_articles(iter_newsapi_articles(path))
+
+    def search(
+        self,
+        text: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: int = 8,
+        min_coverage: float = 0.0
+    ) -> List[Dict]:
+        """
+        Top `limit` articles for `text` by BM25, optionally within a publish-date
+        window. Articles matching less than `min_coverage` of the text's
+        significant terms are dropped: the match is an OR, so without a floor a
+        single common word ("fire") would be enough.
+        """
+        terms = significant_terms(text)
+        match = build_match_query(text)
+        if match is None:
+            return []
+
+        sql = (
+            "SELECT a.id, a.url, a.outlet, a.title, a.description, a.published_at, "
+            f"bm25(articles_fts, {', '.join(map(str, BM25_WEIGHTS))}) AS score "
+            "FROM articles_fts JOIN articles a ON a.id = articles_fts.rowid "
+            "WHERE articles_fts MATCH ?"
+        )
+        params: list = [match]
+        if start is not None:
+            sql += " AND a.published_at >= ?"
+            params.append(start.isoformat())
+        if end is not None:
+            sql += " AND a.published_at <= ?"
+            params.append(end.isoformat())
+        sql += " ORDER BY score LIMIT ?"
+        # Over-fetch, so articles dropped for coverage don't leave the result short
+        params.append(limit * COVERAGE_CANDIDATES if min_coverage > 0 else limit)
+
+        articles = [dict(row) for row in self.connection.execute(sql, params)]
+        if min_coverage > 0 and len(terms) > 1 and articles:
+            matched = self._matched_terms([article["id"] for article in articles], terms)
+            articles = [
+                article for article in articles
+                if matched.get(article["id"], 0) / len(terms) >= min_coverage
+            ]
+        for article in articles:
+            del article["id"]
+        return articles[:limit]
+
+    def _matched_terms(self, article_ids: List[int], terms: List[str]) -> Dict[int, int]:
+        """Number of `terms` each article matches (through FTS5, so stemming applies)"""
+        placeholders = ", ".join("?" * len(article_ids))
+        matched: Dict[int, int] = {}
+        for term in terms:
+            rows = self.connection.execute(
+                f"SELECT rowid FROM articles_fts WHERE articles_fts MATCH ? AND rowid IN ({placeholders})",
+                [f'"{term}"', *article_ids]
+            )
+            for (article_id,) in rows:
+                matched[article_id] = matched.get(article_id, 0) + 1
+        return matched
+
+
+news_index = NewsIndex(settings.news_index_path)
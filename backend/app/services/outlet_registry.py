@@ -0,0 +1,278 @@
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from sqlalchemy import bindparam, event, insert, select, update
+
+from app.config import settings
+from app.database import dialect_insert
+from app.models import Outlet, OutletAlias
+from app.models.timeline import generate_uuid
+from app.utils import normalize_text
+
+# Host prefixes that don't identify a different outlet
+HOST_PREFIXES = ("www.", "m.", "amp.", "mobile.")
+# Name words that don't either: "The Guardian", "Reuters UK", "BBC News Online"
+NAME_NOISE = {"the", "news", "online", "uk", "us", "usa", "international", "edition"}
+# Names that are really hosts ("Ndtvprofit.com")
+HOST_LIKE = re.compile(r"^(?:www\.)?([\w-]+)(?:\.[a-z]{2,})+$")
+UNKNOWN_NAMES = {"", "unknown", "n a", "none"}
+# Session.info key of the cache entries waiting for the session to commit
+PENDING_KEY = "outlet_registry_pending"
+
+
+def canonical_host(url: str) -> Optional[str]:
+    try:
+        host = urlsplit(url.strip()).hostname
+    except ValueError:
+        return None
+    if not host:
+        return None
+    for prefix in HOST_PREFIXES:
+        host = host.removeprefix(prefix)
+    return host
+
+
+def canonical_name(name: str) -> Optional[str]:
+    """
+    Outlet name reduced to what identifies it.
+    "Reuters UK" -> "reuters", "The Times of India" -> "times of india", "Ndtvprofit.com" -> "ndtvprofit"
+    """
+    name = name.strip().lower()
+    host_like = HOST_LIKE.match(name)
+    if host_like:
+        name = host_like.group(1)
+    normalized = normalize_text(name)
+    if normalized in UNKNOWN_NAMES:
+        return None
+    terms = [term for term in normalized.split() if term not in NAME_NOISE]
+    return " ".join(terms) if terms else normalized
+
+
+def outlet_aliases(url: str, name: str) -> Tuple[Optional[str], Optional[str]]:
+    """(host alias, name alias) keys of a source; either may be None"""
+    host = canonical_host(url)
+    name = canonical_name(name)
+    return (f"host:{host}" if host else None), (f"name:{name}" if name else None)
+
+
+@dataclass
+class OutletProfile:
+    id: str
+    name: str
+    credibility_score: float
+    credibility_samples: int
+
+
+class OutletRegistry:
+    """
+    Resolves sources to canonical outlets and keeps their credibility profiles.
+    A source is identified by its URL's host first, then by its outlet name;
+    outlets seen for the first time are registered under both. Aliases and
+    profiles are kept in per-process LRUs, so a batch of sources from known
+    outlets costs no alias or profile reads, only the credibility update.
+    What a transaction reads or writes is only cached once it commits, so a
+    rollback can't leave the caches pointing at outlets that were never stored.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._aliases: "OrderedDict[str, str]" = OrderedDict()
+        # outlet id -> (profile, monotonic time it was read)
+        self._profiles: "OrderedDict[str, Tuple[OutletProfile, float]]" = OrderedDict()
+
+    def clear(self):
+        """Forget all cached aliases and profiles"""
+        self._aliases.clear()
+        self._profiles.clear()
+
+    def _remember(self, cache: OrderedDict, key: str, value):
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self.max_entries:
+            cache.popitem(last=False)
+
+    def cached_alias(self, alias: Optional[str]) -> Optional[str]:
+        if alias is None or alias not in self._aliases:
+            return None
+        self._aliases.move_to_end(alias)
+        return self._aliases[alias]
+
+    def _pending(self, db) -> Tuple[Dict[str, str], Dict[str, Tuple[OutletProfile, float]]]:
+        """(aliases, profiles) to cache when `db` commits; dropped if it rolls back"""
+        session = db.sync_session
+        pending = session.info.get(PENDING_KEY)
+        if pending is None:
+            pending = session.info[PENDING_KEY] = ({}, {})
+            event.listen(session, "after_commit", self._apply_pending)
+            event.listen(session, "after_soft_rollback", self._discard_pending)
+        return pending
+
+    def _apply_pending(self, session):
+        aliases, profiles = session.info[PENDING_KEY]
+        for alias, outlet_id in aliases.items():
+            self._remember(self._aliases, alias, outlet_id)
+        for outlet_id, entry in profiles.items():
+            self._remember(self._profiles, outlet_id, entry)
+        self._discard_pending(session)
+
+    def _discard_pending(self, session, previous_transaction=None):
+        for entries in session.info[PENDING_KEY]:
+            entries.clear()
+
+    async def _load_aliases(self, db, aliases: Iterable[str]):
+        pending = self._pending(db)[0]
+        missing = [alias for alias in aliases if alias and alias not in pending and alias not in self._aliases]
+        if not missing:
+            return
+        result = await db.execute(
+            select(OutletAlias.alias, OutletAlias.outlet_id).where(OutletAlias.alias.in_(missing))
+        )
+        pending.update(result.all())
+
+    async def register(self, db, sources: List[Tuple[str, str]]) -> List[Optional[str]]:
+        """
+        Outlet id for each (url, outlet name), registering new outlets and
+        aliases in the session's transaction. None for sources with neither a
+        host nor a known name.
+        """
+        keys = [outlet_aliases(url, name) for url, name in sources]
+        await self._load_aliases(db, {alias for pair in keys for alias in pair})
+        pending_aliases = self._pending(db)[0]
+
+        new_outlets: Dict[str, Dict] = {}
+        new_aliases: Dict[str, str] = {}
+
+        def lookup(alias):
+            if alias is None:
+                return None
+            return new_aliases.get(alias) or pending_aliases.get(alias) or self.cached_alias(alias)
+
+        outlet_ids = []
+        for (url, name), (host_alias, name_alias) in zip(sources, keys):
+            outlet_id = lookup(host_alias)
+            if outlet_id is None and name_alias:
+                outlet_id = lookup(name_alias)
+                if outlet_id and host_alias:
+                    # A new host of a known outlet ("uk.reuters.com" for "Reuters UK")
+                    new_aliases[host_alias] = outlet_id
+            if outlet_id is None and (host_alias or name_alias):
+                outlet_id = generate_uuid()
+                new_outlets[outlet_id] = {
+                    "id": outlet_id,
+                    "name": name.strip() or canonical_host(url),
+                    "domain": canonical_host(url),
+                    "credibility_score": 0.5,
+                    "credibility_samples": 0,
+                }
+                for alias in (host_alias, name_alias):
+                    if alias:
+                        new_aliases[alias] = outlet_id
+            outlet_ids.append(outlet_id)
+
+        if new_aliases:
+            if new_outlets:
+                await db.execute(insert(Outlet), list(new_outlets.values()))
+            await db.execute(dialect_insert(db, OutletAlias).values([
+                {"alias": alias, "outlet_id": outlet_id} for alias, outlet_id in new_aliases.items()
+            ]).on_conflict_do_nothing(index_elements=[OutletAlias.alias]))
+            # Another writer may have registered the same alias first; its outlet wins
+            winners = dict((await db.execute(
+                select(OutletAlias.alias, OutletAlias.outlet_id).where(OutletAlias.alias.in_(new_aliases))
+            )).all())
+            pending_aliases.update(winners)
+            remap = {
+                outlet_id: winners[alias] for alias, outlet_id in new_aliases.items()
+                if winners.get(alias, outlet_id) != outlet_id
+            }
+            outlet_ids = [remap.get(outlet_id, outlet_id) for outlet_id in outlet_ids]
+        return outlet_ids
+
+    async def resolve_sources(
+        self, db, source_rows: List[Dict], fold: Optional[List[bool]] = None
+    ) -> Dict[str, OutletProfile]:
+        """
+        Point insert-ready source rows at their outlets by setting `outlet_id`,
+        in place, and fold the model's scores into the outlets' profiles (only
+        for the rows flagged in `fold`, if given). The rows keep the name and
+        score the model gave; responses read the outlet's name and credibility.
+        Returns the profiles of the rows' outlets.
+        """
+        if not source_rows:
+            return {}
+        outlet_ids = await self.register(db, [(row["url"], row["outlet"]) for row in source_rows])
+
+        samples: Dict[str, List[float]] = {}
+        for index, (row, outlet_id) in enumerate(zip(source_rows, outlet_ids)):
+            row["outlet_id"] = outlet_id
+            if fold is not None and not fold[index]:
+                continue
+            if outlet_id and row.get("credibility_score") is not None:
+                samples.setdefault(outlet_id, []).append(float(row["credibility_score"]))
+        if samples:
+            # Core executemany (not an ORM bulk update), so each row is one atomic fold
+            outlets = Outlet.__table__
+            await db.execute(
+                update(outlets)
+                .where(outlets.c.id == bindparam("outlet_id"))
+                .values(
+                    credibility_score=(
+                        outlets.c.credibility_score * outlets.c.credibility_samples + bindparam("total")
+                    ) / (outlets.c.credibility_samples + bindparam("count")),
+                    credibility_samples=outlets.c.credibility_samples + bindparam("count"),
+                ),
+                [
+                    {"outlet_id": outlet_id, "total": sum(scores), "count": len(scores)}
+                    for outlet_id, scores in samples.items()
+                ],
+            )
+
+        return await self.profiles(db, {outlet_id for outlet_id in outlet_ids if outlet_id}, samples)
+
+    async def profiles(
+        self, db, outlet_ids: Iterable[str], samples: Optional[Dict[str, List[float]]] = None
+    ) -> Dict[str, OutletProfile]:
+        """
+        Profiles of the given outlets. Cached profiles younger than
+        OUTLET_PROFILE_TTL are served from memory, with this process's new
+        `samples` (already written) folded in; the rest are read in one query.
+        """
+        samples = samples or {}
+        pending = self._pending(db)[1]
+        now = time.monotonic()
+        profiles, missing = {}, []
+        for outlet_id in outlet_ids:
+            cached = pending.get(outlet_id) or self._profiles.get(outlet_id)
+            if cached is None or now - cached[1] > settings.outlet_profile_ttl:
+                missing.append(outlet_id)
+                continue
+            profile, read_at = cached
+            scores = samples.get(outlet_id)
+            if scores:
+                profile = replace(
+                    profile,
+                    credibility_score=(
+                        profile.credibility_score * profile.credibility_samples + sum(scores)
+                    ) / (profile.credibility_samples + len(scores)),
+                    credibility_samples=profile.credibility_samples + len(scores),
+                )
+                pending[outlet_id] = (profile, read_at)
+            elif outlet_id in self._profiles:
+                self._profiles.move_to_end(outlet_id)
+            profiles[outlet_id] = profile
+
+        if missing:
+            result = await db.execute(
+                select(Outlet.id, Outlet.name, Outlet.credibility_score, Outlet.credibility_samples)
+                .where(Outlet.id.in_(missing))
+            )
+            for row in result.all():
+                profiles[row.id] = OutletProfile(*row)
+                pending[row.id] = (profiles[row.id], now)
+        return profiles
+
+
+outlet_registry = OutletRegistry(settings.outlet_cache_entries)
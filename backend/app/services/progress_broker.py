@@ -0,0 +1,123 @@
+import asyncio
+import json
+import logging
+from typing import Dict, Optional, Set
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+
+from app.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "veritas:progress:"
+
+# Per-subscriber buffer; a subscriber that falls this far behind loses its oldest messages
+SUBSCRIBER_QUEUE_SIZE = 256
+
+
+class _Channel:
+    def __init__(self):
+        self.subscribers: Set["Subscription"] = set()
+        self.ready = asyncio.Event()
+        self.reader: Optional[asyncio.Task] = None
+        # Latest status/progress seen on this channel, shared by all subscribers
+        self.last_status: Optional[Dict] = None
+
+
+class Subscription:
+    def __init__(self, broker: "ProgressBroker", timeline_id: str, channel: _Channel):
+        self.broker = broker
+        self.timeline_id = timeline_id
+        self.channel = channel
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    @property
+    def last_status(self) -> Optional[Dict]:
+        return self.channel.last_status
+
+    def set_status(self, status: Dict):
+        if self.channel.last_status is None:
+            self.channel.last_status = status
+
+    async def get(self) -> Dict:
+        return await self.queue.get()
+
+    def deliver(self, message: Dict):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    async def close(self):
+        await self.broker._unsubscribe(self)
+
+
+class ProgressBroker:
+    """
+    Fan-out of timeline progress messages.
+    The worker publishes to a Redis channel per timeline; each API process holds at
+    most one Redis subscription per timeline and fans messages out to its local
+    subscribers, so N viewers of the same timeline cost one subscription.
+    """
+
+    def __init__(self, client: Optional[redis.Redis] = None):
+        self._client = client
+        self._channels: Dict[str, _Channel] = {}
+
+    @property
+    def client(self) -> redis.Redis:
+        return self._client or get_redis()
+
+    async def publish(self, timeline_id: str, message: Dict):
+        """Best effort: progress streaming must never fail timeline generation"""
+        try:
+            await self.client.publish(CHANNEL_PREFIX + timeline_id, json.dumps(message))
+        except RedisError as e:
+            logger.warning("Failed to publish progress for %s: %s", timeline_id, e)
+
+    async def subscribe(self, timeline_id: str) -> Subscription:
+        """Returns once the Redis subscription is live, so no later message is missed"""
+        channel = self._channels.get(timeline_id)
+        if channel is None:
+            channel = self._channels[timeline_id] = _Channel()
+            channel.reader = asyncio.create_task(self._read(timeline_id, channel))
+
+        subscription = Subscription(self, timeline_id, channel)
+        channel.subscribers.add(subscription)
+        await channel.ready.wait()
+        return subscription
+
+    async def _unsubscribe(self, subscription: Subscription):
+        channel = subscription.channel
+        channel.subscribers.discard(subscription)
+        if not channel.subscribers and self._channels.get(subscription.timeline_id) is channel:
+            del self._channels[subscription.timeline_id]
+            channel.reader.cancel()
+
+    async def _read(self, timeline_id: str, channel: _Channel):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(CHANNEL_PREFIX + timeline_id)
+            channel.ready.set()
+            async for raw in pubsub.listen():
+                message = json.loads(raw["data"])
+                if "progress" in message:
+                    channel.last_status = {
+                        "id": timeline_id,
+                        "status": message.get("status", "processing"),
+                        "progress": message["progress"],
+                    }
+                for subscription in list(channel.subscribers):
+                    subscription.deliver(message)
+        except RedisError as e:
+            logger.warning("Progress subscription for %s dropped: %s", timeline_id, e)
+            for subscription in list(channel.subscribers):
+                subscription.deliver({"type": "error", "detail": "progress stream unavailable"})
+        finally:
+            channel.ready.set()
+            if self._channels.get(timeline_id) is channel:
+                del self._channels[timeline_id]
+            await pubsub.aclose()
+
+
+progress_broker = ProgressBroker()
@@ -0,0 +1,110 @@
+import json
+import logging
+from typing import Callable, Dict, List, Tuple
+
+from app.services.rate_limiter import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Separator between item lines inside the indented prompt templates
+ITEM_SEPARATOR = "\n        "
+
+
+def compact_json(item: Dict) -> str:
+    """Single-line JSON without whitespace, dropping empty fields"""
+    return json.dumps(
+        {key: value for key, value in item.items() if value not in (None, "", [], {})},
+        ensure_ascii=False,
+        separators=(",", ":")
+    )
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut `text` at a word boundary so it estimates to at most `max_tokens`"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    cut = text[:max(0, (max_tokens - 1) * 4 - 1)]
+    return (cut.rsplit(" ", 1)[0] if " " in cut else cut) + "…"
+
+
+def fit_lines(lines: List[str], budget: int) -> List[str]:
+    """Longest prefix of the (ranked) lines that fits in `budget` tokens; never empty"""
+    kept, used = [], 0
+    for line in lines:
+        cost = estimate_tokens(ITEM_SEPARATOR + line)
+        if kept and used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    return kept
+
+
+class PromptBudget:
+    """
+    Fits prompts into per-phase token budgets and keeps before/after counts.
+    Free-text fields are capped at `field_max_tokens`; ranked items are serialized
+    compactly and the lowest-ranked ones are dropped until the prompt fits.
+    """
+
+    def __init__(self, budgets: Dict[str, int], field_max_tokens: int):
+        self.budgets = budgets
+        self.field_max_tokens = field_max_tokens
+        self.stats = {
+            phase: {"prompts": 0, "tokens_before": 0, "tokens_after": 0, "items_dropped": 0}
+            for phase in budgets
+        }
+
+    def fit_field(self, value: str) -> str:
+        """A free-text field as fit() puts it into the prompt"""
+        return truncate_to_tokens(value, self.field_max_tokens)
+
+    def fit(
+        self,
+        phase: str,
+        render: Callable[..., str],
+        fields: Dict[str, str],
+        items: List[Dict] = (),
+        label: str = "",
+    ) -> Tuple[str, List[Dict]]:
+        """
+        Render a prompt within the phase budget.
+        `render(items=..., **fields)` must build the prompt from the item block;
+        `items` are expected best-first. Returns the prompt and the items kept.
+        """
+        before = estimate_tokens(render(
+            items=ITEM_SEPARATOR.join(json.dumps(item, indent=2, ensure_ascii=False) for item in items),
+            **fields
+        ))
+
+        truncated = [name for name, value in fields.items()
+                     if estimate_tokens(value) > self.field_max_tokens]
+        fields = {name: self.fit_field(value) for name, value in fields.items()}
+
+        kept = list(items)
+        if items:
+            fixed = estimate_tokens(render(items="", **fields))
+            lines = fit_lines([compact_json(item) for item in items], self.budgets[phase] - fixed)
+            kept = kept[:len(lines)]
+            prompt = render(items=ITEM_SEPARATOR.join(lines), **fields)
+        else:
+            prompt = render(items="", **fields)
+        after = estimate_tokens(prompt)
+
+        stats = self.stats[phase]
+        stats["prompts"] += 1
+        stats["tokens_before"] += before
+        stats["tokens_after"] += after
+        stats["items_dropped"] += len(items) - len(kept)
+
+        trimmed = [f"truncated {name}" for name in truncated]
+        if len(kept) < len(items):
+            trimmed.append(f"dropped {len(items) - len(kept)} of {len(items)} items")
+        if trimmed:
+            logger.info(
+                "%s prompt%s trimmed from ~%d to ~%d tokens (budget %d): %s",
+                phase, f" for {label!r}" if label else "", before, after,
+                self.budgets[phase], ", ".join(trimmed)
+            )
+        if after > self.budgets[phase]:
+            logger.warning("%s prompt is ~%d tokens, over its %d budget", phase, after, self.budgets[phase])
+        return prompt, kept
@@ -0,0 +1,87 @@
+import hashlib
+from typing import Optional
+
+import redis.asyncio as redis
+
+from app.config import settings
+from app.redis_client import get_redis
+from app.utils import normalize_text
+
+KEY_PREFIX = "veritas:query:"
+
+# KEYS: query key | ARGV: expected owner, new value, ttl
+# ttl == 0 deletes the key instead
+CAS_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+if tonumber(ARGV[3]) > 0 then
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+else
+    redis.call('DEL', KEYS[1])
+end
+return 1
+"""
+
+
+class QueryCoalescer:
+    """
+    Single-flight registry mapping a normalized query to the timeline generating it.
+    Lives in Redis so duplicate creates are coalesced across all API workers.
+    """
+
+    def __init__(self, client: Optional[redis.Redis] = None):
+        self._client = client
+
+    @property
+    def client(self) -> redis.Redis:
+        return self._client or get_redis()
+
+    @staticmethod
+    def make_key(query: str) -> str:
+        return KEY_PREFIX + hashlib.sha256(normalize_text(query).encode()).hexdigest()
+
+    async def claim(self, query: str, timeline_id: str) -> Optional[str]:
+        """
+        Register timeline_id as the owner of this query.
+        Returns None if the claim succeeded, otherwise the id of the current owner.
+        """
+        key = self.make_key(query)
+        claimed = await self.client.set(
+            key, timeline_id, nx=True, ex=settings.coalesce_inflight_ttl
+        )
+        if claimed:
+            return None
+        return await self.client.get(key)
+
+    async def claim_age(self, query: str) -> Optional[float]:
+        """Seconds since the in-flight claim on this query was made (None if there is none)"""
+        ttl = await self.client.ttl(self.make_key(query))
+        if ttl < 0:
+            return None
+        return settings.coalesce_inflight_ttl - ttl
+
+    async def take_over(self, query: str, previous_id: str, timeline_id: str) -> bool:
+        """Replace a dead owner (e.g. a failed timeline) with timeline_id"""
+        return await self._compare_and_set(
+            query, previous_id, timeline_id, settings.coalesce_inflight_ttl
+        )
+
+    async def complete(self, query: str, timeline_id: str):
+        """Keep aliasing to a completed timeline for the configured reuse window"""
+        await self._compare_and_set(
+            query, timeline_id, timeline_id, settings.coalesce_completed_window
+        )
+
+    async def release(self, query: str, timeline_id: str):
+        """Drop ownership so the next create starts fresh work"""
+        await self._compare_and_set(query, timeline_id, timeline_id, 0)
+
+    async def _compare_and_set(self, query: str, expected: str, value: str, ttl: int) -> bool:
+        updated = await self.client.eval(
+            CAS_SCRIPT, 1, self.make_key(query), expected, value, ttl
+        )
+        return bool(updated)
+
+
+query_coalescer = QueryCoalescer()
@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+
+from app.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "veritas:ratelimit:"
+
+# KEYS: bucket | ARGV: capacity, refill per second, amount, force
+# Takes `amount` if the bucket holds it (always with force, going into debt
+# if need be) and returns "0", else takes nothing and returns the seconds until
+# it will. Refill runs on the Redis clock, so processes' clocks don't matter.
+TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local amount = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens'))
+local updated_at = tonumber(redis.call('HGET', KEYS[1], 'updated_at'))
+if tokens == nil then
+    tokens, updated_at = capacity, now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+local wait = 0
+if tokens >= amount or ARGV[4] == '1' then
+    tokens = math.min(capacity, tokens - amount)
+else
+    wait = (amount - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+return tostring(wait)
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)"""
+    return len(text) // 4 + 1
+
+
+class TokenBucket:
+    """
+    Async token bucket. Callers that can't be served yet wait in FIFO order
+    instead of failing, so throughput stays pinned at the configured rate.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity,
+            self._tokens + (now - self._updated_at) * self.refill_per_second
+        )
+        self._updated_at = now
+
+    async def acquire(self, amount: float = 1.0):
+        # A request larger than the bucket would otherwise wait forever
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((amount - self._tokens) / self.refill_per_second)
+
+    async def adjust(self, delta: float):
+        """Correct an earlier estimate once the real cost is known (may go into debt)"""
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens - delta)
+
+
+class RedisTokenBucket:
+    """
+    Token bucket kept in Redis, so every API and worker process draws from
+    the same quota. Callers in one process still queue FIFO behind a local
+    lock. If Redis is unreachable, `fallback` (a per-process share of the
+    quota) is used until it is back.
+    """
+
+    def __init__(
+        self, key: str, capacity: float, refill_per_second: float, fallback: TokenBucket,
+        client: Optional[redis.Redis] = None
+    ):
+        self.key = KEY_PREFIX + key
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.fallback = fallback
+        self._client = client
+        self._lock = asyncio.Lock()
+
+    @property
+    def client(self) -> redis.Redis:
+        return self._client or get_redis()
+
+    async def _take(self, amount: float, force: bool) -> float:
+        wait = await self.client.eval(
+            TAKE_SCRIPT, 1, self.key, self.capacity, self.refill_per_second, amount, int(force)
+        )
+        return float(wait)
+
+    async def acquire(self, amount: float = 1.0):
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                try:
+                    wait = await self._take(amount, force=False)
+                except RedisError as e:
+                    logger.warning("Shared rate limit unavailable, using the local share: %s", e)
+                    await self.fallback.acquire(amount)
+                    return
+                if wait <= 0:
+                    return
+                await asyncio.sleep(wait)
+
+    async def adjust(self, delta: float):
+        """Correct an earlier estimate once the real cost is known (may go into debt)"""
+        try:
+            await self._take(delta, force=True)
+        except RedisError:
+            await self.fallback.adjust(delta)
+
+
+class ModelRateLimiter:
+    """
+    Per-model request/min and token/min buckets. With `shared` the buckets
+    live in Redis and hold the whole quota for all processes together;
+    otherwise (and as the fallback while Redis is down) each process gets
+    1/`processes` of it.
+    """
+
+    def __init__(self, limits: Dict[str, Dict[str, int]], shared: bool = False, processes: int = 1):
+        def bucket(model: str, kind: str, per_minute: int):
+            local = TokenBucket(per_minute / processes, per_minute / processes / 60)
+            if not shared:
+                return local
+            return RedisTokenBucket(f"{model}:{kind}", per_minute, per_minute / 60, fallback=local)
+
+        self._requests = {model: bucket(model, "rpm", limit["rpm"]) for model, limit in limits.items()}
+        self._tokens = {model: bucket(model, "tpm", limit["tpm"]) for model, limit in limits.items()}
+
+    async def acquire(self, model: str, tokens: int):
+        if model not in self._requests:
+            return
+        await self._requests[model].acquire(1)
+        await self._tokens[model].acquire(tokens)
+
+    async def settle(self, model: str, estimated_tokens: int, actual_tokens: int):
+        if model in self._tokens:
+            await self._tokens[model].adjust(actual_tokens - estimated_tokens)
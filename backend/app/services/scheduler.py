@@ -0,0 +1,96 @@
+import asyncio
+import itertools
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Dict, List
+
+from app.config import settings
+from app.telemetry import INVESTIGATION_WAIT
+
+# Lower runs first; unknown priorities rank with "medium"
+PRIORITY_RANK = {"critical": 0, "high": 1, "medium": 2, "low": 3}
+
+
+@dataclass
+class _Waiter:
+    rank: int
+    seq: int
+    timeline_id: str
+    future: asyncio.Future
+
+
+class InvestigationScheduler:
+    """
+    Process-wide slots for event investigation chains, shared by every timeline
+    a worker is generating. Waiting chains are granted a slot by event priority,
+    then arrival, so critical events of one timeline overtake low-priority ones
+    of another. A timeline holds at most `per_timeline` slots at once, so one
+    huge timeline can't starve the rest.
+    """
+
+    def __init__(self, slots: int, per_timeline: int):
+        self.slots = slots
+        self.per_timeline = per_timeline
+        self._free = slots
+        self._running: Dict[str, int] = defaultdict(int)
+        self._waiting: List[_Waiter] = []
+        self._seq = itertools.count()
+
+    @asynccontextmanager
+    async def slot(self, timeline_id: str, priority: str):
+        """Hold a slot for the block; waits for one if needed"""
+        if priority not in PRIORITY_RANK:
+            priority = "medium"
+        start = time.perf_counter()
+        await self._acquire(timeline_id, PRIORITY_RANK[priority])
+        INVESTIGATION_WAIT.labels(priority).observe(time.perf_counter() - start)
+        try:
+            yield
+        finally:
+            self._release(timeline_id)
+
+    async def _acquire(self, timeline_id: str, rank: int):
+        waiter = _Waiter(rank, next(self._seq), timeline_id, asyncio.get_running_loop().create_future())
+        self._waiting.append(waiter)
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.cancelled():
+                if waiter in self._waiting:
+                    self._waiting.remove(waiter)
+            else:
+                # Granted just as we were cancelled: hand the slot on
+                self._release(timeline_id)
+            raise
+
+    def _release(self, timeline_id: str):
+        self._free += 1
+        self._running[timeline_id] -= 1
+        if not self._running[timeline_id]:
+            del self._running[timeline_id]
+        self._dispatch()
+
+    def _dispatch(self):
+        # Cancelled waiters may not have removed themselves yet
+        self._waiting = [waiter for waiter in self._waiting if not waiter.future.done()]
+        # Waiting lists stay small (events of the active timelines), so a scan is fine
+        while self._free:
+            eligible = [
+                waiter for waiter in self._waiting
+                if self._running.get(waiter.timeline_id, 0) < self.per_timeline
+            ]
+            if not eligible:
+                return
+            waiter = min(eligible, key=lambda w: (w.rank, w.seq))
+            self._waiting.remove(waiter)
+            self._free -= 1
+            self._running[waiter.timeline_id] += 1
+            waiter.future.set_result(None)
+
+
+investigation_scheduler = InvestigationScheduler(
+    settings.investigation_slots, settings.investigation_concurrency
+)
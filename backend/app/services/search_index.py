@@ -0,0 +1,171 @@
+"""
+Full-text search over timelines (topic and query), events (title and
+description), branches (narrative) and sources (claims).
+
+Every searchable row has a document in `search_documents`, written in the
+same transaction as the row itself. PostgreSQL indexes the documents with a
+stored tsvector under a GIN index and ranks with ts_rank_cd; SQLite uses an
+FTS5 table kept in sync by triggers and ranks with BM25.
+"""
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, select, text
+
+from app.database import dialect_insert
+from app.models import SearchDocument, Timeline, Event, Branch, Source
+from app.utils import STOPWORDS, normalize_text
+
+# Matches of failed and cancelled timelines are left out
+SEARCH_SQL = {
+    "postgresql": """
+        SELECT d.kind, d.ref_id AS id, d.timeline_id, d.event_id, t.topic,
+               ts_rank_cd(d.document, q) AS rank,
+               ts_headline('english', d.content, q, 'MinWords=8, MaxWords=24') AS snippet
+        FROM search_documents d
+        JOIN timelines t ON t.id = d.timeline_id,
+             websearch_to_tsquery('english', :query) q
+        WHERE d.document @@ q AND t.status NOT IN ('failed', 'cancelled') {kind_filter}
+        ORDER BY rank DESC, d.id
+        LIMIT :limit OFFSET :offset
+    """,
+    "sqlite": """
+        SELECT d.kind, d.ref_id AS id, d.timeline_id, d.event_id, t.topic,
+               -bm25(search_fts) AS rank,
+               snippet(search_fts, 0, '', '', '...', 24) AS snippet
+        FROM search_fts
+        JOIN search_documents d ON d.id = search_fts.rowid
+        JOIN timelines t ON t.id = d.timeline_id
+        WHERE search_fts MATCH :query AND t.status NOT IN ('failed', 'cancelled') {kind_filter}
+        ORDER BY rank DESC, d.id
+        LIMIT :limit OFFSET :offset
+    """,
+}
+
+
+def fts5_query(query: str) -> Optional[str]:
+    """FTS5 MATCH expression: all of the query's significant terms"""
+    terms = [
+        term for term in dict.fromkeys(normalize_text(query).split())
+        if term not in STOPWORDS
+    ]
+    if not terms:
+        return None
+    return " ".join(f'"{term}"' for term in terms)
+
+
+def _document(kind: str, ref_id: str, timeline_id: str, event_id: Optional[str], *parts) -> Optional[Dict]:
+    content = "\n".join(part for part in parts if part)
+    if not content:
+        return None
+    return {"kind": kind, "ref_id": ref_id, "timeline_id": timeline_id, "event_id": event_id, "content": content}
+
+
+def timeline_document(timeline_id: str, topic: str, query: str) -> Optional[Dict]:
+    return _document("timeline", timeline_id, timeline_id, None, topic, query if query != topic else None)
+
+
+def event_documents(event_rows: Iterable[Dict]) -> List[Dict]:
+    return [
+        _document("event", row["id"], row["timeline_id"], row["id"], row["title"], row.get("description"))
+        for row in event_rows
+    ]
+
+
+def result_documents(results: Iterable[Dict]) -> List[Dict]:
+    """Documents of the branches and sources of build_event_result() results"""
+    documents = []
+    for result in results:
+        event_id, timeline_id = result["event"]["id"], result["event"]["timeline_id"]
+        documents += [
+            _document("branch", row["id"], timeline_id, event_id, row["narrative"])
+            for row in result["branches"]
+        ]
+        documents += [
+            _document("source", row["id"], timeline_id, event_id, *(row.get("claims") or []))
+            for row in result["sources"]
+        ]
+    return documents
+
+
+async def index_documents(db, documents: Iterable[Optional[Dict]]):
+    """Insert or replace documents (None entries, i.e. rows without text, are skipped)"""
+    documents = [document for document in documents if document]
+    if not documents:
+        return
+    statement = dialect_insert(db, SearchDocument).values(documents)
+    await db.execute(statement.on_conflict_do_update(
+        index_elements=[SearchDocument.kind, SearchDocument.ref_id],
+        set_={"content": statement.excluded.content, "event_id": statement.excluded.event_id}
+    ))
+
+
+async def unindex_timeline_events(db, timeline_id: str):
+    """Drop the documents of a timeline's events, branches and sources (not the timeline's own)"""
+    await db.execute(delete(SearchDocument).where(
+        SearchDocument.timeline_id == timeline_id, SearchDocument.kind != "timeline"
+    ))
+
+
+async def unindex_event_details(db, event_ids: List[str]):
+    """Drop the branch and source documents of events whose details are being replaced"""
+    await db.execute(delete(SearchDocument).where(
+        SearchDocument.event_id.in_(event_ids), SearchDocument.kind.in_(("branch", "source"))
+    ))
+
+
+async def search(
+    db, query: str, kind: Optional[str] = None, limit: int = 20, offset: int = 0
+) -> List[Dict]:
+    """
+    Ranked matches of `query`, best first, in one statement. `rank` is higher
+    for better matches but is only comparable within one backend.
+    """
+    dialect = db.bind.dialect.name
+    if dialect == "sqlite":
+        query = fts5_query(query)
+        if query is None:
+            return []
+    params = {"query": query, "limit": limit, "offset": offset}
+    kind_filter = ""
+    if kind:
+        kind_filter = "AND d.kind = :kind"
+        params["kind"] = kind
+    result = await db.execute(text(SEARCH_SQL[dialect].format(kind_filter=kind_filter)), params)
+    return [dict(row) for row in result.mappings()]
+
+
+async def reindex_timeline(db, timeline_id: str) -> int:
+    """
+    Rebuild all documents of a stored timeline, e.g. one written before it was
+    indexed. Returns the number of documents.
+    """
+    timeline = (await db.execute(
+        select(Timeline.id, Timeline.topic, Timeline.query).where(Timeline.id == timeline_id)
+    )).one_or_none()
+    if timeline is None:
+        return 0
+    event_ids = select(Event.id).where(Event.timeline_id == timeline_id)
+    events = (await db.execute(
+        select(Event.id, Event.timeline_id, Event.title, Event.description).where(Event.timeline_id == timeline_id)
+    )).mappings().all()
+    branches = (await db.execute(
+        select(Branch.id, Branch.event_id, Branch.narrative).where(Branch.event_id.in_(event_ids))
+    )).mappings().all()
+    sources = (await db.execute(
+        select(Source.id, Source.event_id, Source.claims).where(Source.event_id.in_(event_ids))
+    )).mappings().all()
+
+    results = {event["id"]: {"event": event, "branches": [], "sources": []} for event in events}
+    for branch in branches:
+        results[branch["event_id"]]["branches"].append(branch)
+    for source in sources:
+        results[source["event_id"]]["sources"].append(source)
+
+    documents = [
+        timeline_document(timeline.id, timeline.topic, timeline.query),
+        *event_documents(events),
+        *result_documents(results.values()),
+    ]
+    await unindex_timeline_events(db, timeline_id)
+    await index_documents(db, documents)
+    return sum(1 for document in documents if document)
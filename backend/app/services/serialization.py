@@ -0,0 +1,165 @@
+import gzip
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import orjson
+from fastapi import Request, Response
+from sqlalchemy import func, select
+
+from app.config import settings
+from app.models import Timeline, Event, Branch, Source, Outlet
+from app.schemas import BranchResponse, EventSummaryResponse, SourceResponse, TimelineSummaryResponse
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+# Columns in response field order, so the assembled dicts encode exactly like the schemas
+TIMELINE_FIELDS = tuple(TimelineSummaryResponse.model_fields)
+EVENT_FIELDS = tuple(field for field in EventSummaryResponse.model_fields if field != "branches")
+BRANCH_FIELDS = tuple(BranchResponse.model_fields)
+SOURCE_FIELDS = tuple(SourceResponse.model_fields)
+
+
+def _columns(model, fields):
+    return [model.__table__.c[field] for field in fields]
+
+
+def _source_columns():
+    """Source columns, with the name and credibility of the source's outlet where it has one"""
+    resolved = {
+        "outlet": func.coalesce(Outlet.name, Source.outlet).label("outlet"),
+        "credibility_score": func.coalesce(Outlet.credibility_score, Source.credibility_score)
+        .label("credibility_score"),
+    }
+    return [resolved.get(field, Source.__table__.c.get(field)) for field in SOURCE_FIELDS]
+
+
+def _row_dict(row, fields) -> Dict:
+    data = {field: row[field] for field in fields}
+    # Validated responses coerce to float; integral values would otherwise encode as ints
+    if "credibility_score" in data:
+        data["credibility_score"] = float(data["credibility_score"])
+    return data
+
+
+def encode_json(data) -> bytes:
+    """Compact JSON matching Pydantic's model_dump_json output (UTC as `Z`)"""
+    return orjson.dumps(data, option=orjson.OPT_UTC_Z)
+
+
+async def fetch_event_dicts(db, query, projection: str) -> List[Tuple[int, Dict]]:
+    """
+    Run an Event query (its filter, order and limit) and assemble response dicts:
+    with branches for the "events" projection, plus sources for "full".
+    One query per table, like selectinload, without building ORM objects.
+    Returns (order, event) pairs in query order.
+    """
+    rows = (await db.execute(
+        query.with_only_columns(Event.order, *_columns(Event, EVENT_FIELDS))
+    )).mappings().all()
+    if not rows:
+        return []
+    events = {row["id"]: {**_row_dict(row, EVENT_FIELDS), "branches": []} for row in rows}
+
+    branch_rows = await db.execute(
+        select(Branch.event_id, *_columns(Branch, BRANCH_FIELDS)).where(Branch.event_id.in_(events))
+    )
+    for row in branch_rows.mappings():
+        events[row["event_id"]]["branches"].append(_row_dict(row, BRANCH_FIELDS))
+
+    if projection == "full":
+        for event in events.values():
+            event["sources"] = []
+        source_rows = await db.execute(
+            select(Source.event_id, *_source_columns())
+            .outerjoin(Outlet, Outlet.id == Source.outlet_id)
+            .where(Source.event_id.in_(events))
+        )
+        for row in source_rows.mappings():
+            events[row["event_id"]]["sources"].append(_row_dict(row, SOURCE_FIELDS))
+
+    return [(row["order"], events[row["id"]]) for row in rows]
+
+
+async def fetch_timeline_dict(db, timeline_id: str, projection: str = "full") -> Optional[Dict]:
+    """Response-shaped dict of a timeline under a projection; None if it doesn't exist"""
+    row = (await db.execute(
+        select(*_columns(Timeline, TIMELINE_FIELDS)).where(Timeline.id == timeline_id)
+    )).mappings().one_or_none()
+    if row is None:
+        return None
+
+    timeline = _row_dict(row, TIMELINE_FIELDS)
+    if projection != "summary":
+        events = await fetch_event_dicts(
+            db, select(Event).where(Event.timeline_id == timeline_id).order_by(Event.order), projection
+        )
+        timeline["events"] = [event for _, event in events]
+    return timeline
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick br (if available) or gzip from an Accept-Encoding header"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    for coding in (("br", "gzip") if brotli else ("gzip",)):
+        if accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.brotli_quality)
+    return gzip.compress(body, compresslevel=settings.gzip_level, mtime=0)
+
+
+# Compressed snapshot bodies by (etag, encoding); snapshots are immutable per ETag
+_compressed: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+
+
+def json_response(
+    request: Request, body: bytes, headers: Optional[Dict] = None, etag: Optional[str] = None
+) -> Response:
+    """
+    JSON response compressed for the client when worthwhile.
+    With an `etag`, compressed bodies are cached per representation and the
+    ETag header gets an encoding suffix, as different bytes need a different tag.
+    """
+    headers = dict(headers or {})
+    headers["Vary"] = "Accept-Encoding"
+    encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+    if encoding and len(body) >= settings.compression_min_size:
+        if etag:
+            key = (etag, encoding)
+            compressed = _compressed.get(key)
+            if compressed is None:
+                compressed = compress_body(body, encoding)
+                _compressed[key] = compressed
+                while len(_compressed) > settings.compressed_cache_entries:
+                    _compressed.popitem(last=False)
+            else:
+                _compressed.move_to_end(key)
+            headers["ETag"] = representation_etag(etag, encoding)
+        else:
+            compressed = compress_body(body, encoding)
+        body = compressed
+        headers["Content-Encoding"] = encoding
+    elif etag:
+        headers["ETag"] = etag
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def representation_etag(etag: str, encoding: Optional[str]) -> str:
+    return f'{etag[:-1]}-{encoding}"' if encoding else etag
@@ -0,0 +1,638 @@
+from sqlalchemy import select, delete, insert, update
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import asyncio
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models import Timeline, Event, Source, Branch
+from app.models.timeline import generate_uuid
+from app.utils import normalize_url, parse_datetime_naive
+from app.schemas import EventResponse, BranchResponse, SourceResponse
+from app.services.event_knowledge import (
+    date_bucket,
+    event_fingerprint,
+    find_known_events,
+    knowledge_row,
+    store_knowledge,
+    title_similarity,
+)
+from app.services.gemini_service import GeminiService
+from app.services.news_index import news_index
+from app.services.outlet_registry import outlet_registry
+from app.services.progress_broker import progress_broker
+from app.services.query_coalescer import query_coalescer
+from app.services.scheduler import investigation_scheduler
+from app.services.search_index import (
+    event_documents,
+    index_documents,
+    result_documents,
+    timeline_document,
+    unindex_event_details,
+    unindex_timeline_events,
+)
+from app.services.timeline_snapshots import invalidate_snapshot, materialize_snapshot
+from app.telemetry import track_phase
+
+gemini_service = GeminiService()
+
+
+async def retrieve_articles(title: str, event_date: datetime) -> List[Dict]:
+    """
+    Top-k corpus articles for an event, published within the retrieval window
+    and relevant enough to ground on; empty means an ungrounded investigation
+    """
+    if not news_index.exists():
+        return []
+    window = timedelta(days=settings.news_retrieval_window_days)
+    return await asyncio.to_thread(
+        news_index.search,
+        title,
+        event_date - window,
+        event_date + window,
+        settings.news_retrieval_top_k,
+        settings.news_retrieval_min_coverage
+    )
+
+
+def build_source_row(event_id: str, source_data: Dict) -> Dict:
+    """Insert-ready source row with its id assigned up front"""
+    return {
+        "id": generate_uuid(),
+        "event_id": event_id,
+        "url": source_data.get("url", ""),
+        "outlet": source_data.get("outlet", "Unknown"),
+        "credibility_score": source_data.get("credibility_score", 0.5),
+        "publish_date": parse_datetime_naive(
+            source_data["publish_date"]
+        ) if source_data.get("publish_date") else None,
+        "claims": source_data.get("claims", [])
+    }
+
+
+def build_event_result(
+    event_row: Dict, source_rows: List[Dict], branches_data: List[Dict], knowledge: Optional[Dict] = None,
+    reused: bool = False
+) -> Dict:
+    """
+    Bundle one event's insert-ready rows, assigning branch ids up front.
+    `knowledge` is the event_knowledge row to store for a fresh investigation;
+    `reused` marks rows copied from an earlier one, whose scores were already counted.
+    """
+    branch_rows = [
+        {
+            "id": generate_uuid(),
+            "event_id": event_row["id"],
+            "narrative": branch_data.get("narrative", ""),
+            "credibility_score": branch_data.get("credibility_score", 0.5),
+            "evidence": branch_data.get("evidence", ""),
+            "source_count": branch_data.get("source_count", 0)
+        }
+        for branch_data in branches_data
+    ]
+    return {
+        "event": event_row, "sources": source_rows, "branches": branch_rows, "knowledge": knowledge,
+        "reused": reused
+    }
+
+
+async def write_event_results(db, results: List[Dict]):
+    """
+    Insert the sources and branches of several events with one multi-row insert
+    per table, index their text for search, and record the fresh investigations
+    in the knowledge store. Sources are resolved to their outlets first (only
+    fresh investigations' scores count towards the outlets' credibility); once
+    written, the rows take their outlet's name and credibility, as reads serve them.
+    """
+    source_rows = [row for result in results for row in result["sources"]]
+    fold = [not result.get("reused") for result in results for _ in result["sources"]]
+    branch_rows = [row for result in results for row in result["branches"]]
+    if source_rows:
+        profiles = await outlet_registry.resolve_sources(db, source_rows, fold)
+        await db.execute(insert(Source), source_rows)
+        for row in source_rows:
+            profile = profiles.get(row["outlet_id"])
+            if profile:
+                row["outlet"], row["credibility_score"] = profile.name, profile.credibility_score
+    if branch_rows:
+        await db.execute(insert(Branch), branch_rows)
+    await index_documents(db, result_documents(results))
+    await store_knowledge(db, [result["knowledge"] for result in results if result.get("knowledge")])
+
+
+def serialize_event(event_result: Dict) -> Dict:
+    """JSON-ready EventResponse built from the rows that were just written"""
+    return EventResponse(
+        **event_result["event"],
+        branches=[BranchResponse.model_validate(row) for row in event_result["branches"]],
+        sources=[SourceResponse.model_validate(row) for row in event_result["sources"]]
+    ).model_dump(mode="json")
+
+
+async def clear_timeline_events(db, timeline_id: str):
+    """Delete all events (and their sources/branches) belonging to a timeline, and their search documents"""
+    await unindex_timeline_events(db, timeline_id)
+    event_ids = select(Event.id).where(Event.timeline_id == timeline_id)
+    await db.execute(delete(Source).where(Source.event_id.in_(event_ids)))
+    await db.execute(delete(Branch).where(Branch.event_id.in_(event_ids)))
+    await db.execute(delete(Event).where(Event.timeline_id == timeline_id))
+
+
+class TimelineCancelled(Exception):
+    """A timeline stopped "processing" under its job, i.e. it was cancelled through the API"""
+
+
+def was_cancelled(error: BaseException) -> bool:
+    """True for TimelineCancelled, also when raised inside a TaskGroup"""
+    if isinstance(error, BaseExceptionGroup):
+        return error.subgroup(TimelineCancelled) is not None
+    return isinstance(error, TimelineCancelled)
+
+
+async def set_timeline_fields(db, timeline_id: str, **values):
+    """
+    Single UPDATE of a timeline that is being generated (status "processing").
+    Raises LookupError if it doesn't exist, and TimelineCancelled if it was
+    cancelled meanwhile.
+    """
+    result = await db.execute(
+        update(Timeline)
+        .where(Timeline.id == timeline_id, Timeline.status == "processing")
+        .values(**values)
+    )
+    if result.rowcount == 0:
+        if await db.scalar(select(Timeline.id).where(Timeline.id == timeline_id)) is None:
+            raise LookupError(f"Timeline {timeline_id} not found")
+        raise TimelineCancelled(f"Timeline {timeline_id} is no longer processing")
+
+
+async def publish_source(timeline_id: str, source_row: Dict):
+    await progress_broker.publish(timeline_id, {
+        "type": "source",
+        "event_id": source_row["event_id"],
+        "source": SourceResponse.model_validate(source_row).model_dump(mode="json")
+    })
+
+
+async def investigate_event(timeline_id: str, event_row: Dict, event_date: str, topic: str):
+    """
+    Phase 2 for one event, grounded in corpus articles. Each source is streamed
+    to viewers as soon as the model has produced it.
+    Returns the sources as returned by the model and their insert-ready rows.
+    """
+    with track_phase("investigate"):
+        # Ground the investigation in real articles from the local corpus
+        articles = await retrieve_articles(event_row["title"], event_row["event_date"])
+
+        # Investigate event with Flash subagent
+        sources_data = []
+        source_rows = []
+        async for source_data in gemini_service.investigate_event_stream(
+            event_row["title"],
+            event_date,
+            topic,
+            articles
+        ):
+            source_row = build_source_row(event_row["id"], source_data)
+            sources_data.append(source_data)
+            source_rows.append(source_row)
+            await publish_source(timeline_id, source_row)
+    return sources_data, source_rows
+
+
+def fresh_knowledge(event_row: Dict, sources_data: List[Dict], branches_data: List[Dict]) -> Optional[Dict]:
+    """Knowledge row for a fresh investigation; only ones that found sources are worth sharing"""
+    if not sources_data:
+        return None
+    return knowledge_row(event_row["title"], event_row["event_date"], sources_data, branches_data)
+
+
+async def reuse_known_event(timeline_id: str, event_row: Dict, known_event: tuple) -> Dict:
+    """Event result built from another timeline's investigation, without calling the model"""
+    sources_data, branches_data = known_event
+    source_rows = [build_source_row(event_row["id"], source_data) for source_data in sources_data]
+    for source_row in source_rows:
+        await publish_source(timeline_id, source_row)
+    return build_event_result(event_row, source_rows, branches_data, reused=True)
+
+
+async def process_timeline(timeline_id: str, query: str):
+    """
+    Worker job that generates a timeline.
+    Every write opens its own short-lived session, so a database connection is
+    only checked out while writing, never while waiting on Gemini.
+    Safe to re-run: events left behind by an interrupted attempt are cleared first.
+    """
+    progress = "0/0"
+    try:
+        # Update status to processing
+        async with AsyncSessionLocal() as db:
+            await set_timeline_fields(db, timeline_id, status="processing")
+            await invalidate_snapshot(db, timeline_id)
+            await clear_timeline_events(db, timeline_id)
+            await db.commit()
+
+        # Phase 1: Discover skeleton
+        with track_phase("skeleton"):
+            skeleton = await gemini_service.discover_timeline_skeleton(query)
+
+        # Update timeline with basic info
+        topic = skeleton.get("topic", query)
+        timeline_values = {"topic": topic}
+        if skeleton.get("date_range"):
+            try:
+                timeline_values["date_range_start"] = parse_datetime_naive(
+                    skeleton["date_range"]["start"]
+                )
+                timeline_values["date_range_end"] = parse_datetime_naive(
+                    skeleton["date_range"]["end"]
+                )
+            except (ValueError, KeyError):
+                pass
+
+        anchor_events = skeleton.get("anchor_events", [])
+        progress = f"0/{len(anchor_events)}"
+
+        # Assign ids up front and insert every event in one statement,
+        # so `order` follows the skeleton
+        event_rows = [
+            {
+                "id": generate_uuid(),
+                "timeline_id": timeline_id,
+                "title": event_data.get("title", "Untitled Event"),
+                "description": None,
+                "event_date": parse_datetime_naive(event_data["date"]),
+                "priority": event_data.get("priority", "medium"),
+                "order": idx
+            }
+            for idx, event_data in enumerate(anchor_events)
+        ]
+        async with AsyncSessionLocal() as db:
+            await set_timeline_fields(db, timeline_id, progress=progress, **timeline_values)
+            if event_rows:
+                await db.execute(insert(Event), event_rows)
+            await index_documents(db, [timeline_document(timeline_id, topic, query), *event_documents(event_rows)])
+            # Events another timeline investigated recently skip phases 2 and 3
+            known_events = [
+                (knowledge.sources, knowledge.branches) if knowledge else None
+                for knowledge in await find_known_events(
+                    db, [(row["title"], row["event_date"]) for row in event_rows]
+                )
+            ]
+            await db.commit()
+        await progress_broker.publish(timeline_id, {
+            "type": "progress",
+            "status": "processing",
+            "progress": progress,
+            "topic": topic
+        })
+
+        # Phase 2 + 3: investigate all events concurrently (in scheduler slots,
+        # by priority), chaining each event's branch synthesis as soon as its
+        # investigation lands
+        finished: asyncio.Queue = asyncio.Queue()
+
+        async def run_event_chain(event_row: Dict, event_data: Dict, known_event: Optional[tuple]):
+            if known_event:
+                await finished.put(await reuse_known_event(timeline_id, event_row, known_event))
+                return
+
+            async with investigation_scheduler.slot(timeline_id, event_row["priority"]):
+                sources_data, source_rows = await investigate_event(
+                    timeline_id, event_row, event_data["date"], topic
+                )
+
+                # Detect branches
+                with track_phase("synthesize"):
+                    branches_data = await gemini_service.synthesize_branches(
+                        event_row["title"],
+                        sources_data
+                    )
+
+            await finished.put(
+                build_event_result(
+                    event_row, source_rows, branches_data,
+                    fresh_knowledge(event_row, sources_data, branches_data)
+                )
+            )
+
+        async def persist_results():
+            # Single writer: group-commits every chain that finished while
+            # the previous batch was being written
+            nonlocal progress
+            completed = 0
+            while completed < len(event_rows):
+                batch = [await finished.get()]
+                while not finished.empty() and len(batch) < settings.persist_batch_size:
+                    batch.append(finished.get_nowait())
+
+                with track_phase("persist"):
+                    # Update progress in the same commit as the events' rows
+                    completed += len(batch)
+                    progress = f"{completed}/{len(event_rows)}"
+                    async with AsyncSessionLocal() as db:
+                        await write_event_results(db, batch)
+                        await set_timeline_fields(db, timeline_id, progress=progress)
+                        await db.commit()
+
+                # Push the persisted events to stream subscribers
+                for event_result in batch:
+                    await progress_broker.publish(timeline_id, {
+                        "type": "event",
+                        "status": "processing",
+                        "progress": progress,
+                        "event": serialize_event(event_result)
+                    })
+
+        async with asyncio.TaskGroup() as tg:
+            for event_row, event_data, known_event in zip(event_rows, anchor_events, known_events):
+                tg.create_task(run_event_chain(event_row, event_data, known_event))
+            tg.create_task(persist_results())
+
+        # Mark as completed and materialize the read-side response
+        async with AsyncSessionLocal() as db:
+            await set_timeline_fields(db, timeline_id, status="completed")
+            await materialize_snapshot(db, timeline_id)
+            await db.commit()
+        await progress_broker.publish(timeline_id, {
+            "type": "status",
+            "status": "completed",
+            "progress": progress
+        })
+
+    except Exception as e:
+        if was_cancelled(e):
+            # The API already set the status; stop like a cancelled task
+            raise asyncio.CancelledError() from e
+
+        # Mark as failed
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(Timeline)
+                .where(Timeline.id == timeline_id, Timeline.status == "processing")
+                .values(status="failed")
+            )
+            await db.commit()
+        await progress_broker.publish(timeline_id, {
+            "type": "status",
+            "status": "failed",
+            "progress": progress
+        })
+        await query_coalescer.release(query, timeline_id)
+        raise e
+
+    # Keep aliasing duplicate creates to this timeline for a while
+    await query_coalescer.complete(query, timeline_id)
+
+
+def diff_anchor_events(stored: List[Dict], proposed: List[Dict]) -> Tuple[List[Dict], List[Tuple[Dict, Dict]]]:
+    """
+    Split a refresh's proposed anchor events into new events and changes to
+    stored ones. A proposal is the stored event dated within
+    REFRESH_MATCH_WINDOW_DAYS of it whose title overlaps it most (at least
+    REFRESH_MATCH_THRESHOLD), the closer date breaking ties, and unchanged if
+    it has the same title terms on the same day. A similar title alone
+    ("development 5" next to "development 1") makes a new event.
+    Returns (new proposals, [(stored event, proposal)] for changed events).
+    """
+    new, changed, matched = [], [], set()
+    for event_data in proposed:
+        title = event_data.get("title", "Untitled Event")
+        event_date = parse_datetime_naive(event_data["date"])
+        best, best_key = None, None
+        for event in stored:
+            if event["id"] in matched:
+                continue
+            distance = abs((event_date.date() - event["event_date"].date()).days)
+            score = title_similarity(title, event["title"])
+            if distance > settings.refresh_match_window_days or score < settings.refresh_match_threshold:
+                continue
+            if best_key is None or (-score, distance) < best_key:
+                best, best_key = event, (-score, distance)
+
+        if best is None:
+            new.append(event_data)
+            continue
+        matched.add(best["id"])
+        if event_fingerprint(title) != event_fingerprint(best["title"]) or \
+                date_bucket(event_date) != date_bucket(best["event_date"]):
+            changed.append((best, event_data))
+    return new, changed
+
+
+async def reorder_events(db, timeline_id: str):
+    """Renumber a timeline's events chronologically (ties keep their order), updating only moved rows"""
+    rows = (await db.execute(
+        select(Event.id, Event.order).where(Event.timeline_id == timeline_id).order_by(Event.event_date, Event.order)
+    )).all()
+    moved = [{"id": row.id, "order": idx} for idx, row in enumerate(rows) if row.order != idx]
+    if moved:
+        await db.execute(update(Event), moved)
+
+
+async def refresh_timeline(timeline_id: str):
+    """
+    Worker job that brings a completed timeline up to date.
+    Asks for developments after its date range, diffs them against the stored
+    events by title and date, and investigates only new or changed events;
+    branches are re-synthesized only where an event's set of sources changed.
+    Everything is applied in one transaction that bumps the timeline's version,
+    so readers keep getting the previous version until then, and a failed
+    refresh leaves it untouched.
+    """
+    async with AsyncSessionLocal() as db:
+        timeline = (await db.execute(
+            select(
+                Timeline.query, Timeline.topic, Timeline.status, Timeline.progress,
+                Timeline.date_range_start, Timeline.date_range_end
+            )
+            .where(Timeline.id == timeline_id)
+        )).one_or_none()
+        if timeline is None:
+            raise LookupError(f"Timeline {timeline_id} not found")
+        stored = (await db.execute(
+            select(Event.id, Event.timeline_id, Event.title, Event.description, Event.event_date,
+                   Event.priority, Event.order)
+            .where(Event.timeline_id == timeline_id)
+            .order_by(Event.event_date.desc())
+        )).mappings().all()
+
+    progress = timeline.progress
+    topic = timeline.topic
+    try:
+        if timeline.status != "processing":
+            # Cancelled while queued; don't spend a model call finding out at the first write
+            raise TimelineCancelled(f"Timeline {timeline_id} is no longer processing")
+
+        # Phase 1, scoped to what happened since the timeline was last generated
+        since = timeline.date_range_end or max((event["event_date"] for event in stored), default=None)
+        with track_phase("skeleton"):
+            skeleton = await gemini_service.discover_new_developments(
+                timeline.query,
+                since.isoformat() if since else "the start of the story",
+                [{"title": event["title"], "date": event["event_date"].isoformat()} for event in stored]
+            )
+
+        new, changed = diff_anchor_events(stored, skeleton.get("anchor_events", []))
+        new_rows = [
+            {
+                "id": generate_uuid(),
+                "timeline_id": timeline_id,
+                "title": event_data.get("title", "Untitled Event"),
+                "description": None,
+                "event_date": parse_datetime_naive(event_data["date"]),
+                "priority": event_data.get("priority", "medium"),
+                "order": len(stored) + idx  # renumbered chronologically on apply
+            }
+            for idx, event_data in enumerate(new)
+        ]
+        changed_rows = [
+            {
+                **event,
+                "title": event_data.get("title", event["title"]),
+                "event_date": parse_datetime_naive(event_data["date"]),
+                "priority": event_data.get("priority", event["priority"]),
+            }
+            for event, event_data in changed
+        ]
+        pending = len(new_rows) + len(changed_rows)
+        if not pending:
+            # Nothing new: the current version stands
+            async with AsyncSessionLocal() as db:
+                await set_timeline_fields(db, timeline_id, status="completed")
+                await db.commit()
+            await progress_broker.publish(timeline_id, {
+                "type": "status",
+                "status": "completed",
+                "progress": progress
+            })
+            return
+        progress = f"0/{pending}"
+
+        async with AsyncSessionLocal() as db:
+            await set_timeline_fields(db, timeline_id, progress=progress)
+            known_events = [
+                (knowledge.sources, knowledge.branches) if knowledge else None
+                for knowledge in await find_known_events(
+                    db, [(row["title"], row["event_date"]) for row in new_rows]
+                )
+            ]
+            # Source sets of the changed events, to tell whether their branches still hold
+            stored_urls = {row["id"]: set() for row in changed_rows}
+            if stored_urls:
+                for event_id, url in (await db.execute(
+                    select(Source.event_id, Source.url).where(Source.event_id.in_(stored_urls))
+                )).all():
+                    stored_urls[event_id].add(normalize_url(url))
+            await db.commit()
+        await progress_broker.publish(timeline_id, {
+            "type": "progress",
+            "status": "processing",
+            "progress": progress,
+            "topic": topic
+        })
+
+        # Phase 2 + 3 for the new and changed events only
+        completed = 0
+
+        async def refresh_event(event_row: Dict, known_event: Optional[tuple]) -> Optional[Dict]:
+            nonlocal completed, progress
+            if known_event:
+                result = await reuse_known_event(timeline_id, event_row, known_event)
+            else:
+                async with investigation_scheduler.slot(timeline_id, event_row["priority"]):
+                    sources_data, source_rows = await investigate_event(
+                        timeline_id, event_row, event_row["event_date"].isoformat(), topic
+                    )
+                    if event_row["id"] in stored_urls and \
+                            {normalize_url(row["url"]) for row in source_rows} == stored_urls[event_row["id"]]:
+                        # Same sources: the stored sources and branches stay
+                        result = None
+                    else:
+                        with track_phase("synthesize"):
+                            branches_data = await gemini_service.synthesize_branches(
+                                event_row["title"],
+                                sources_data
+                            )
+                        result = build_event_result(
+                            event_row, source_rows, branches_data,
+                            fresh_knowledge(event_row, sources_data, branches_data)
+                        )
+
+            completed += 1
+            progress = f"{completed}/{pending}"
+            await progress_broker.publish(timeline_id, {
+                "type": "progress",
+                "status": "processing",
+                "progress": progress
+            })
+            return result
+
+        async with asyncio.TaskGroup() as tg:
+            tasks = [
+                tg.create_task(refresh_event(event_row, known_event))
+                for event_row, known_event in zip(new_rows, known_events)
+            ] + [tg.create_task(refresh_event(event_row, None)) for event_row in changed_rows]
+        results = [task.result() for task in tasks if task.result() is not None]
+
+        # Apply everything in one transaction and serve the new version from then on
+        event_dates = [row["event_date"] for row in new_rows + changed_rows]
+        timeline_values = {"status": "completed", "version": Timeline.version + 1}
+        if event_dates:
+            timeline_values["date_range_start"] = min(filter(None, [timeline.date_range_start, *event_dates]))
+            timeline_values["date_range_end"] = max(filter(None, [timeline.date_range_end, *event_dates]))
+        total = len(stored) + len(new_rows)
+        progress = f"{total}/{total}"
+
+        with track_phase("persist"):
+            async with AsyncSessionLocal() as db:
+                if new_rows:
+                    await db.execute(insert(Event), new_rows)
+                if changed_rows:
+                    await db.execute(update(Event), [
+                        {key: row[key] for key in ("id", "title", "event_date", "priority")}
+                        for row in changed_rows
+                    ])
+                await index_documents(db, event_documents(new_rows + changed_rows))
+                replaced = [result["event"]["id"] for result in results if result["event"]["id"] in stored_urls]
+                if replaced:
+                    await db.execute(delete(Source).where(Source.event_id.in_(replaced)))
+                    await db.execute(delete(Branch).where(Branch.event_id.in_(replaced)))
+                    await unindex_event_details(db, replaced)
+                await write_event_results(db, results)
+                await reorder_events(db, timeline_id)
+                await set_timeline_fields(db, timeline_id, progress=progress, **timeline_values)
+                await materialize_snapshot(db, timeline_id)
+                await db.commit()
+
+        for event_result in results:
+            await progress_broker.publish(timeline_id, {
+                "type": "event",
+                "status": "processing",
+                "progress": progress,
+                "event": serialize_event(event_result)
+            })
+        await progress_broker.publish(timeline_id, {
+            "type": "status",
+            "status": "completed",
+            "progress": progress
+        })
+
+    except Exception as e:
+        if was_cancelled(e):
+            raise asyncio.CancelledError() from e
+
+        # Nothing was applied: the previous version is still complete
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(Timeline)
+                .where(Timeline.id == timeline_id, Timeline.status == "processing")
+                .values(status="completed", progress=timeline.progress)
+            )
+            await db.commit()
+        await progress_broker.publish(timeline_id, {
+            "type": "status",
+            "status": "completed",
+            "progress": timeline.progress
+        })
+        raise e
@@ -0,0 +1,158 @@
+"""
+Revision log of timelines, for playback of how events, branches and sources changed.
+
+Each materialized version of a timeline is recorded as a revision. A revision
+holds either a full checkpoint of the timeline's state or a delta against the
+previous revision; a checkpoint is written every REVISION_CHECKPOINT_INTERVAL
+revisions, so reconstructing any revision reads at most that many rows.
+
+State is the served timeline flattened into rows keyed by id:
+    {"timeline": {...}, "events": {id: {...}}, "branches": {id: {...}}, "sources": {id: {...}}}
+A delta holds the changed timeline fields and, per table, "set" (new rows in
+full, changed rows with only their changed fields) and "del" (removed ids).
+"""
+import copy
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional
+
+import orjson
+from sqlalchemy import and_, func, insert, select
+
+from app.config import settings
+from app.models import TimelineRevision
+from app.services.serialization import encode_json
+
+TABLES = ("events", "branches", "sources")
+
+
+class LoadedRevision(NamedTuple):
+    row: TimelineRevision
+    state: Dict
+    checkpoint: int  # revision of the checkpoint it was rebuilt from
+
+
+def timeline_state(timeline: Dict) -> Dict:
+    """Flatten a full timeline dict (as served) into JSON-native rows keyed by id"""
+    timeline = orjson.loads(encode_json(timeline))
+    state = {"timeline": {}, "events": {}, "branches": {}, "sources": {}}
+    for order, event in enumerate(timeline.pop("events")):
+        for table in ("branches", "sources"):
+            for row in event.pop(table):
+                state[table][row["id"]] = {**row, "event_id": event["id"]}
+        state["events"][event["id"]] = {**event, "order": order}
+    state["timeline"] = timeline
+    return state
+
+
+def state_timeline(state: Dict) -> Dict:
+    """Inverse of timeline_state: the timeline dict in response shape"""
+    events = {
+        event_id: {**{k: v for k, v in event.items() if k != "order"}, "branches": [], "sources": []}
+        for event_id, event in sorted(state["events"].items(), key=lambda item: item[1]["order"])
+    }
+    for table in ("branches", "sources"):
+        for row in state[table].values():
+            events[row["event_id"]][table].append({k: v for k, v in row.items() if k != "event_id"})
+    return {**state["timeline"], "events": list(events.values())}
+
+
+def _diff_rows(old: Dict[str, Dict], new: Dict[str, Dict]) -> Dict:
+    changed = {}
+    for row_id, row in new.items():
+        before = old.get(row_id)
+        if before is None:
+            changed[row_id] = row
+        else:
+            fields = {key: value for key, value in row.items() if before.get(key) != value}
+            if fields:
+                changed[row_id] = fields
+    deleted = [row_id for row_id in old if row_id not in new]
+
+    delta = {}
+    if changed:
+        delta["set"] = changed
+    if deleted:
+        delta["del"] = deleted
+    return delta
+
+
+def diff_states(old: Dict, new: Dict) -> Dict:
+    """Delta that turns `old` into `new`; empty parts are left out"""
+    delta = {}
+    timeline = {key: value for key, value in new["timeline"].items() if old["timeline"].get(key) != value}
+    if timeline:
+        delta["timeline"] = timeline
+    for table in TABLES:
+        rows = _diff_rows(old[table], new[table])
+        if rows:
+            delta[table] = rows
+    return delta
+
+
+def apply_delta(state: Dict, delta: Dict) -> Dict:
+    """Apply a delta to a state in place and return it"""
+    state["timeline"].update(delta.get("timeline", {}))
+    for table in TABLES:
+        rows = delta.get(table, {})
+        for row_id in rows.get("del", []):
+            state[table].pop(row_id, None)
+        for row_id, fields in rows.get("set", {}).items():
+            state[table].setdefault(row_id, {}).update(fields)
+    return state
+
+
+async def load_revision(
+    db, timeline_id: str, revision: Optional[int] = None, at: Optional[datetime] = None
+) -> Optional[LoadedRevision]:
+    """
+    Reconstruct a timeline at `revision`, or at the latest revision recorded at
+    or before `at` (the latest one if neither is given). One query reads the
+    nearest checkpoint at or before it plus the deltas up to it.
+    Returns None if there is no such revision.
+    """
+    conditions = [TimelineRevision.timeline_id == timeline_id]
+    if revision is not None:
+        conditions.append(TimelineRevision.revision <= revision)
+    if at is not None:
+        conditions.append(TimelineRevision.created_at <= at)
+    target = select(func.max(TimelineRevision.revision)).where(*conditions).scalar_subquery()
+    checkpoint = select(func.max(TimelineRevision.revision)).where(
+        TimelineRevision.timeline_id == timeline_id,
+        TimelineRevision.checkpoint.is_(True),
+        TimelineRevision.revision <= target
+    ).scalar_subquery()
+
+    rows: List[TimelineRevision] = list((await db.execute(
+        select(TimelineRevision)
+        .where(
+            TimelineRevision.timeline_id == timeline_id,
+            and_(TimelineRevision.revision >= checkpoint, TimelineRevision.revision <= target)
+        )
+        .order_by(TimelineRevision.revision)
+    )).scalars())
+    if not rows or (revision is not None and rows[-1].revision != revision):
+        return None
+
+    # Deltas are applied to a copy, so the checkpoint row stays unmodified in the session
+    state = copy.deepcopy(rows[0].data)
+    for row in rows[1:]:
+        apply_delta(state, row.data)
+    return LoadedRevision(rows[-1], state, rows[0].revision)
+
+
+async def record_revision(db, timeline_id: str, revision: int, timeline: Dict):
+    """
+    Log a newly materialized timeline as `revision`: a delta against the
+    previous revision, or a checkpoint when there is none or the chain since
+    the last checkpoint is REVISION_CHECKPOINT_INTERVAL long.
+    """
+    state = timeline_state(timeline)
+    previous = await load_revision(db, timeline_id, revision - 1) if revision > 1 else None
+    if previous is None or revision - previous.checkpoint >= settings.revision_checkpoint_interval:
+        checkpoint, data = True, state
+    else:
+        checkpoint, data = False, diff_states(previous.state, state)
+
+    await db.execute(insert(TimelineRevision).values(
+        timeline_id=timeline_id, revision=revision, checkpoint=checkpoint, data=data
+    ))
@@ -0,0 +1,66 @@
+import hashlib
+import re
+from typing import Optional
+
+from sqlalchemy import select, update
+
+from app.models import TimelineSnapshot
+from app.services.serialization import encode_json, fetch_timeline_dict
+from app.services.timeline_revisions import record_revision
+
+# Suffix of an ETag given to a compressed representation (see serialization.json_response)
+ENCODING_SUFFIX = re.compile(r'-(?:br|gzip)"$')
+
+
+async def get_snapshot(db, timeline_id: str):
+    """Single primary-key lookup of a materialized response; None if not available"""
+    result = await db.execute(
+        select(TimelineSnapshot.etag, TimelineSnapshot.body)
+        .where(
+            TimelineSnapshot.timeline_id == timeline_id,
+            TimelineSnapshot.body.isnot(None)
+        )
+    )
+    return result.one_or_none()
+
+
+async def invalidate_snapshot(db, timeline_id: str):
+    """Drop the materialized body (keeping its version) before a timeline is rewritten"""
+    await db.execute(
+        update(TimelineSnapshot)
+        .where(TimelineSnapshot.timeline_id == timeline_id)
+        .values(body=None, etag=None)
+    )
+
+
+async def materialize_snapshot(db, timeline_id: str) -> TimelineSnapshot:
+    """
+    Serialize a completed timeline once and store it with a fresh version and
+    ETag, logging the version in the timeline's revision history
+    """
+    timeline = await fetch_timeline_dict(db, timeline_id, "full")
+    body = encode_json(timeline).decode()
+
+    snapshot = await db.get(TimelineSnapshot, timeline_id)
+    if snapshot is None:
+        snapshot = TimelineSnapshot(timeline_id=timeline_id, version=0)
+        db.add(snapshot)
+
+    snapshot.version += 1
+    snapshot.body = body
+    snapshot.etag = f'"{snapshot.version}-{hashlib.sha256(body.encode()).hexdigest()[:16]}"'
+    await record_revision(db, timeline_id, snapshot.version, timeline)
+    return snapshot
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Evaluate an If-None-Match header (weak comparison, lists and `*` allowed).
+    Tags of compressed representations ("...-gzip") match their snapshot's ETag.
+    """
+    if not if_none_match:
+        return False
+    candidates = [
+        ENCODING_SUFFIX.sub('"', tag.strip().removeprefix("W/")) for tag in if_none_match.split(",")
+    ]
+    return "*" in candidates or etag in candidates
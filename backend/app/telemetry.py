@@ -0,0 +1,160 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+import logging
+import re
+import time
+import uuid
+from typing import Callable, Dict, Optional
+
+from prometheus_client import REGISTRY, Counter, Histogram
+from prometheus_client.core import GaugeMetricFamily
+
+from app.config import settings
+
+# Trace id of the API request (or the job it enqueued) being handled in this task
+trace_id_var: ContextVar[Optional[str]] = ContextVar("trace_id", default=None)
+
+# Incoming trace ids we honour: hex or UUID. They become exemplar labels
+# (capped at 128 characters in total) and log fields, so nothing else gets in.
+TRACE_ID_PATTERN = re.compile(r"[0-9a-fA-F-]{1,64}")
+
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex
+
+
+def accept_trace_id(value: Optional[str]) -> str:
+    """`value` if it is a well-formed trace id, else a new one"""
+    if value and TRACE_ID_PATTERN.fullmatch(value):
+        return value
+    return new_trace_id()
+
+
+class TraceIdFilter(logging.Filter):
+    """Adds `trace_id` to log records so handlers can format it"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = trace_id_var.get() or "-"
+        return True
+
+
+def _exemplar() -> Optional[dict]:
+    trace_id = trace_id_var.get()
+    return {"trace_id": trace_id} if trace_id else None
+
+
+PHASE_DURATION = Histogram(
+    "veritas_phase_duration_seconds",
+    "Duration of a timeline pipeline phase (per event for investigate/synthesize, per batch for persist)",
+    ["phase"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300),
+)
+MODEL_CALL_DURATION = Histogram(
+    "veritas_model_call_duration_seconds",
+    "Latency of a single Gemini call, including streaming until the last chunk",
+    ["model", "phase", "outcome"],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 90),
+)
+MODEL_TOKENS = Counter(
+    "veritas_model_tokens_total",
+    "Tokens reported in Gemini usage metadata",
+    ["model", "phase", "kind"],
+)
+MODEL_COST = Counter(
+    "veritas_model_cost_usd_total",
+    "Estimated Gemini spend from usage metadata and the configured per-token prices",
+    ["model", "phase"],
+)
+CACHE_LOOKUPS = Counter(
+    "veritas_llm_cache_lookups_total",
+    "LLM response cache lookups by result",
+    ["phase", "result"],
+)
+EVENT_KNOWLEDGE_LOOKUPS = Counter(
+    "veritas_event_knowledge_lookups_total",
+    "Anchor events looked up in the cross-timeline knowledge store (hit = investigation reused)",
+    ["result"],
+)
+INVESTIGATION_WAIT = Histogram(
+    "veritas_investigation_wait_seconds",
+    "Time an event investigation chain waited for a scheduler slot, by event priority",
+    ["priority"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+DB_POOL_WAIT = Histogram(
+    "veritas_db_pool_wait_seconds",
+    "Time an API request waited to check a connection out of the pool",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "veritas_http_request_duration_seconds",
+    "API request latency until the response headers are sent",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_QUERIES = Histogram(
+    "veritas_http_request_queries",
+    "SQL statements executed per API request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 4, 6, 8, 12, 16, 25, 50),
+)
+
+
+class PoolCollector:
+    """Connection pool gauges, read from the registered pools at scrape time"""
+
+    def __init__(self):
+        self.pools: Dict[str, Callable[[], Dict[str, int]]] = {}
+
+    def add(self, name: str, stats: Callable[[], Dict[str, int]]):
+        self.pools[name] = stats
+
+    def collect(self):
+        gauge = GaugeMetricFamily(
+            "veritas_db_pool_connections",
+            "Database pool connections by state (size is the configured pool_size)",
+            labels=["pool", "state"],
+        )
+        for name, stats in self.pools.items():
+            for state, value in stats().items():
+                gauge.add_metric([name, state], value)
+        yield gauge
+
+
+pool_collector = PoolCollector()
+REGISTRY.register(pool_collector)
+
+# USD per million tokens: (prompt, output)
+MODEL_PRICES = {
+    "gemini-2.5-pro": (settings.gemini_pro_price_input, settings.gemini_pro_price_output),
+    "gemini-2.5-flash": (settings.gemini_flash_price_input, settings.gemini_flash_price_output),
+}
+
+
+@contextmanager
+def track_phase(phase: str):
+    """Observe the duration of the block as one `phase` sample"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        PHASE_DURATION.labels(phase).observe(time.perf_counter() - start, exemplar=_exemplar())
+
+
+def observe_model_call(model: str, phase: str, outcome: str, seconds: float):
+    MODEL_CALL_DURATION.labels(model, phase, outcome).observe(seconds, exemplar=_exemplar())
+
+
+def record_usage(model: str, phase: str, usage) -> None:
+    """Count tokens and estimated cost from a response's usage_metadata"""
+    if usage is None:
+        return
+    prompt_tokens = usage.prompt_token_count or 0
+    output_tokens = (usage.candidates_token_count or 0) + (getattr(usage, "thoughts_token_count", None) or 0)
+    MODEL_TOKENS.labels(model, phase, "prompt").inc(prompt_tokens)
+    MODEL_TOKENS.labels(model, phase, "output").inc(output_tokens)
+
+    input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    MODEL_COST.labels(model, phase).inc(
+        (prompt_tokens * input_price + output_tokens * output_price) / 1_000_000
+    )
@@ -0,0 +1,54 @@
+from datetime import datetime
+import re
+import unicodedata
+from urllib.parse import urlsplit, urlunsplit
+
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+# Dropped wherever normalized text is split into terms (event fingerprints,
+# claim clustering, corpus retrieval, search), so a title has the same terms everywhere
+STOPWORDS = frozenset(
+    "a after an and are as at be been before by for from had has have he her his in into is it its "
+    "of on or over said says she that the their there they this to was were which who will with".split()
+)
+
+
+def normalize_text(text: str) -> str:
+    """
+    Canonical form used for cache and dedup keys: Unicode-normalized,
+    case-folded, punctuation collapsed to single spaces.
+    "Notre-Dame  FIRE!" -> "notre dame fire"
+    """
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return _NON_WORD.sub(" ", text).strip()
+
+
+def parse_datetime_naive(date_string: str) -> datetime:
+    """
+    Parse ISO datetime string and strip timezone info to make it naive.
+    Database expects TIMESTAMP WITHOUT TIME ZONE (naive datetime).
+    """
+    # Replace 'Z' with '+00:00' for proper ISO parsing
+    date_string = date_string.replace("Z", "+00:00")
+    # Parse the datetime
+    dt = datetime.fromisoformat(date_string)
+    # Strip timezone to make it naive
+    return dt.replace(tzinfo=None)
+
+
+_TRACKING_PARAMS = ("utm_", "fbclid", "gclid")
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of an article URL for de-duplication: lower-cased host
+    without "www.", no fragment, tracking params dropped, no trailing slash.
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower().removeprefix("www.")
+    query = "&".join(
+        param for param in parts.query.split("&")
+        if param and not param.lower().startswith(_TRACKING_PARAMS)
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower() or "https", host, path, query, ""))
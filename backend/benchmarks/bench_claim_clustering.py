@@ -0,0 +1,78 @@
+"""
+Claim clustering ahead of branch synthesis: clustering time and the size of the
+synthesis prompt payload before (indented sources JSON) and after (one line per cluster).
+
+    uv run python -m benchmarks.bench_claim_clustering --sources 200 --claims 10 --runs 5
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("GOOGLE_API_KEY", "bench")
+os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "bench")
+os.environ.setdefault("ENVIRONMENT", "benchmark")
+
+from app.config import settings  # noqa: E402
+from app.services.claim_clustering import cluster_claims  # noqa: E402
+from app.services.rate_limiter import estimate_tokens  # noqa: E402
+
+SUBJECTS = ["the roof", "the spire", "the north tower", "the nave", "the organ", "the rose window"]
+VERBS = ["collapsed", "was damaged", "caught fire", "was saved", "was evacuated", "was inspected"]
+TIMES = ["on Monday evening", "late on Monday", "shortly after 6pm", "overnight", "before midnight"]
+PREFIXES = ["", "Officials said ", "Witnesses reported that ", "According to police, ", "Reports say "]
+
+
+def fake_sources(count: int, claims_per_source: int, seed: int):
+    rng = random.Random(seed)
+    return [
+        {
+            "url": f"https://outlet{j}.example.com/story/{j}",
+            "outlet": f"Outlet {j % 40}",
+            "credibility_score": round(rng.uniform(0.3, 0.95), 2),
+            "publish_date": "2019-04-15T20:00:00Z",
+            "claims": [
+                f"{rng.choice(PREFIXES)}{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(TIMES)}"
+                for _ in range(claims_per_source)
+            ],
+        }
+        for j in range(count)
+    ]
+
+
+def compact_payload(clusters):
+    return "\n".join(
+        json.dumps({key: cluster[key] for key in ("id", "claim", "outlets", "credibility")})
+        for cluster in clusters
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sources", type=int, default=200)
+    parser.add_argument("--claims", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=settings.claim_similarity_threshold)
+    args = parser.parse_args()
+
+    sources = fake_sources(args.sources, args.claims, seed=0)
+    total_claims = args.sources * args.claims
+
+    timings = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        clusters = cluster_claims(sources, args.threshold)
+        timings.append(time.perf_counter() - start)
+
+    before = json.dumps(sources, indent=2)
+    after = compact_payload(clusters)
+    print(f"claims:   {total_claims} -> {len(clusters)} clusters (threshold {args.threshold})")
+    print(f"cluster:  best {min(timings) * 1000:.1f} ms, mean {sum(timings) / len(timings) * 1000:.1f} ms")
+    print(f"payload:  {len(before):,} -> {len(after):,} chars, "
+          f"~{estimate_tokens(before):,} -> ~{estimate_tokens(after):,} tokens")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+End-to-end load benchmark: API and worker in one process against a fake Gemini backend.
+
+    uv run --group bench python -m benchmarks.bench_load --timelines 40 --concurrency 8 --output load.json
+
+Virtual users create a timeline, poll its status until it settles, then read it a
+few times. Uses DATABASE_URL if set, otherwise a throwaway SQLite file (requires
+aiosqlite), and REDIS_URL unless fakeredis is installed (or --redis is given).
+Reports per-route latency percentiles, timelines completed per minute, SQL
+statements per request and peak RSS; --output saves the results as JSON.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+os.environ.setdefault(
+    "DATABASE_URL",
+    f"sqlite+aiosqlite:///{os.path.join(tempfile.gettempdir(), 'veritas_load.db')}"
+)
+os.environ.setdefault("GOOGLE_API_KEY", "bench")
+os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "bench")
+os.environ.setdefault("ENVIRONMENT", "benchmark")
+# Every timeline pays for its model calls (no response or event reuse), and failed calls retry quickly
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+os.environ.setdefault("EVENT_KNOWLEDGE_ENABLED", "false")
+os.environ.setdefault("GEMINI_BACKOFF_BASE", "0.05")
+os.environ.setdefault("GEMINI_BACKOFF_MAX", "0.5")
+os.environ.setdefault("WORKER_POLL_INTERVAL", "0.05")
+os.environ.setdefault("NEWS_INDEX_PATH", os.path.join(tempfile.gettempdir(), "veritas_load_no_corpus.db"))
+
+import httpx  # noqa: E402
+from prometheus_client import REGISTRY  # noqa: E402
+
+from app import app  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.database import engine, Base  # noqa: E402
+from app.redis_client import set_redis  # noqa: E402
+from app.services import timeline_processor  # noqa: E402
+from benchmarks.fake_gemini import FakeGeminiConfig, install  # noqa: E402
+from worker import consume  # noqa: E402
+
+ROUTES = {
+    "create": "/api/timelines/create",
+    "status": "/api/timelines/{timeline_id}/status",
+    "get": "/api/timelines/{timeline_id}",
+}
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+
+def statements_per_request(method: str, route: str) -> float:
+    labels = {"method": method, "route": route}
+    total = REGISTRY.get_sample_value("veritas_http_request_queries_sum", labels) or 0.0
+    count = REGISTRY.get_sample_value("veritas_http_request_queries_count", labels) or 0.0
+    return total / count if count else 0.0
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def virtual_user(client, queries, latencies, outcomes, args):
+    while queries:
+        query = queries.pop()
+
+        start = time.perf_counter()
+        response = await client.post("/api/timelines/create", json={"query": query})
+        latencies["create"].append(time.perf_counter() - start)
+        if response.status_code != 200:
+            outcomes[f"create_{response.status_code}"] += 1
+            continue
+        timeline_id = response.json()["id"]
+
+        status = "processing"
+        while status == "processing":
+            await asyncio.sleep(args.poll_interval)
+            start = time.perf_counter()
+            response = await client.get(f"/api/timelines/{timeline_id}/status")
+            latencies["status"].append(time.perf_counter() - start)
+            status = response.json()["status"] if response.status_code == 200 else "processing"
+        outcomes[status] += 1
+
+        for _ in range(args.reads):
+            start = time.perf_counter()
+            await client.get(f"/api/timelines/{timeline_id}")
+            latencies["get"].append(time.perf_counter() - start)
+
+
+async def run(args):
+    if args.redis:
+        from app.redis_client import get_redis
+        redis_backend = settings.redis_url
+        await get_redis().flushdb()
+    else:
+        try:
+            import fakeredis
+        except ImportError:
+            sys.exit("fakeredis is not installed; run with --redis to use REDIS_URL")
+        set_redis(fakeredis.FakeAsyncRedis(decode_responses=True))
+        redis_backend = "fakeredis"
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    fake = install(timeline_processor.gemini_service, FakeGeminiConfig(
+        latency_median=args.latency_median,
+        latency_sigma=args.latency_sigma,
+        pro_latency_factor=args.pro_latency_factor,
+        error_rate=args.error_rate,
+        events=args.events,
+        sources=args.sources,
+        claims=args.claims,
+        branches=args.branches,
+        seed=args.seed,
+    ))
+
+    stop = asyncio.Event()
+    workers = [asyncio.create_task(consume(stop)) for _ in range(args.workers)]
+
+    queries = [f"Benchmark topic {idx} (seed {args.seed})" for idx in reversed(range(args.timelines))]
+    latencies = defaultdict(list)
+    outcomes = defaultdict(int)
+
+    transport = httpx.ASGITransport(app=app)
+    start = time.perf_counter()
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        await asyncio.gather(*(
+            virtual_user(client, queries, latencies, outcomes, args) for _ in range(args.concurrency)
+        ))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await asyncio.gather(*workers)
+    await engine.dispose()
+
+    results = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "database": engine.url.get_backend_name(),
+        "redis": redis_backend,
+        "args": vars(args),
+        "elapsed_seconds": round(elapsed, 3),
+        "timelines": dict(outcomes),
+        "timelines_completed_per_minute": round(outcomes["completed"] / elapsed * 60, 2),
+        "model_calls": dict(fake.calls),
+        "model_failures_injected": fake.failures,
+        "routes": {
+            name: {
+                "requests": len(latencies[name]),
+                "p50_ms": round(percentile(latencies[name], 50) * 1000, 2),
+                "p95_ms": round(percentile(latencies[name], 95) * 1000, 2),
+                "p99_ms": round(percentile(latencies[name], 99) * 1000, 2),
+                "statements_per_request": round(
+                    statements_per_request("POST" if name == "create" else "GET", route), 2
+                ),
+            }
+            for name, route in ROUTES.items()
+        },
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        "peak_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 ** 2 if sys.platform == "darwin" else 1024), 1
+        ),
+    }
+
+    print(f"{outcomes['completed']} completed, {outcomes['failed']} failed in {elapsed:.1f}s "
+          f"-> {results['timelines_completed_per_minute']} timelines/min, peak RSS {results['peak_rss_mb']} MB")
+    print(f"{'route':>7}  {'requests':>8}  {'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}  statements")
+    for name, route in results["routes"].items():
+        print(f"{name:>7}  {route['requests']:>8}  {route['p50_ms']:>8}  {route['p95_ms']:>8}  "
+              f"{route['p99_ms']:>8}  {route['statements_per_request']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved results to {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--timelines", type=int, default=40, help="timelines to create in total")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent virtual users")
+    parser.add_argument("--workers", type=int, default=settings.worker_concurrency,
+                        help="concurrent job slots in the in-process worker")
+    parser.add_argument("--poll-interval", type=float, default=0.5, help="status polling interval (s)")
+    parser.add_argument("--reads", type=int, default=3, help="GET /{id} calls per completed timeline")
+    parser.add_argument("--latency-median", type=float, default=0.3, help="median fake model latency (s)")
+    parser.add_argument("--latency-sigma", type=float, default=0.4, help="lognormal sigma, 0 = fixed")
+    parser.add_argument("--pro-latency-factor", type=float, default=2.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of a 503 per model call")
+    parser.add_argument("--events", type=int, default=6)
+    parser.add_argument("--sources", type=int, default=6)
+    parser.add_argument("--claims", type=int, default=3)
+    parser.add_argument("--branches", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--redis", action="store_true", help="use REDIS_URL instead of fakeredis")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    # Injected failures would otherwise log every retry
+    logging.basicConfig(level=logging.ERROR)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
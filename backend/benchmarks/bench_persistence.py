@@ -0,0 +1,146 @@
+"""
+Rows/sec of the timeline persistence path: the previous per-row ORM writes
+(db.add + flush per event) versus the bulk path used by process_timeline.
+
+    uv run --group bench python -m benchmarks.bench_persistence --events 10 --sources 10 --runs 20
+
+Uses DATABASE_URL if set, otherwise a throwaway SQLite file (requires aiosqlite).
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault(
+    "DATABASE_URL",
+    f"sqlite+aiosqlite:///{os.path.join(tempfile.gettempdir(), 'veritas_bench.db')}"
+)
+os.environ.setdefault("GOOGLE_API_KEY", "bench")
+os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "bench")
+os.environ.setdefault("ENVIRONMENT", "benchmark")
+
+from sqlalchemy import insert  # noqa: E402
+
+from app.database import engine, Base, AsyncSessionLocal  # noqa: E402
+from app.models import Timeline, Event, Source, Branch  # noqa: E402
+from app.models.timeline import generate_uuid  # noqa: E402
+from app.services.timeline_processor import (  # noqa: E402
+    build_event_result,
+    build_source_row,
+    parse_datetime_naive,
+    write_event_results,
+)
+
+
+def fake_event(idx: int, sources: int, branches: int):
+    anchor = {"title": f"Event {idx}", "date": "2019-04-15T18:20:00Z", "priority": "high"}
+    investigation = {
+        "sources": [
+            {
+                "url": f"https://example.com/{idx}/{j}",
+                "outlet": f"Outlet {j}",
+                "credibility_score": 0.8,
+                "publish_date": "2019-04-15T20:00:00Z",
+                "claims": [f"Claim {k} about event {idx}" for k in range(3)],
+            }
+            for j in range(sources)
+        ]
+    }
+    branch_data = [
+        {"narrative": f"Narrative {k}", "credibility_score": 0.6, "evidence": "...", "source_count": 2}
+        for k in range(branches)
+    ]
+    return anchor, investigation, branch_data
+
+
+async def write_orm(timeline_id: str, payload):
+    """The pre-bulk path: one ORM object per row, a flush per event, a commit per event"""
+    async with AsyncSessionLocal() as db:
+        for idx, (anchor, investigation, branch_data) in enumerate(payload):
+            event = Event(
+                timeline_id=timeline_id,
+                title=anchor["title"],
+                event_date=parse_datetime_naive(anchor["date"]),
+                priority=anchor["priority"],
+                order=idx
+            )
+            db.add(event)
+            await db.flush()
+            for source_data in investigation["sources"]:
+                db.add(Source(
+                    event_id=event.id,
+                    url=source_data["url"],
+                    outlet=source_data["outlet"],
+                    credibility_score=source_data["credibility_score"],
+                    claims=source_data["claims"]
+                ))
+            for branch in branch_data:
+                db.add(Branch(event_id=event.id, **branch))
+            await db.commit()
+
+
+async def write_bulk(timeline_id: str, payload):
+    """The current path: ids up front, multi-row inserts, one group commit"""
+    async with AsyncSessionLocal() as db:
+        event_rows = [
+            {
+                "id": generate_uuid(),
+                "timeline_id": timeline_id,
+                "title": anchor["title"],
+                "description": None,
+                "event_date": parse_datetime_naive(anchor["date"]),
+                "priority": anchor["priority"],
+                "order": idx
+            }
+            for idx, (anchor, _, _) in enumerate(payload)
+        ]
+        await db.execute(insert(Event), event_rows)
+        results = [
+            build_event_result(
+                event_row,
+                [build_source_row(event_row["id"], source) for source in investigation["sources"]],
+                branch_data
+            )
+            for event_row, (_, investigation, branch_data) in zip(event_rows, payload)
+        ]
+        await write_event_results(db, results)
+        await db.commit()
+
+
+async def run(args):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    payload = [fake_event(i, args.sources, args.branches) for i in range(args.events)]
+    rows_per_run = args.events * (1 + args.sources + args.branches)
+
+    for name, writer in (("orm", write_orm), ("bulk", write_bulk)):
+        async with AsyncSessionLocal() as db:
+            timelines = [Timeline(query="bench", topic="bench") for _ in range(args.runs)]
+            db.add_all(timelines)
+            await db.commit()
+
+        start = time.perf_counter()
+        for timeline in timelines:
+            await writer(timeline.id, payload)
+        elapsed = time.perf_counter() - start
+
+        total = rows_per_run * args.runs
+        print(f"{name:>5}: {total} rows in {elapsed:.3f}s -> {total / elapsed:,.0f} rows/sec")
+
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=10)
+    parser.add_argument("--sources", type=int, default=10)
+    parser.add_argument("--branches", type=int, default=3)
+    parser.add_argument("--runs", type=int, default=20)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
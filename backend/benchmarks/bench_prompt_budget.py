@@ -0,0 +1,67 @@
+"""
+Estimated prompt tokens per phase before (verbatim fields, indented JSON, nothing
+dropped) and after prompt budgeting, on synthetic events.
+
+    uv run python -m benchmarks.bench_prompt_budget --events 20 --sources 40 --articles 12
+"""
+import argparse
+import os
+import random
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("GOOGLE_API_KEY", "bench")
+os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "bench")
+os.environ.setdefault("ENVIRONMENT", "benchmark")
+
+from app.services.gemini_service import GeminiService  # noqa: E402
+from benchmarks.bench_claim_clustering import fake_sources  # noqa: E402
+
+WORDS = "fire cathedral roof spire firefighters paris investigation officials restoration damage".split()
+
+
+def fake_text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def fake_articles(rng: random.Random, count: int):
+    return [
+        {
+            "url": f"https://news{j}.example.com/2019/04/15/story-{j}",
+            "outlet": f"Outlet {j}",
+            "published_at": f"2019-04-{15 + j % 5}T{j % 24:02d}:00:00Z",
+            "title": fake_text(rng, 12),
+            "description": fake_text(rng, 80) if j % 3 else "",
+        }
+        for j in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=20)
+    parser.add_argument("--sources", type=int, default=40)
+    parser.add_argument("--claims", type=int, default=8)
+    parser.add_argument("--articles", type=int, default=12)
+    parser.add_argument("--query-words", type=int, default=400)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    service = GeminiService()
+
+    service.prompt_budget.fit("skeleton", service._skeleton_prompt, {"query": fake_text(rng, args.query_words)})
+    for idx in range(args.events):
+        title = f"Event {idx}: {fake_text(rng, 8)}"
+        service._fit_investigation_prompt(
+            title, "2019-04-15T18:20:00Z", fake_text(rng, 300), fake_articles(rng, args.articles)
+        )
+        service._fit_synthesis_prompt(title, fake_sources(args.sources, args.claims, seed=idx))
+
+    print(f"{'phase':>11}  {'prompts':>7}  {'tokens before':>13}  {'tokens after':>12}  {'saved':>6}  dropped")
+    for phase, stats in service.prompt_budget.stats.items():
+        saved = 1 - stats["tokens_after"] / stats["tokens_before"] if stats["tokens_before"] else 0
+        print(f"{phase:>11}  {stats['prompts']:>7}  {stats['tokens_before']:>13,}  "
+              f"{stats['tokens_after']:>12,}  {saved:>6.0%}  {stats['items_dropped']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Requests/sec per core of building a full timeline response: the ORM + Pydantic
+path (from_attributes validation, then FastAPI's JSON rendering) versus direct
+row-to-dict assembly encoded with orjson, optionally followed by compression.
+
+    uv run --group bench python -m benchmarks.bench_serialization --events 10 --sources 10 --claims 5
+
+Uses DATABASE_URL if set, otherwise a throwaway SQLite file (requires aiosqlite).
+Single-threaded, so the numbers are per core.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+os.environ.setdefault(
+    "DATABASE_URL",
+    f"sqlite+aiosqlite:///{os.path.join(tempfile.gettempdir(), 'veritas_bench.db')}"
+)
+os.environ.setdefault("GOOGLE_API_KEY", "bench")
+os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "bench")
+os.environ.setdefault("ENVIRONMENT", "benchmark")
+
+from sqlalchemy import insert, select  # noqa: E402
+from sqlalchemy.orm import selectinload  # noqa: E402
+
+from app.database import engine, Base, AsyncSessionLocal  # noqa: E402
+from app.models import Timeline, Event, Source, Branch  # noqa: E402
+from app.models.timeline import generate_uuid  # noqa: E402
+from app.schemas import TimelineResponse  # noqa: E402
+from app.services.serialization import compress_body, encode_json, fetch_timeline_dict  # noqa: E402
+from app.utils import parse_datetime_naive  # noqa: E402
+
+
+async def seed(args) -> str:
+    async with AsyncSessionLocal() as db:
+        timeline = Timeline(query="bench", topic="Benchmark timeline", status="completed")
+        db.add(timeline)
+        await db.flush()
+        events, sources, branches = [], [], []
+        for idx in range(args.events):
+            event_id = generate_uuid()
+            events.append({
+                "id": event_id, "timeline_id": timeline.id, "title": f"Event {idx}", "description": None,
+                "event_date": parse_datetime_naive("2019-04-15T18:20:00Z"), "priority": "high", "order": idx
+            })
+            sources += [
+                {
+                    "id": generate_uuid(), "event_id": event_id, "url": f"https://example.com/{idx}/{j}",
+                    "outlet": f"Outlet {j}", "credibility_score": 0.8,
+                    "publish_date": parse_datetime_naive("2019-04-15T20:00:00Z"),
+                    "claims": [f"Claim {k} about event {idx}, reported by outlet {j}" for k in range(args.claims)]
+                }
+                for j in range(args.sources)
+            ]
+            branches += [
+                {
+                    "id": generate_uuid(), "event_id": event_id, "narrative": f"Narrative {k}",
+                    "credibility_score": 0.6, "evidence": "Officials confirmed the details. " * 4,
+                    "source_count": 3
+                }
+                for k in range(args.branches)
+            ]
+        await db.execute(insert(Event), events)
+        await db.execute(insert(Source), sources)
+        await db.execute(insert(Branch), branches)
+        await db.commit()
+        return timeline.id
+
+
+async def load_timeline(db, timeline_id: str) -> Timeline:
+    """ORM load of a timeline with the events, branches and sources of a full response"""
+    events = selectinload(Timeline.events)
+    result = await db.execute(
+        select(Timeline).where(Timeline.id == timeline_id)
+        .options(events.selectinload(Event.branches), events.selectinload(Event.sources))
+    )
+    return result.scalar_one()
+
+
+async def pydantic_path(timeline_id: str) -> bytes:
+    """What get_timeline did before: ORM objects, validation, then JSONResponse rendering"""
+    async with AsyncSessionLocal() as db:
+        timeline = await load_timeline(db, timeline_id)
+    content = TimelineResponse.model_validate(timeline).model_dump(mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+async def fast_path(timeline_id: str) -> bytes:
+    async with AsyncSessionLocal() as db:
+        return encode_json(await fetch_timeline_dict(db, timeline_id))
+
+
+async def measure(name: str, build, timeline_id: str, runs: int, encoding=None):
+    await build(timeline_id)  # warm up
+    start = time.perf_counter()
+    for _ in range(runs):
+        body = await build(timeline_id)
+        if encoding:
+            body = compress_body(body, encoding)
+    elapsed = time.perf_counter() - start
+    print(f"{name:>16}: {runs / elapsed:8,.0f} req/s ({elapsed / runs * 1000:.2f} ms/req, {len(body):,} bytes)")
+
+
+async def run(args):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    timeline_id = await seed(args)
+
+    before, after = await pydantic_path(timeline_id), await fast_path(timeline_id)
+    print(f"byte-identical output: {before == after}")
+
+    await measure("pydantic", pydantic_path, timeline_id, args.runs)
+    await measure("rows + orjson", fast_path, timeline_id, args.runs)
+    await measure("  + gzip", fast_path, timeline_id, args.runs, "gzip")
+    try:
+        import brotli  # noqa: F401
+        await measure("  + brotli", fast_path, timeline_id, args.runs, "br")
+    except ImportError:
+        pass
+
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=10)
+    parser.add_argument("--sources", type=int, default=10)
+    parser.add_argument("--claims", type=int, default=5)
+    parser.add_argument("--branches", type=int, default=3)
+    parser.add_argument("--runs", type=int, default=200)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
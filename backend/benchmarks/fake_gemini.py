@@ -0,0 +1,143 @@
+"""
+Deterministic stand-in for the google-genai async client, for benchmarks.
+
+Responses are derived from the prompt, and every random draw (latency, failure,
+content) is seeded from (seed, model, prompt, attempt), so a run produces the
+same calls and answers regardless of how concurrent tasks interleave.
+"""
+import asyncio
+import hashlib
+import json
+import random
+import types
+from collections import Counter
+from dataclasses import dataclass
+
+from google.genai import errors
+
+PRIORITIES = ["critical", "high", "medium", "low"]
+
+
+@dataclass
+class FakeGeminiConfig:
+    latency_median: float = 0.5  # seconds per call (lognormal)
+    latency_sigma: float = 0.4  # 0 = fixed latency
+    pro_latency_factor: float = 2.0  # gemini-2.5-pro calls are this much slower
+    error_rate: float = 0.0  # probability of a 503 per call
+    events: int = 6  # anchor events per skeleton
+    sources: int = 6  # sources per investigation
+    claims: int = 3  # claims per source
+    branches: int = 2  # branches per synthesis
+    stream_chunks: int = 8
+    seed: int = 0
+
+
+class FakeModels:
+    def __init__(self, config: FakeGeminiConfig):
+        self.config = config
+        self.calls = Counter()
+        self.failures = 0
+        self._attempts = Counter()
+
+    def _rng(self, model: str, prompt: str) -> random.Random:
+        digest = hashlib.sha256(f"{model}\n{prompt}".encode()).hexdigest()
+        self._attempts[digest] += 1
+        return random.Random(f"{self.config.seed}:{digest}:{self._attempts[digest]}")
+
+    def _latency(self, rng: random.Random, model: str) -> float:
+        latency = self.config.latency_median
+        if self.config.latency_sigma:
+            latency = rng.lognormvariate(0, self.config.latency_sigma) * latency
+        return latency * (self.config.pro_latency_factor if "pro" in model else 1.0)
+
+    def _maybe_fail(self, rng: random.Random):
+        if rng.random() < self.config.error_rate:
+            self.failures += 1
+            raise errors.APIError(503, {"error": {"code": 503, "message": "fake overload", "status": "UNAVAILABLE"}})
+
+    @staticmethod
+    def _usage(prompt: str, text: str):
+        prompt_tokens, output_tokens = len(prompt) // 4 + 1, len(text) // 4 + 1
+        return types.SimpleNamespace(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=output_tokens,
+            thoughts_token_count=None,
+            total_token_count=prompt_tokens + output_tokens,
+        )
+
+    def _respond(self, rng: random.Random, prompt: str) -> str:
+        config = self.config
+        if "timeline researcher" in prompt:
+            query = prompt.split("Query:", 1)[1].split("\n", 1)[0].strip()
+            return json.dumps({
+                "topic": query[:80],
+                "date_range": {"start": "2019-04-15T00:00:00Z", "end": "2019-04-20T00:00:00Z"},
+                "anchor_events": [
+                    {
+                        "title": f"{query[:60]}: development {idx + 1}",
+                        "date": f"2019-04-{15 + idx % 5:02d}T{(8 + idx) % 24:02d}:00:00Z",
+                        "priority": PRIORITIES[idx % len(PRIORITIES)],
+                    }
+                    for idx in range(config.events)
+                ],
+            })
+        if "investigating a specific event" in prompt:
+            event = prompt.split("Event:", 1)[1].split("\n", 1)[0].strip()
+            return json.dumps({
+                "conflicts": [f"Accounts differ on the cause of {event}"],
+                "sources": [
+                    {
+                        "url": f"https://outlet{j}.example.com/{rng.getrandbits(32):08x}",
+                        "outlet": f"Outlet {j}",
+                        "credibility_score": round(rng.uniform(0.4, 0.95), 2),
+                        "publish_date": f"2019-04-{15 + j % 5:02d}T12:00:00Z",
+                        "claims": [
+                            f"{event} claim {rng.randrange(config.claims * 2)} reported by officials"
+                            for _ in range(config.claims)
+                        ],
+                    }
+                    for j in range(config.sources)
+                ],
+            })
+        return json.dumps([
+            {
+                "narrative": f"Narrative {k + 1}",
+                "credibility_score": round(rng.uniform(0.3, 0.9), 2),
+                "evidence": "Several outlets report matching details. " * 3,
+                "claim_ids": [f"c{k + 1}", f"c{k + 2}"],
+            }
+            for k in range(config.branches)
+        ])
+
+    async def generate_content(self, model, contents, config=None):
+        self.calls[model] += 1
+        rng = self._rng(model, contents)
+        await asyncio.sleep(self._latency(rng, model))
+        self._maybe_fail(rng)
+        text = self._respond(rng, contents)
+        return types.SimpleNamespace(text=text, usage_metadata=self._usage(contents, text))
+
+    async def generate_content_stream(self, model, contents, config=None):
+        self.calls[model] += 1
+        rng = self._rng(model, contents)
+        latency = self._latency(rng, model)
+        self._maybe_fail(rng)
+        text = self._respond(rng, contents)
+        usage = self._usage(contents, text)
+        chunks = self.config.stream_chunks
+
+        async def stream():
+            step = max(1, -(-len(text) // chunks))
+            for start in range(0, len(text), step):
+                await asyncio.sleep(latency / chunks)
+                last = start + step >= len(text)
+                yield types.SimpleNamespace(text=text[start:start + step], usage_metadata=usage if last else None)
+
+        return stream()
+
+
+def install(service, config: FakeGeminiConfig) -> FakeModels:
+    """Point a GeminiService at a fake backend; returns it for call counts"""
+    models = FakeModels(config)
+    service.client = types.SimpleNamespace(aio=types.SimpleNamespace(models=models))
+    return models
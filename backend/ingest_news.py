@@ -0,0 +1,21 @@
+import argparse
+import json
+
+from app.config import settings
+from app.services.news_index import NewsIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Append NewsAPI-format dumps to the news index")
+    parser.add_argument("dumps", nargs="+", help="JSON files with an `articles` array")
+    parser.add_argument("--index", default=settings.news_index_path)
+    args = parser.parse_args()
+
+    index = NewsIndex(args.index)
+    for dump in args.dumps:
+        added, skipped = index.ingest_file(dump)
+        print(json.dumps({"dump": dump, "added": added, "skipped": skipped}))
+
+
+if __name__ == "__main__":
+    main()
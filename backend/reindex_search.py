@@ -0,0 +1,33 @@
+import argparse
+import asyncio
+import json
+
+from sqlalchemy import select
+
+from app.database import AsyncSessionLocal, init_db
+from app.models import Timeline
+from app.services.search_index import reindex_timeline
+
+
+async def reindex(timeline_ids):
+    await init_db()
+    async with AsyncSessionLocal() as db:
+        if not timeline_ids:
+            timeline_ids = list((await db.execute(select(Timeline.id).order_by(Timeline.created_at))).scalars())
+    for timeline_id in timeline_ids:
+        # One transaction per timeline, so a long backfill doesn't hold one open
+        async with AsyncSessionLocal() as db:
+            documents = await reindex_timeline(db, timeline_id)
+            await db.commit()
+        print(json.dumps({"timeline_id": timeline_id, "documents": documents}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the search documents of stored timelines")
+    parser.add_argument("timeline_ids", nargs="*", help="timelines to reindex (default: all)")
+    args = parser.parse_args()
+    asyncio.run(reindex(args.timeline_ids))
+
+
+if __name__ == "__main__":
+    main()
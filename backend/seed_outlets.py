@@ -0,0 +1,40 @@
+import argparse
+import asyncio
+import json
+
+from sqlalchemy import func, select
+
+from app.database import AsyncSessionLocal, init_db
+from app.models import Outlet
+from app.services.news_index import iter_newsapi_articles
+from app.services.outlet_registry import outlet_registry
+
+BATCH_SIZE = 500
+
+
+async def seed(dumps):
+    await init_db()
+    async with AsyncSessionLocal() as db:
+        before = await db.scalar(select(func.count()).select_from(Outlet))
+        for dump in dumps:
+            sources = [
+                ((article.get("url") or ""), ((article.get("source") or {}).get("name") or ""))
+                for article in iter_newsapi_articles(dump)
+            ]
+            for start in range(0, len(sources), BATCH_SIZE):
+                await outlet_registry.register(db, sources[start:start + BATCH_SIZE])
+            await db.commit()
+            after = await db.scalar(select(func.count()).select_from(Outlet))
+            print(json.dumps({"dump": dump, "sources": len(sources), "new_outlets": after - before}))
+            before = after
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Register the outlets of NewsAPI-format dumps")
+    parser.add_argument("dumps", nargs="+", help="JSON files with an `articles` array")
+    args = parser.parse_args()
+    asyncio.run(seed(args.dumps))
+
+
+if __name__ == "__main__":
+    main()
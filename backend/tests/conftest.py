@@ -0,0 +1,91 @@
+"""
+Tests run against a throwaway SQLite database, fakeredis as the Redis
+stand-in and the deterministic fake Gemini backend from benchmarks/.
+"""
+import asyncio
+import os
+import tempfile
+
+_tmp = tempfile.mkdtemp(prefix="veritas-tests-")
+# Set before anything imports app.config; never a real database or corpus
+os.environ.update(
+    DATABASE_URL=f"sqlite+aiosqlite:///{_tmp}/veritas.db",
+    NEWS_INDEX_PATH=f"{_tmp}/news_index.db",
+    ENVIRONMENT="test",
+    LLM_CACHE_ENABLED="false",
+    EVENT_KNOWLEDGE_ENABLED="false",
+    WORKER_POLL_INTERVAL="0.02",
+)
+os.environ.setdefault("GOOGLE_API_KEY", "test")
+os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "test")
+
+import fakeredis  # noqa: E402
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+
+from app import app as api  # noqa: E402
+from app.database import Base, engine  # noqa: E402
+from app.redis_client import set_redis  # noqa: E402
+from app.services import timeline_processor  # noqa: E402
+from app.services.outlet_registry import outlet_registry  # noqa: E402
+from benchmarks.fake_gemini import FakeGeminiConfig, install  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def redis():
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    set_redis(client)
+    yield client
+    await client.aclose()
+
+
+@pytest.fixture
+async def db(redis):
+    """Fresh schema per test"""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    # Cached outlet ids would point into the previous test's database
+    outlet_registry.clear()
+    yield engine
+    # Pooled connections belong to this test's event loop
+    await engine.dispose()
+
+
+@pytest.fixture
+def fake_gemini():
+    """Fast fake model; tests wanting another config call install() themselves"""
+    return install(timeline_processor.gemini_service, FakeGeminiConfig(latency_median=0.01, latency_sigma=0))
+
+
+@pytest.fixture
+async def client(db):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api), base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+async def worker(db):
+    """A worker consuming jobs in the background of the test"""
+    from worker import consume
+
+    stop = asyncio.Event()
+    task = asyncio.create_task(consume(stop))
+    yield task
+    stop.set()
+    await task
+
+
+async def wait_for_status(client, timeline_id: str, timeout: float = 10.0) -> dict:
+    """Poll a timeline until it leaves "processing"; returns its status"""
+    async with asyncio.timeout(timeout):
+        while True:
+            status = (await client.get(f"/api/timelines/{timeline_id}/status")).json()
+            if status["status"] != "processing":
+                return status
+            await asyncio.sleep(0.02)
@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services import timeline_processor
+from app.services.job_queue import job_queue
+from benchmarks.fake_gemini import FakeGeminiConfig, install
+from tests.conftest import wait_for_status
+from worker import listen_for_cancellations, run_job
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def cancellation_listener(redis):
+    task = asyncio.create_task(listen_for_cancellations())
+    await asyncio.sleep(0.05)  # subscribed before anything is cancelled
+    yield task
+    task.cancel()
+
+
+async def create(client, query: str) -> str:
+    return (await client.post("/api/timelines/create", json={"query": query})).json()["id"]
+
+
+async def run_next_job():
+    job = await job_queue.claim()
+    assert job is not None
+    await run_job(job)
+
+
+async def test_cancelling_stops_the_running_job(client, worker, cancellation_listener):
+    # The skeleton call alone takes ~2 s
+    models = install(timeline_processor.gemini_service, FakeGeminiConfig(latency_median=1.0, latency_sigma=0))
+    timeline_id = await create(client, "Slow model")
+    async with asyncio.timeout(5):
+        while not sum(models.calls.values()):
+            await asyncio.sleep(0.01)
+
+    start = time.perf_counter()
+    response = await client.post(f"/api/timelines/{timeline_id}/cancel")
+    assert response.status_code == 200
+    assert response.json()["status"] == "cancelled"
+
+    # The job is acked once its task is cancelled, long before the call would have returned
+    async with asyncio.timeout(1):
+        while await job_queue.is_queued(timeline_id):
+            await asyncio.sleep(0.01)
+    assert time.perf_counter() - start < 1.0
+    assert (await client.get(f"/api/timelines/{timeline_id}/status")).json()["status"] == "cancelled"
+    assert sum(models.calls.values()) == 1
+
+
+async def test_queued_job_is_acked_without_running(client, fake_gemini):
+    timeline_id = await create(client, "Notre Dame fire")
+    assert (await client.post(f"/api/timelines/{timeline_id}/cancel")).json()["status"] == "cancelled"
+
+    await run_next_job()
+
+    assert not sum(fake_gemini.calls.values())
+    assert not await job_queue.is_queued(timeline_id)
+    assert (await client.get(f"/api/timelines/{timeline_id}/status")).json()["status"] == "cancelled"
+    # Only processing timelines can be cancelled
+    assert (await client.post(f"/api/timelines/{timeline_id}/cancel")).status_code == 409
+
+
+async def test_refresh_cancelled_while_queued_makes_no_model_call(client, fake_gemini):
+    timeline_id = await create(client, "Notre Dame fire")
+    await run_next_job()
+    version = (await client.get(f"/api/timelines/{timeline_id}")).json()["version"]
+    calls = sum(fake_gemini.calls.values())
+
+    assert (await client.post(f"/api/timelines/{timeline_id}/refresh")).status_code == 200
+    # Cancelling a refresh keeps the current version
+    assert (await client.post(f"/api/timelines/{timeline_id}/cancel")).json()["status"] == "completed"
+    await run_next_job()
+
+    assert sum(fake_gemini.calls.values()) == calls
+    assert not await job_queue.is_queued(timeline_id)
+    assert (await wait_for_status(client, timeline_id))["status"] == "completed"
+    assert (await client.get(f"/api/timelines/{timeline_id}")).json()["version"] == version
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from app.services import timeline_processor
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from benchmarks.fake_gemini import FakeGeminiConfig, install
+
+pytestmark = pytest.mark.anyio
+
+MODEL = "gemini-2.5-pro"
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    """An open breaker on the pro model whose reset timeout has just elapsed"""
+    breaker = CircuitBreaker(MODEL, failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    breaker._opened_at -= breaker.reset_timeout
+    monkeypatch.setitem(timeline_processor.gemini_service.breakers, MODEL, breaker)
+    return breaker
+
+
+def test_breaker_opens_after_failures_and_lets_one_trial_through():
+    breaker = CircuitBreaker(MODEL, failure_threshold=2, reset_timeout=0)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.before_call()
+    assert breaker.state == "half-open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+async def test_cancelled_trial_call_does_not_leave_the_breaker_half_open(breaker):
+    service = timeline_processor.gemini_service
+    install(service, FakeGeminiConfig(latency_median=1.0, latency_sigma=0))
+    trial = asyncio.create_task(service.discover_timeline_skeleton("Notre Dame fire"))
+    await asyncio.sleep(0.02)
+    assert breaker.state == "half-open"
+
+    trial.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await trial
+    assert breaker.state == "open"
+
+    # After another reset timeout a healthy backend closes it again
+    await asyncio.sleep(breaker.reset_timeout)
+    install(service, FakeGeminiConfig(latency_median=0.01, latency_sigma=0))
+    assert (await service.discover_timeline_skeleton("Notre Dame fire"))["anchor_events"]
+    assert breaker.state == "closed"
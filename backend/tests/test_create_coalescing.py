@@ -0,0 +1,39 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.config import settings
+from app.services.query_coalescer import query_coalescer
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_duplicate_creates_return_the_timeline_in_flight(client):
+    first = (await client.post("/api/timelines/create", json={"query": "Notre Dame fire"})).json()
+    second = (await client.post("/api/timelines/create", json={"query": "notre-dame  FIRE"})).json()
+    assert second["id"] == first["id"]
+
+
+async def test_failed_insert_releases_the_claim(client, monkeypatch):
+    async def failing_commit(self):
+        raise OperationalError("INSERT", {}, Exception("database is locked"))
+
+    with monkeypatch.context() as patch:
+        patch.setattr("sqlalchemy.ext.asyncio.AsyncSession.commit", failing_commit)
+        with pytest.raises(OperationalError):
+            await client.post("/api/timelines/create", json={"query": "Notre Dame fire"})
+
+    created = (await client.post("/api/timelines/create", json={"query": "Notre Dame fire"})).json()
+    assert (await client.get(f"/api/timelines/{created['id']}/status")).status_code == 200
+
+
+async def test_claim_without_a_row_is_trusted_only_for_the_grace_period(client, monkeypatch):
+    # An API process claimed the query, then died before inserting its row
+    assert await query_coalescer.claim("Notre Dame fire", "phantom") is None
+
+    in_grace = (await client.post("/api/timelines/create", json={"query": "Notre Dame fire"})).json()
+    assert in_grace["id"] == "phantom"
+
+    monkeypatch.setattr(settings, "coalesce_claim_grace", 0)
+    created = (await client.post("/api/timelines/create", json={"query": "Notre Dame fire"})).json()
+    assert created["id"] != "phantom"
+    assert (await client.get(f"/api/timelines/{created['id']}/status")).json()["status"] == "processing"
@@ -0,0 +1,65 @@
+from datetime import datetime
+
+import pytest
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.services.event_knowledge import find_known_events, knowledge_row, store_knowledge, title_terms
+from app.services.news_index import significant_terms
+from app.services.search_index import fts5_query
+
+pytestmark = pytest.mark.anyio
+
+DAY = datetime(2019, 4, 15, 18)
+
+
+@pytest.fixture
+def knowledge_enabled(monkeypatch):
+    monkeypatch.setattr(settings, "event_knowledge_enabled", True)
+
+
+async def store(*titles):
+    async with AsyncSessionLocal() as session:
+        await store_knowledge(session, [knowledge_row(title, DAY, [{"url": title}], []) for title in titles])
+        await session.commit()
+
+
+async def lookup(*titles):
+    async with AsyncSessionLocal() as session:
+        return await find_known_events(session, [(title, DAY) for title in titles])
+
+
+@pytest.mark.parametrize("stored, other", [
+    ("Spire collapses during Notre Dame fire", "Roof collapses during Notre Dame fire"),
+    ("Notre Dame fire: development 1", "Notre Dame fire: development 6"),
+])
+async def test_different_events_on_the_same_day_are_not_reused(db, knowledge_enabled, stored, other):
+    await store(stored)
+
+    assert await lookup(other) == [None]
+    [known] = await lookup(stored)
+    assert known.title == stored
+
+
+async def test_restated_title_is_reused(db, knowledge_enabled):
+    await store("Fire breaks out at Notre Dame")
+
+    [known] = await lookup("Notre-Dame fire breaks out")
+    assert known.title == "Fire breaks out at Notre Dame"
+
+
+async def test_an_entry_is_reused_by_one_event_only(db, knowledge_enabled):
+    await store("Fire breaks out at Notre Dame")
+
+    first, second = await lookup("Notre-Dame fire breaks out", "Fire breaks out at Notre Dame")
+    assert first is not None
+    assert second is None
+
+
+def test_a_title_has_the_same_terms_for_reuse_retrieval_and_search():
+    title = "Spire falls after the roof collapses over Notre-Dame, officials said"
+    terms = {"spire", "falls", "roof", "collapses", "notre", "dame", "officials"}
+
+    assert title_terms(title) == terms
+    assert set(significant_terms(title)) == terms
+    assert set(fts5_query(title).replace('"', "").split()) == terms
@@ -0,0 +1,53 @@
+import pytest
+from sqlalchemy import select
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models import Timeline
+from app.services.job_queue import JobQueue, job_queue
+from tests.conftest import wait_for_status
+from worker import recover_orphaned_timelines
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_jobs_are_deduplicated_leased_and_acked(redis):
+    queue = JobQueue(redis)
+    assert await queue.enqueue("t1", {"query": "q"})
+    assert not await queue.enqueue("t1", {"query": "q"})
+
+    job = await queue.claim()
+    assert (job.id, job.payload, job.attempts) == ("t1", {"query": "q"}, 1)
+    # Leased: invisible to other workers, but still queued
+    assert await queue.claim() is None
+    assert await queue.is_queued("t1")
+
+    assert await queue.ack(job)
+    assert not await queue.is_queued("t1")
+
+
+async def test_expired_lease_is_reclaimed_and_the_old_lease_is_fenced(redis, monkeypatch):
+    queue = JobQueue(redis)
+    await queue.enqueue("t1", {"query": "q"})
+    monkeypatch.setattr(settings, "job_visibility_timeout", -1)
+    first = await queue.claim()
+
+    second = await queue.claim()
+    assert second.id == "t1" and second.attempts == 2
+    # The first worker lost its lease: it can neither heartbeat nor ack
+    assert not await queue.extend(first)
+    assert not await queue.ack(first)
+    assert await queue.ack(second)
+
+
+async def test_recovery_sweep_requeues_orphaned_timelines(client, worker, fake_gemini):
+    async with AsyncSessionLocal() as db:
+        db.add(Timeline(id="orphan", query="Notre Dame fire", topic="Notre Dame fire", status="processing"))
+        await db.commit()
+
+    await recover_orphaned_timelines()
+
+    assert (await wait_for_status(client, "orphan"))["status"] == "completed"
+    assert not await job_queue.is_queued("orphan")
+    async with AsyncSessionLocal() as db:
+        assert await db.scalar(select(Timeline.version).where(Timeline.id == "orphan")) == 1
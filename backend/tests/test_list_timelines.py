@@ -0,0 +1,75 @@
+import base64
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import insert
+
+from app.database import AsyncSessionLocal
+from app.models import Timeline
+
+pytestmark = pytest.mark.anyio
+
+NOON = datetime(2019, 4, 15, 12, tzinfo=timezone.utc)
+
+
+async def add_timelines(rows):
+    async with AsyncSessionLocal() as session:
+        await session.execute(insert(Timeline), [
+            {"id": timeline_id, "query": topic, "topic": topic, "status": status, "created_at": created_at}
+            for timeline_id, topic, status, created_at in rows
+        ])
+        await session.commit()
+
+
+async def all_pages(client, **params):
+    ids, cursor = [], None
+    while True:
+        page = (await client.get("/api/timelines", params={**params, **({"cursor": cursor} if cursor else {})})).json()
+        ids += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+async def test_pages_have_no_duplicates_or_gaps_when_created_at_ties(client):
+    # Five timelines created in the same instant, between two others
+    await add_timelines(
+        [("later", "Later", "completed", NOON + timedelta(seconds=1))]
+        + [(f"tie-{idx}", f"Tie {idx}", "completed", NOON) for idx in range(5)]
+        + [("earlier", "Earlier", "completed", NOON - timedelta(seconds=1))]
+    )
+
+    for limit in (1, 2, 3, 7):
+        assert await all_pages(client, limit=limit) == [
+            "later", "tie-4", "tie-3", "tie-2", "tie-1", "tie-0", "earlier"
+        ]
+
+
+async def test_filters_apply_across_pages(client):
+    await add_timelines([
+        (f"t{idx}", f"{'Notre Dame' if idx % 2 else 'Brexit'} {idx}", "failed" if idx == 5 else "completed",
+         NOON + timedelta(minutes=idx))
+        for idx in range(8)
+    ])
+
+    assert await all_pages(client, limit=2, topic_prefix="notre") == ["t7", "t5", "t3", "t1"]
+    assert await all_pages(client, limit=2, topic_prefix="notre", status="completed") == ["t7", "t3", "t1"]
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    "é",
+    base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+    base64.urlsafe_b64encode(b"not json").decode(),
+    base64.urlsafe_b64encode(b"{}").decode(),
+    base64.urlsafe_b64encode(b"[1]").decode(),
+    base64.urlsafe_b64encode(b"null").decode(),
+    base64.urlsafe_b64encode(b'[5, "t1"]').decode(),
+    base64.urlsafe_b64encode(b'["yesterday", "t1"]').decode(),
+    base64.urlsafe_b64encode(b'["2019-04-15T12:00:00", "t1", "extra"]').decode(),
+])
+async def test_bad_cursor_is_a_client_error(client, cursor):
+    response = await client.get("/api/timelines", params={"cursor": cursor})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
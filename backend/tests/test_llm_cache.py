@@ -0,0 +1,34 @@
+import pytest
+
+from app.services import timeline_processor
+from app.services.llm_cache import LLMCache
+
+pytestmark = pytest.mark.anyio
+
+
+def test_query_is_normalized_in_the_key():
+    prompt = "Query: {}\nReturn JSON."
+    assert LLMCache.make_key("m", prompt.format("Notre-Dame  FIRE"), "Notre-Dame  FIRE") == \
+        LLMCache.make_key("m", prompt.format("notre dame fire"), "notre dame fire")
+
+
+def test_rest_of_the_prompt_is_hashed_verbatim():
+    assert LLMCache.make_key("m", 'Claims: ["revenue fell 5%"]') != \
+        LLMCache.make_key("m", 'Claims: ["revenue fell -5%"]')
+    assert LLMCache.make_key("m", "Query: q\nGrowth -5%", "q") != LLMCache.make_key("m", "Query: q\nGrowth 5%", "q")
+
+
+async def test_truncated_queries_are_keyed_on_the_prompt_sent(redis, fake_gemini, monkeypatch):
+    service = timeline_processor.gemini_service
+    ttls = {"skeleton": 60, "investigate": 60, "synthesize": 60}
+    monkeypatch.setattr(service, "cache", LLMCache(100, ttls, client=redis))
+    # Far over the per-field cap, so the prompt only carries a prefix of it
+    tail = " and the long aftermath of the reconstruction debate in parliament" * 30
+
+    await service.discover_timeline_skeleton("Notre-Dame FIRE" + tail)
+    # The same query spelled differently shares the entry, as a short one would
+    await service.discover_timeline_skeleton("notre dame fire" + tail)
+    # Text past the cut never reaches the model, so it's the same prompt
+    await service.discover_timeline_skeleton("notre dame fire" + tail + " and its cost")
+
+    assert sum(fake_gemini.calls.values()) == 1
@@ -0,0 +1,45 @@
+from datetime import datetime
+
+from app.services.news_index import NewsIndex
+
+
+def article(url, title, description=None):
+    return {
+        "url": url,
+        "title": title,
+        "description": description,
+        "source": {"name": "Example"},
+        "publishedAt": "2019-04-16T10:00:00Z",
+    }
+
+
+def make_index(tmp_path):
+    index = NewsIndex(str(tmp_path / "news.db"))
+    index.add_articles([
+        article("https://example.com/notre-dame", "Fire engulfs Notre Dame cathedral", "Paris landmark burns"),
+        article("https://example.com/forest", "Forest fire spreads in California", "Crews battle the blaze"),
+        article("https://example.com/dame-edna", "Dame Edna retires", "Comedian says goodbye"),
+    ])
+    return index
+
+
+def test_articles_below_term_coverage_are_dropped(tmp_path):
+    index = make_index(tmp_path)
+
+    # Any single shared term is an OR match
+    urls = {row["url"] for row in index.search("Notre Dame fire")}
+    assert urls == {
+        "https://example.com/notre-dame", "https://example.com/forest", "https://example.com/dame-edna"
+    }
+
+    results = index.search("Notre Dame fire", min_coverage=0.5)
+    assert [row["url"] for row in results] == ["https://example.com/notre-dame"]
+    assert set(results[0]) == {"url", "outlet", "title", "description", "published_at", "score"}
+
+
+def test_nothing_relevant_leaves_the_event_ungrounded(tmp_path):
+    index = make_index(tmp_path)
+
+    assert index.search(
+        "Wildfire in Paris suburbs", datetime(2019, 4, 13), datetime(2019, 4, 19), min_coverage=0.5
+    ) == []
@@ -0,0 +1,66 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert, select
+
+from app.database import AsyncSessionLocal
+from app.models import Event, Outlet, Source, Timeline
+from app.models.timeline import generate_uuid
+from app.services.serialization import fetch_timeline_dict
+from app.services.timeline_processor import build_event_result, build_source_row, write_event_results
+
+pytestmark = pytest.mark.anyio
+
+
+async def add_event(db) -> dict:
+    timeline = Timeline(query="Notre Dame fire", topic="Notre Dame fire")
+    db.add(timeline)
+    await db.flush()
+    row = {
+        "id": generate_uuid(), "timeline_id": timeline.id, "title": "Fire breaks out",
+        "description": None, "event_date": datetime(2019, 4, 15), "priority": "high", "order": 0,
+    }
+    await db.execute(insert(Event), [row])
+    return row
+
+
+def source(score: float, outlet: str = "Reuters") -> dict:
+    return {"url": "https://www.reuters.com/article/1", "outlet": outlet, "credibility_score": score}
+
+
+async def test_reused_sources_do_not_count_towards_outlet_credibility(db):
+    async with AsyncSessionLocal() as session:
+        fresh_event, reused_event = await add_event(session), await add_event(session)
+        await write_event_results(session, [
+            build_event_result(fresh_event, [build_source_row(fresh_event["id"], source(0.9))], []),
+            # The same investigation copied into another timeline: its 0.9 was already counted
+            build_event_result(reused_event, [build_source_row(reused_event["id"], source(0.9))], [], reused=True),
+        ])
+        await session.commit()
+
+        outlet = (await session.execute(select(Outlet))).scalar_one()
+    assert outlet.credibility_samples == 1
+    assert outlet.credibility_score == pytest.approx(0.9)
+
+
+async def test_sources_are_served_with_their_outlets_current_profile(db):
+    async with AsyncSessionLocal() as session:
+        event = await add_event(session)
+        first = build_event_result(event, [build_source_row(event["id"], source(0.9))], [])
+        await write_event_results(session, [first])
+        second = build_event_result(event, [build_source_row(event["id"], source(0.1, "Reuters UK"))], [])
+        await write_event_results(session, [second])
+        await session.commit()
+
+        # Rows keep what the model said...
+        stored = (await session.execute(select(Source.outlet, Source.credibility_score))).all()
+        assert sorted(stored) == [("Reuters", 0.9), ("Reuters UK", 0.1)]
+        # ...and are served through the outlet: one name, the current mean
+        timeline = await fetch_timeline_dict(session, event["timeline_id"])
+
+    served = [(row["outlet"], row["credibility_score"]) for row in timeline["events"][0]["sources"]]
+    assert served == [("Reuters", pytest.approx(0.5))] * 2
+    # The streamed event shows the profile as of its write
+    assert (second["sources"][0]["outlet"], second["sources"][0]["credibility_score"]) == (
+        "Reuters", pytest.approx(0.5)
+    )
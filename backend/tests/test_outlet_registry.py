@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy import func, select
+
+from app.database import AsyncSessionLocal
+from app.models import Outlet
+from app.services.outlet_registry import outlet_registry
+
+pytestmark = pytest.mark.anyio
+
+REUTERS = [("https://www.reuters.com/article/1", "Reuters")]
+
+
+async def test_rolled_back_registration_is_not_cached(db):
+    async with AsyncSessionLocal() as session:
+        [rolled_back] = await outlet_registry.register(session, REUTERS)
+        await session.rollback()
+
+        [outlet_id] = await outlet_registry.register(session, REUTERS)
+        await session.commit()
+
+        assert outlet_id != rolled_back
+        assert await session.scalar(select(Outlet.id)) == outlet_id
+
+
+async def test_committed_registration_is_cached(db):
+    async with AsyncSessionLocal() as session:
+        [outlet_id] = await outlet_registry.register(session, REUTERS)
+        assert outlet_registry.cached_alias("host:reuters.com") is None
+        await session.commit()
+
+    assert outlet_registry.cached_alias("host:reuters.com") == outlet_id
+    assert outlet_registry.cached_alias("name:reuters") == outlet_id
+
+
+async def test_rolled_back_credibility_is_not_cached(db):
+    def rows(score):
+        return [{"url": url, "outlet": name, "credibility_score": score} for url, name in REUTERS]
+
+    async with AsyncSessionLocal() as session:
+        await outlet_registry.resolve_sources(session, rows(0.9))
+        await session.commit()
+
+        [profile] = (await outlet_registry.resolve_sources(session, rows(0.1))).values()
+        assert profile.credibility_score == pytest.approx(0.5)
+        await session.rollback()
+
+        [profile] = (await outlet_registry.resolve_sources(session, rows(None))).values()
+        assert profile.credibility_score == pytest.approx(0.9)
+        assert await session.scalar(select(func.count()).select_from(Outlet)) == 1
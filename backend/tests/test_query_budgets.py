@@ -0,0 +1,107 @@
+"""
+Exact SQL statement counts and query plans of the timeline read path, so N+1
+regressions and lost indexes fail here rather than in production.
+"""
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event, text
+
+from app.database import AsyncSessionLocal, count_statements, engine
+from app.models import Timeline
+from app.routers.timelines import GET_TIMELINE_QUERY_BUDGETS, GET_TIMELINE_STATUS_QUERY_BUDGET
+from app.services.timeline_processor import process_timeline
+from app.services.timeline_snapshots import invalidate_snapshot
+
+pytestmark = pytest.mark.anyio
+
+
+@contextmanager
+def captured_statements():
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+
+async def query_plans(statements):
+    """EXPLAIN QUERY PLAN detail lines of each captured statement"""
+    plans = []
+    async with engine.connect() as conn:
+        for statement, parameters in statements:
+            rows = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            plans.append([row.detail for row in rows])
+    return plans
+
+
+@pytest.fixture
+async def timeline_id(db, fake_gemini):
+    async with AsyncSessionLocal() as session:
+        timeline = Timeline(query="Notre Dame fire", topic="Notre Dame fire")
+        session.add(timeline)
+        await session.commit()
+    await process_timeline(timeline.id, timeline.query)
+    return timeline.id
+
+
+async def invalidate(timeline_id):
+    async with AsyncSessionLocal() as session:
+        await invalidate_snapshot(session, timeline_id)
+        await session.commit()
+
+
+async def get(client, url):
+    with count_statements() as counter:
+        response = await client.get(url)
+    assert response.status_code == 200
+    return counter[0]
+
+
+async def test_completed_timeline_is_served_from_its_snapshot_in_one_statement(client, timeline_id):
+    assert await get(client, f"/api/timelines/{timeline_id}") == 1
+
+
+@pytest.mark.parametrize("projection", ["summary", "events", "full"])
+async def test_get_timeline_statement_count_per_projection(client, timeline_id, projection):
+    await invalidate(timeline_id)
+    statements = await get(client, f"/api/timelines/{timeline_id}?projection={projection}")
+    assert statements == GET_TIMELINE_QUERY_BUDGETS[projection]
+
+
+async def test_get_timeline_status_statement_count(client, timeline_id):
+    assert await get(client, f"/api/timelines/{timeline_id}/status") == GET_TIMELINE_STATUS_QUERY_BUDGET
+
+
+async def test_read_path_uses_indexes(client, timeline_id):
+    await invalidate(timeline_id)
+    with captured_statements() as statements:
+        await get(client, f"/api/timelines/{timeline_id}?projection=full")
+        await get(client, f"/api/timelines/{timeline_id}/status")
+    plans = await query_plans(statements)
+    details = [line for plan in plans for line in plan]
+
+    # No full scans of the big tables, and each lookup goes through its index
+    assert not [line for line in details if line.startswith("SCAN")], details
+    for index in (
+        "sqlite_autoindex_timelines_1",
+        "ix_events_timeline_id_order",
+        "ix_branches_event_id",
+        "ix_sources_event_id",
+    ):
+        assert any(index in line for line in details), (index, details)
+
+
+async def test_events_come_back_in_order(client, timeline_id):
+    await invalidate(timeline_id)
+    async with engine.connect() as conn:
+        expected = [row.id for row in await conn.execute(
+            text('SELECT id FROM events WHERE timeline_id = :id ORDER BY "order"'), {"id": timeline_id}
+        )]
+    events = (await client.get(f"/api/timelines/{timeline_id}?projection=events")).json()["events"]
+    assert [event["id"] for event in events] == expected
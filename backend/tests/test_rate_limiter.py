@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+from redis.exceptions import ConnectionError
+
+from app.services.rate_limiter import ModelRateLimiter, RedisTokenBucket, TokenBucket
+
+pytestmark = pytest.mark.anyio
+
+LIMITS = {"gemini-2.5-flash": {"rpm": 60, "tpm": 1_000_000}}
+
+
+async def test_shared_buckets_hold_one_quota_for_all_processes(redis):
+    # Two worker processes, each seeing the fleet-wide quota of 60 requests/min
+    first, second = ModelRateLimiter(LIMITS, shared=True), ModelRateLimiter(LIMITS, shared=True)
+    for _ in range(30):
+        await first.acquire("gemini-2.5-flash", 100)
+        await second.acquire("gemini-2.5-flash", 100)
+
+    # The quota is spent: the next request waits for the refill (one per second)
+    with pytest.raises(TimeoutError):
+        async with asyncio.timeout(0.3):
+            await first.acquire("gemini-2.5-flash", 100)
+
+
+async def test_local_buckets_get_a_share_of_the_quota(redis):
+    limiter = ModelRateLimiter(LIMITS, shared=False, processes=4)
+    for _ in range(15):
+        await limiter.acquire("gemini-2.5-flash", 100)
+    with pytest.raises(TimeoutError):
+        async with asyncio.timeout(0.3):
+            await limiter.acquire("gemini-2.5-flash", 100)
+
+
+async def test_settle_can_put_the_shared_bucket_into_debt(redis):
+    limiter = ModelRateLimiter({"gemini-2.5-flash": {"rpm": 600, "tpm": 6000}}, shared=True)
+    await limiter.acquire("gemini-2.5-flash", 1000)
+    await limiter.settle("gemini-2.5-flash", 1000, 7000)
+    # 6000 more tokens than estimated were used: ~1000 tokens (10 s of refill) in debt
+    with pytest.raises(TimeoutError):
+        async with asyncio.timeout(0.3):
+            await limiter.acquire("gemini-2.5-flash", 100)
+
+
+class UnreachableRedis:
+    async def eval(self, *args):
+        raise ConnectionError("Connection refused")
+
+
+async def test_falls_back_to_the_local_share_when_redis_is_down():
+    unreachable = UnreachableRedis()
+    fallback = TokenBucket(2, 2 / 60)
+    bucket = RedisTokenBucket("test", 60, 1, fallback=fallback, client=unreachable)
+    await bucket.acquire(1)
+    await bucket.acquire(1)
+    with pytest.raises(TimeoutError):
+        async with asyncio.timeout(0.3):
+            await bucket.acquire(1)
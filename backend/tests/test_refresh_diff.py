@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from app.services.timeline_processor import diff_anchor_events
+
+
+def stored_event(event_id, title, day):
+    return {"id": event_id, "title": title, "event_date": datetime(2019, 4, day, 18)}
+
+
+def proposal(title, day):
+    return {"title": title, "date": f"2019-04-{day:02d}T18:00:00Z"}
+
+
+def test_new_development_with_a_similar_title_is_new():
+    stored = [
+        stored_event("e1", "Notre Dame fire: development 1", 16),
+        stored_event("e2", "Notre Dame fire: development 2", 17),
+    ]
+    development = proposal("Notre Dame fire: development 5", 25)
+
+    new, changed = diff_anchor_events(stored, [development])
+
+    assert new == [development]
+    assert changed == []
+
+
+def test_restated_event_is_matched_and_moved_date_is_a_change():
+    stored = [stored_event("e1", "Fire breaks out at Notre Dame", 15)]
+
+    assert diff_anchor_events(stored, [proposal("Notre-Dame fire breaks out", 15)]) == ([], [])
+
+    moved = proposal("Fire breaks out at Notre Dame", 16)
+    assert diff_anchor_events(stored, [moved]) == ([], [(stored[0], moved)])
+
+
+def test_similar_title_outside_the_date_window_is_new():
+    stored = [stored_event("e1", "Macron addresses the nation", 16)]
+    later = proposal("Macron addresses the nation", 19)
+
+    assert diff_anchor_events(stored, [later]) == ([later], [])
+
+
+def test_ties_go_to_the_closest_date():
+    stored = [
+        stored_event("e1", "Paris prosecutor gives update", 15),
+        stored_event("e2", "Paris prosecutor gives update", 16),
+    ]
+
+    # Same title as both; the event on its own day is the match, so nothing changed
+    assert diff_anchor_events(stored, [proposal("Paris prosecutor gives update", 15)]) == ([], [])
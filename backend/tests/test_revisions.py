@@ -0,0 +1,114 @@
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy import delete, insert, select, update
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models import Branch, Event, Source, Timeline, TimelineRevision, TimelineSnapshot
+from app.models.timeline import generate_uuid
+from app.services.timeline_processor import process_timeline
+from app.services.timeline_snapshots import materialize_snapshot
+
+pytestmark = pytest.mark.anyio
+
+
+async def rename_timeline(session, timeline_id):
+    await session.execute(update(Timeline).where(Timeline.id == timeline_id).values(topic="Notre-Dame de Paris fire"))
+
+
+async def drop_a_source(session, timeline_id):
+    await session.execute(delete(Source).where(Source.id.in_(select(Source.id).limit(1))))
+
+
+async def add_event(session, timeline_id):
+    event_id = generate_uuid()
+    await session.execute(insert(Event), [{
+        "id": event_id, "timeline_id": timeline_id, "title": "Macron pledges to rebuild",
+        "description": None, "event_date": datetime(2019, 4, 16, 20), "priority": "high", "order": 99,
+    }])
+    await session.execute(insert(Branch), [{
+        "id": generate_uuid(), "event_id": event_id, "narrative": "Rebuilt within five years",
+        "credibility_score": 0.8, "evidence": "Televised address", "source_count": 1,
+    }])
+
+
+async def revise_branches(session, timeline_id):
+    await session.execute(update(Branch).values(narrative="Revised narrative", credibility_score=0.4))
+
+
+async def no_change(session, timeline_id):
+    pass
+
+
+async def retitle_events(session, timeline_id):
+    await session.execute(
+        update(Event).where(Event.timeline_id == timeline_id).values(title=Event.title + " (updated)")
+    )
+
+
+async def delete_first_event(session, timeline_id):
+    event_id = await session.scalar(
+        select(Event.id).where(Event.timeline_id == timeline_id).order_by(Event.order).limit(1)
+    )
+    await session.execute(delete(Source).where(Source.event_id == event_id))
+    await session.execute(delete(Branch).where(Branch.event_id == event_id))
+    await session.execute(delete(Event).where(Event.id == event_id))
+
+
+# Each edit is followed by a re-materialization, i.e. the next revision
+EDITS = [rename_timeline, drop_a_source, add_event, revise_branches, no_change, retitle_events, delete_first_event]
+
+
+async def test_playback_reproduces_every_revision_across_checkpoints(client, fake_gemini, monkeypatch):
+    monkeypatch.setattr(settings, "revision_checkpoint_interval", 3)
+    async with AsyncSessionLocal() as session:
+        timeline = Timeline(query="Notre Dame fire", topic="Notre Dame fire")
+        session.add(timeline)
+        await session.commit()
+    timeline_id = timeline.id
+    await process_timeline(timeline_id, "Notre Dame fire")
+
+    async with AsyncSessionLocal() as session:
+        snapshots = {1: json.loads((await session.get(TimelineSnapshot, timeline_id)).body)}
+    for revision, edit in enumerate(EDITS, start=2):
+        async with AsyncSessionLocal() as session:
+            await edit(session, timeline_id)
+            snapshot = await materialize_snapshot(session, timeline_id)
+            await session.commit()
+            assert snapshot.version == revision
+            snapshots[revision] = json.loads(snapshot.body)
+        # Distinct timestamps for playback by `at`
+        await asyncio.sleep(0.01)
+
+    async with AsyncSessionLocal() as session:
+        checkpoints = (await session.execute(
+            select(TimelineRevision.revision).where(TimelineRevision.checkpoint.is_(True))
+            .order_by(TimelineRevision.revision)
+        )).scalars().all()
+    assert checkpoints == [1, 4, 7]
+
+    revisions = (await client.get(f"/api/timelines/{timeline_id}/revisions")).json()["revisions"]
+    assert [row["revision"] for row in revisions] == list(snapshots)
+    for row in revisions:
+        by_revision = (await client.get(
+            f"/api/timelines/{timeline_id}/playback", params={"revision": row["revision"]}
+        )).json()
+        by_time = (await client.get(
+            f"/api/timelines/{timeline_id}/playback", params={"at": row["created_at"]}
+        )).json()
+        assert by_revision["timeline"] == snapshots[row["revision"]]
+        assert by_time["revision"] == row["revision"]
+        assert by_time["timeline"] == snapshots[row["revision"]]
+
+    latest = (await client.get(f"/api/timelines/{timeline_id}/playback")).json()
+    assert latest["revision"] == max(snapshots)
+    assert (await client.get(
+        f"/api/timelines/{timeline_id}/playback", params={"revision": max(snapshots) + 1}
+    )).status_code == 404
+    assert (await client.get(
+        f"/api/timelines/{timeline_id}/playback", params={"at": "2000-01-01T00:00:00Z"}
+    )).status_code == 404
+
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from app.services.scheduler import InvestigationScheduler
+
+pytestmark = pytest.mark.anyio
+
+
+async def settle():
+    """Let every started task run up to its first wait"""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def test_waiting_chains_run_by_priority_then_arrival():
+    scheduler = InvestigationScheduler(slots=1, per_timeline=10)
+    order = []
+    gate = asyncio.Event()
+
+    async def chain(name, priority):
+        async with scheduler.slot("t1", priority):
+            order.append(name)
+            if name == "holder":
+                await gate.wait()
+
+    holder = asyncio.create_task(chain("holder", "low"))
+    await settle()
+    waiting = [("low", "low"), ("medium", "medium"), ("critical 1", "critical"),
+               ("unknown", "urgent"), ("high", "high"), ("critical 2", "critical")]
+    tasks = [asyncio.create_task(chain(name, priority)) for name, priority in waiting]
+    await settle()
+    gate.set()
+    await asyncio.gather(holder, *tasks)
+
+    # Unknown priorities rank with "medium", after the medium chain that arrived first
+    assert order == ["holder", "critical 1", "critical 2", "high", "medium", "unknown", "low"]
+
+
+async def test_a_timeline_holds_at_most_its_share_of_slots():
+    scheduler = InvestigationScheduler(slots=3, per_timeline=2)
+    started = []
+    gate = asyncio.Event()
+
+    async def chain(timeline_id):
+        async with scheduler.slot(timeline_id, "high"):
+            started.append(timeline_id)
+            await gate.wait()
+
+    # The big timeline arrived first, but can't take the third slot
+    tasks = [asyncio.create_task(chain("big")) for _ in range(4)]
+    tasks += [asyncio.create_task(chain("small")) for _ in range(2)]
+    await settle()
+    assert started == ["big", "big", "small"]
+
+    gate.set()
+    await asyncio.gather(*tasks)
+    assert sorted(started) == ["big"] * 4 + ["small"] * 2
+
+
+async def test_cancelled_waiter_gives_up_its_place():
+    scheduler = InvestigationScheduler(slots=1, per_timeline=1)
+    order = []
+    gate = asyncio.Event()
+
+    async def chain(name):
+        async with scheduler.slot(name, "medium"):
+            order.append(name)
+            if name == "holder":
+                await gate.wait()
+
+    holder = asyncio.create_task(chain("holder"))
+    await settle()
+    cancelled, waiting = asyncio.create_task(chain("cancelled")), asyncio.create_task(chain("waiting"))
+    await settle()
+    cancelled.cancel()
+    gate.set()
+    await asyncio.gather(holder, waiting)
+
+    assert order == ["holder", "waiting"]
+    assert cancelled.cancelled()
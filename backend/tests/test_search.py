@@ -0,0 +1,81 @@
+import pytest
+from sqlalchemy import delete, update
+
+from app.database import AsyncSessionLocal
+from app.models import SearchDocument, Timeline
+from app.services.search_index import index_documents, search, timeline_document
+
+pytestmark = pytest.mark.anyio
+
+
+async def add_timeline(session, timeline_id, topic, status="completed", query=None):
+    session.add(Timeline(id=timeline_id, query=query or topic, topic=topic, status=status))
+    await session.flush()
+    await index_documents(session, [timeline_document(timeline_id, topic, query or topic)])
+
+
+async def matches(session, query, kind=None):
+    return [(row["kind"], row["id"]) for row in await search(session, query, kind)]
+
+
+async def test_fts_index_follows_document_inserts_updates_and_deletes(db):
+    async with AsyncSessionLocal() as session:
+        await add_timeline(session, "t1", "Notre Dame fire")
+        await session.commit()
+        assert await matches(session, "cathedral") == []
+        assert await matches(session, "notre dame") == [("timeline", "t1")]
+
+        # Re-indexing a row updates its document in place
+        await index_documents(session, [timeline_document("t1", "Notre Dame cathedral", "Notre Dame cathedral")])
+        await session.commit()
+        assert await matches(session, "cathedral") == [("timeline", "t1")]
+        assert await matches(session, "fire") == []
+
+        await session.execute(update(SearchDocument).values(content="Paris roof restoration"))
+        await session.commit()
+        assert await matches(session, "cathedral") == []
+        assert await matches(session, "restoration") == [("timeline", "t1")]
+
+        await session.execute(delete(SearchDocument))
+        await session.commit()
+        assert await matches(session, "restoration") == []
+
+
+async def test_failed_and_cancelled_timelines_are_left_out(client):
+    async with AsyncSessionLocal() as session:
+        await add_timeline(session, "done", "Notre Dame fire")
+        await add_timeline(session, "failed", "Notre Dame fire aftermath", status="failed")
+        await add_timeline(session, "cancelled", "Notre Dame fire donations", status="cancelled")
+        await add_timeline(session, "running", "Notre Dame fire inquiry", status="processing")
+        await session.commit()
+
+    response = await client.get("/api/timelines/search", params={"q": "Notre Dame fire"})
+
+    assert response.status_code == 200
+    assert {result["timeline_id"] for result in response.json()["results"]} == {"done", "running"}
+
+
+async def test_results_are_ranked_filtered_and_paged(client):
+    async with AsyncSessionLocal() as session:
+        await add_timeline(session, "passing", "Budget debate", query=(
+            "Parliament debates the budget while ministers argue over spending, taxes, "
+            "pensions and regional funding; a fire drill briefly interrupts the session"
+        ))
+        await add_timeline(session, "focused", "Fire: crews fight fire as fire spreads")
+        await session.commit()
+
+    results = (await client.get("/api/timelines/search", params={"q": "fire"})).json()
+    assert [result["timeline_id"] for result in results["results"]] == ["focused", "passing"]
+    assert results["results"][0]["rank"] > results["results"][1]["rank"]
+    assert results["next_offset"] is None
+
+    first = (await client.get("/api/timelines/search", params={"q": "fire", "limit": 1})).json()
+    second = (await client.get(
+        "/api/timelines/search", params={"q": "fire", "limit": 1, "offset": first["next_offset"]}
+    )).json()
+    assert [page["results"][0]["timeline_id"] for page in (first, second)] == ["focused", "passing"]
+    assert second["next_offset"] is None
+
+    assert (await client.get("/api/timelines/search", params={"q": "fire", "kind": "event"})).json()["results"] == []
+    # Stopwords only: nothing to match
+    assert (await client.get("/api/timelines/search", params={"q": "the of"})).json()["results"] == []
@@ -0,0 +1,38 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services import timeline_processor
+from benchmarks.fake_gemini import FakeGeminiConfig, install
+
+pytestmark = pytest.mark.anyio
+
+# Generous for a loaded CI box, far below one model round trip
+MAX_POLL_LATENCY = 0.25
+
+
+async def test_status_polls_stay_fast_while_a_slow_model_generates(client, worker):
+    # Every call takes ~1 s (skeleton 2 s); a blocking client would stall the polls for that long
+    models = install(timeline_processor.gemini_service, FakeGeminiConfig(
+        latency_median=1.0, latency_sigma=0, events=2, sources=2, stream_chunks=2
+    ))
+    timeline_id = (await client.post("/api/timelines/create", json={"query": "Slow model"})).json()["id"]
+
+    latencies = []
+    polled_while_generating = 0
+    while True:
+        start = time.perf_counter()
+        status = (await client.get(f"/api/timelines/{timeline_id}/status")).json()
+        health = await client.get("/health")
+        latencies.append(time.perf_counter() - start)
+        assert health.status_code == 200
+        if status["status"] != "processing":
+            break
+        polled_while_generating += sum(models.calls.values()) > 0
+        await asyncio.sleep(0.05)
+
+    assert status["status"] == "completed"
+    assert polled_while_generating >= 10
+    assert max(latencies) < MAX_POLL_LATENCY
+
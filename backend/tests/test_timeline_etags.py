@@ -0,0 +1,61 @@
+import pytest
+
+from app.services import timeline_processor
+from app.services.job_queue import job_queue
+from benchmarks.fake_gemini import FakeGeminiConfig, install
+from worker import run_job
+
+pytestmark = pytest.mark.anyio
+
+
+async def run_next_job():
+    await run_job(await job_queue.claim())
+
+
+def install_fake(events: int):
+    install(timeline_processor.gemini_service, FakeGeminiConfig(latency_median=0.01, latency_sigma=0, events=events))
+
+
+async def test_matching_etag_gets_304_and_a_refresh_changes_it(client, db):
+    install_fake(events=3)
+    timeline_id = (await client.post("/api/timelines/create", json={"query": "Notre Dame fire"})).json()["id"]
+    # Nothing materialized while processing
+    assert "ETag" not in (await client.get(f"/api/timelines/{timeline_id}")).headers
+    await run_next_job()
+    url = f"/api/timelines/{timeline_id}"
+
+    response = await client.get(url, headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    etag, body = response.headers["ETag"], response.json()
+    assert response.headers["Cache-Control"] == "no-cache"
+
+    for if_none_match in (etag, f"W/{etag}", f'"stale", {etag}', "*", etag[:-1] + '-gzip"'):
+        not_modified = await client.get(url, headers={"If-None-Match": if_none_match})
+        assert not_modified.status_code == 304, if_none_match
+        assert not_modified.content == b""
+        assert not_modified.headers["ETag"] == etag
+    assert (await client.get(url, headers={"If-None-Match": '"stale"'})).status_code == 200
+
+    # A compressed representation has its own tag, still matching the snapshot
+    gzipped = await client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert gzipped.headers["ETag"] == etag[:-1] + '-gzip"'
+    assert (await client.get(url, headers={"If-None-Match": gzipped.headers["ETag"]})).status_code == 304
+
+    # A refresh that finds nothing new keeps the version, and with it the tag
+    assert (await client.post(f"{url}/refresh")).status_code == 200
+    await run_next_job()
+    assert (await client.get(url, headers={"If-None-Match": etag})).status_code == 304
+
+    # Two new developments; while the refresh is queued the current version is still served
+    install_fake(events=5)
+    assert (await client.post(f"{url}/refresh")).status_code == 200
+    assert (await client.get(url, headers={"If-None-Match": etag})).status_code == 304
+
+    await run_next_job()
+    refreshed = await client.get(url, headers={"If-None-Match": etag, "Accept-Encoding": "identity"})
+    assert refreshed.status_code == 200
+    assert refreshed.headers["ETag"] != etag
+    assert refreshed.json()["version"] == body["version"] + 1
+    assert len(refreshed.json()["events"]) == len(body["events"]) + 2
+    assert (await client.get(url, headers={"If-None-Match": refreshed.headers["ETag"]})).status_code == 304
@@ -0,0 +1,22 @@
+import uuid
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_well_formed_trace_id_is_honoured(client):
+    trace_id = str(uuid.uuid4())
+    response = await client.get("/health", headers={"X-Trace-ID": trace_id})
+
+    assert response.status_code == 200
+    assert response.headers["X-Trace-ID"] == trace_id
+
+
+@pytest.mark.parametrize("trace_id", ["a" * 130, "abc def", "<script>", "a" * 65])
+async def test_malformed_trace_id_is_replaced(client, trace_id):
+    response = await client.get("/health", headers={"X-Trace-ID": trace_id})
+
+    assert response.status_code == 200
+    assert response.headers["X-Trace-ID"] != trace_id
+    assert len(response.headers["X-Trace-ID"]) == 32
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import signal
+from typing import Dict
+
+from prometheus_client import start_http_server
+from redis.exceptions import RedisError
+from sqlalchemy import select, update
+
+from app.config import settings
+from app.database import init_db, AsyncSessionLocal
+from app.models import Timeline, TimelineSnapshot
+from app.services.job_queue import Job, job_queue
+from app.services.query_coalescer import query_coalescer
+from app.services.timeline_processor import process_timeline, refresh_timeline
+from app.telemetry import TraceIdFilter, new_trace_id, trace_id_var
+
+logger = logging.getLogger("veritas.worker")
+
+
+async def recover_orphaned_timelines():
+    """
+    Startup sweep: re-enqueue timelines stuck in "processing" with no queued job.
+    Jobs whose worker died mid-run are still queued and come back once their lease expires.
+    A timeline that still has its snapshot was being refreshed, and is refreshed again.
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Timeline.id, Timeline.query, TimelineSnapshot.body.isnot(None))
+            .outerjoin(TimelineSnapshot, TimelineSnapshot.timeline_id == Timeline.id)
+            .where(Timeline.status == "processing")
+        )
+        rows = result.all()
+
+    recovered = 0
+    for timeline_id, query, refreshing in rows:
+        if not await job_queue.is_queued(timeline_id):
+            await job_queue.enqueue(timeline_id, {"query": query, "refresh": bool(refreshing)})
+            recovered += 1
+    if recovered:
+        logger.info("Re-enqueued %d orphaned timeline(s)", recovered)
+
+
+async def set_timeline_status(timeline_id: str, status: str):
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(Timeline)
+            .where(Timeline.id == timeline_id, Timeline.status == "processing")
+            .values(status=status)
+        )
+        await db.commit()
+
+
+# Jobs running in this process, by id, so cancellations can reach them
+running_jobs: Dict[str, asyncio.Task] = {}
+
+
+async def listen_for_cancellations():
+    """Cancel the task of a running job when the API cancels its timeline"""
+    while True:
+        try:
+            async for job_id in job_queue.cancellations():
+                task = running_jobs.get(job_id)
+                if task is not None:
+                    logger.info("Cancelling job %s", job_id)
+                    task.cancel()
+        except RedisError as e:
+            # Missed cancellations still stop their jobs at the next write
+            logger.warning("Cancellation listener dropped, reconnecting: %s", e)
+            await asyncio.sleep(settings.worker_poll_interval)
+
+
+async def run_job(job: Job):
+    """Process one job while heartbeating its lease; abort if the lease is lost"""
+    # Carry the trace id of the API request that enqueued the job into its logs and metrics
+    trace_id_var.set(job.payload.get("trace_id") or new_trace_id())
+    if job.payload.get("refresh"):
+        task = asyncio.create_task(refresh_timeline(job.id))
+    else:
+        task = asyncio.create_task(process_timeline(job.id, job.payload["query"]))
+    running_jobs[job.id] = task
+
+    lease_lost = False
+    try:
+        while not task.done():
+            await asyncio.wait({task}, timeout=settings.job_visibility_timeout / 3)
+            if not task.done() and not await job_queue.extend(job):
+                logger.warning("Lost lease on job %s, abandoning it", job.id)
+                lease_lost = True
+                task.cancel()
+    finally:
+        running_jobs.pop(job.id, None)
+
+    try:
+        await task
+    except asyncio.CancelledError:
+        if lease_lost:
+            return
+        # Cancelled through the API, which has already set the timeline's status
+        logger.info("Job %s cancelled", job.id)
+    except Exception:
+        # process_timeline has already marked the timeline as failed
+        # (refresh_timeline as completed, at its previous version)
+        logger.exception("Job %s failed", job.id)
+    await job_queue.ack(job)
+
+
+async def consume(stop: asyncio.Event):
+    while not stop.is_set():
+        job = await job_queue.claim()
+        if job is None:
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=settings.worker_poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        if job.attempts > settings.job_max_attempts:
+            logger.error("Job %s exceeded %d attempts, giving up", job.id, settings.job_max_attempts)
+            if job.payload.get("refresh"):
+                # A refresh never touched the previous version
+                await set_timeline_status(job.id, "completed")
+            else:
+                await set_timeline_status(job.id, "failed")
+                await query_coalescer.release(job.payload.get("query", ""), job.id)
+            await job_queue.ack(job)
+            continue
+
+        await run_job(job)
+
+
+async def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s [%(trace_id)s] %(name)s: %(message)s"
+    )
+    for handler in logging.getLogger().handlers:
+        handler.addFilter(TraceIdFilter())
+
+    if settings.worker_metrics_port:
+        start_http_server(settings.worker_metrics_port)
+
+    await init_db()
+    await recover_orphaned_timelines()
+
+    # Stop claiming new jobs on SIGINT/SIGTERM and let running ones finish;
+    # anything cut short is picked up by another worker after its lease expires
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    listener = asyncio.create_task(listen_for_cancellations())
+    logger.info("Worker started with %d concurrent job slot(s)", settings.worker_concurrency)
+    await asyncio.gather(*(consume(stop) for _ in range(settings.worker_concurrency)))
+    listener.cancel()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,7 +1,7 @@
-import { CheckCircle2, Loader2, XCircle } from 'lucide-react';
+import { Ban, CheckCircle2, Loader2, XCircle } from 'lucide-react';
 
 interface StatusBadgeProps {
-  status: 'processing' | 'completed' | 'failed';
+  status: 'processing' | 'completed' | 'failed' | 'cancelled';
 }
 
 export default function StatusBadge({ status }: StatusBadgeProps) {
@@ -24,6 +24,12 @@ export default function StatusBadge({ status }: StatusBadgeProps) {
       className: 'bg-red-100 text-red-700',
       iconClassName: '',
     },
+    cancelled: {
+      icon: Ban,
+      label: 'Cancelled',
+      className: 'bg-gray-100 text-gray-700',
+      iconClassName: '',
+    },
   };
 
   const { icon: Icon, label, className, iconClassName } = config[status];
@@ -1,14 +1,19 @@
-import { useQuery } from '@tanstack/react-query';
-import api from '../services/api';
+import { useEffect, useState } from 'react';
+import { useQuery, useQueryClient } from '@tanstack/react-query';
+import api, { API_BASE_URL } from '../services/api';
 import type { TimelineStatusResponse } from '../types/timeline';
 import { logger } from '../utils/logger';
 
 /**
- * Hook to poll timeline status
- * Auto-refetches every 2 seconds while status is 'processing'
+ * Hook to track timeline status
+ * Subscribes to the server-sent progress stream while status is 'processing'.
+ * Falls back to polling every 2 seconds if the stream can't be opened.
  */
 export const useTimelineStatus = (timelineId: string | undefined) => {
-  return useQuery({
+  const queryClient = useQueryClient();
+  const [streamFailed, setStreamFailed] = useState(false);
+
+  const query = useQuery({
     queryKey: ['timeline-status', timelineId],
     queryFn: async (): Promise<TimelineStatusResponse> => {
       const response = await api.get<TimelineStatusResponse>(
@@ -21,9 +26,9 @@ export const useTimelineStatus = (timelineId: string | undefined) => {
     },
     enabled: !!timelineId,
     refetchInterval: (query) => {
-      // Poll every 2 seconds if status is 'processing'
+      // Poll every 2 seconds only if the progress stream is unavailable
       const data = query.state.data;
-      const shouldPoll = data?.status === 'processing';
+      const shouldPoll = streamFailed && data?.status === 'processing';
       if (import.meta.env.DEV) {
         logger.debug('[Timeline Polling]', {
           status: data?.status,
@@ -37,4 +42,50 @@ export const useTimelineStatus = (timelineId: string | undefined) => {
     staleTime: 0, // Always consider data stale to enable refetching
     retry: 3,
   });
+
+  const isProcessing = query.data?.status === 'processing';
+
+  useEffect(() => {
+    if (!timelineId || !isProcessing || streamFailed) {
+      return;
+    }
+
+    const source = new EventSource(
+      `${API_BASE_URL}/api/timelines/${timelineId}/stream`
+    );
+
+    const updateStatus = (message: MessageEvent) => {
+      const data = JSON.parse(message.data);
+      if (import.meta.env.DEV) {
+        logger.debug('[Timeline Stream]', data);
+      }
+      if (!data.progress) {
+        return;
+      }
+      queryClient.setQueryData<TimelineStatusResponse>(
+        ['timeline-status', timelineId],
+        (previous) => ({
+          id: timelineId,
+          status: data.status ?? previous?.status ?? 'processing',
+          progress: data.progress,
+        })
+      );
+      if (data.status && data.status !== 'processing') {
+        source.close();
+      }
+    };
+
+    source.addEventListener('status', updateStatus);
+    source.addEventListener('progress', updateStatus);
+    source.addEventListener('event', updateStatus);
+    source.addEventListener('error', () => {
+      logger.error('[Timeline Stream] connection lost, falling back to polling');
+      source.close();
+      setStreamFailed(true);
+    });
+
+    return () => source.close();
+  }, [timelineId, isProcessing, streamFailed, queryClient]);
+
+  return query;
 };
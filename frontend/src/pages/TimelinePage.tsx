@@ -127,6 +127,25 @@ export default function TimelinePage() {
     );
   }
 
+  // Cancelled state
+  if (status?.status === 'cancelled') {
+    return (
+      <div className="min-h-screen bg-white flex items-center justify-center">
+        <div className="text-center">
+          <p className="text-xl text-gray-900 mb-4">Timeline generation was cancelled</p>
+          <p className="text-gray-600 mb-6">Search for the topic again to start over.</p>
+          <Link
+            to="/"
+            className="inline-flex items-center gap-2 px-6 py-3 bg-blue-600 text-white rounded-lg hover:bg-blue-700 transition-colors"
+          >
+            <ArrowLeft size={20} />
+            Back to Home
+          </Link>
+        </div>
+      </div>
+    );
+  }
+
   // Completed state - loading full timeline
   if (timelineLoading) {
     return (
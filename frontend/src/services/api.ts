@@ -1,7 +1,7 @@
 import axios from "axios";
 import { logger } from "../utils/logger";
 
-const API_BASE_URL =
+export const API_BASE_URL =
   import.meta.env.VITE_API_BASE_URL || "http://localhost:8000";
 
 export const api = axios.create({
@@ -40,17 +40,18 @@ export interface Timeline {
   id: string;
   topic: string;
   query: string;
-  status: 'processing' | 'completed' | 'failed';
+  status: 'processing' | 'completed' | 'failed' | 'cancelled';
   progress: string;
   date_range_start?: string;
   date_range_end?: string;
   created_at: string;
+  version: number;
   events: Event[];
 }
 
 export interface TimelineStatus {
   id: string;
-  status: 'processing' | 'completed' | 'failed';
+  status: 'processing' | 'completed' | 'failed' | 'cancelled';
   progress: string;
 }
 